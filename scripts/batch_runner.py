@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Batch API mode for large, non-interactive screening runs.
+
+Every candidate request is built by the provider's own `build_request`, so batch and
+interactive runs send identical payloads. Requests are serialized into OpenAI Batch
+JSONL or Anthropic Message Batches format, submitted, polled until they finish, and
+mapped back through `structure_result` into the usual
+`evaluation-results/evaluation_<timestamp>.json` file.
+
+All progress lives in a state file under `.cache/batches/<run>/state.json`, so an
+interrupted run (or a submit-only run with --batch-no-wait) can be picked up later
+with --batch-resume.
+
+`evaluate_portfolios.py --base-url` points both SDKs at another server. The local
+stand-in (stand_in_server.py) serves the OpenAI files/batches and Anthropic message
+batches endpoints, so submit, poll, collect and --batch-resume can be tested offline.
+"""
+
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Iterator, Optional, Tuple, List
+
+from scripts.run_journal import atomic_write_json
+from scripts.prompt_builder import prompt_fingerprint
+
+
+# Stay safely below the per-batch upload limits (OpenAI 200 MB, Anthropic 256 MB)
+MAX_BATCH_FILE_BYTES = 180 * 1024 * 1024
+MAX_BATCH_REQUESTS = 10000
+
+
+def _custom_id(candidate_id: str) -> str:
+    return f"candidate-{candidate_id}"
+
+
+def _candidate_id(custom_id: str) -> str:
+    return custom_id.split("-", 1)[1]
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API (/v1/batches) for chat completions."""
+
+    endpoint = "/v1/chat/completions"
+    terminal_statuses = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.client = provider.client
+
+    def serialize(self, custom_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        body = dict(params)
+        # SDK-only extra_body fields go straight into the request body
+        body.update(body.pop("extra_body", None) or {})
+        return {"custom_id": custom_id, "method": "POST", "url": self.endpoint, "body": body}
+
+    def submit(self, jsonl_path: Path) -> str:
+        with open(jsonl_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=self.endpoint,
+            completion_window="24h"
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> Tuple[str, bool, Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts.model_dump() if batch.request_counts else {}
+        return batch.status, batch.status in self.terminal_statuses, counts
+
+    def results(self, batch_id: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """Yield (custom_id, response body, error) for every request in the batch."""
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code", 200) >= 400:
+                    error = record.get("error") or (response.get("body") or {}).get("error")
+                    yield record["custom_id"], None, json.dumps(error)
+                else:
+                    yield record["custom_id"], response.get("body"), None
+
+    @staticmethod
+    def response_text(body: Dict[str, Any]) -> Optional[str]:
+        return body["choices"][0]["message"].get("content")
+
+
+class AnthropicBatchBackend:
+    """Anthropic Message Batches API (/v1/messages/batches)."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.client = provider.client
+
+    def serialize(self, custom_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"custom_id": custom_id, "params": params}
+
+    def submit(self, jsonl_path: Path) -> str:
+        with open(jsonl_path, "r") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def poll(self, batch_id: str) -> Tuple[str, bool, Dict[str, Any]]:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts.model_dump() if batch.request_counts else {}
+        return batch.processing_status, batch.processing_status == "ended", counts
+
+    def results(self, batch_id: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """Yield (custom_id, message, error) for every request in the batch."""
+        for entry in self.client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                yield entry.custom_id, result.message.model_dump(), None
+            else:
+                error = getattr(result, "error", None)
+                detail = error.model_dump() if hasattr(error, "model_dump") else error
+                yield entry.custom_id, None, json.dumps({"type": result.type, "error": detail})
+
+    @staticmethod
+    def response_text(body: Dict[str, Any]) -> Optional[str]:
+        return "".join(block.get("text", "") for block in body.get("content", []) if block.get("type") == "text")
+
+
+def backend_for(provider):
+    """Pick the batch backend matching a provider instance."""
+    name = provider.__class__.__name__
+    if name == "OpenAIProvider":
+        return OpenAIBatchBackend(provider)
+    if name == "ClaudeProvider":
+        return AnthropicBatchBackend(provider)
+    raise ValueError(f"Batch mode is not supported for provider {name}")
+
+
+class BatchRunner:
+    """Drives a PortfolioEvaluator run through a provider's batch API."""
+
+    def __init__(self, evaluator, poll_interval: float = 60, wait: bool = True):
+        self.evaluator = evaluator
+        self.backend = backend_for(evaluator.provider)
+        self.poll_interval = poll_interval
+        self.wait = wait
+
+    # ------------------------------------------------------------------ state
+
+    @staticmethod
+    def load_state(state_path: Path) -> Dict[str, Any]:
+        with open(state_path, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def save_state(state: Dict[str, Any], state_path: Path):
+        """Atomically persist batch state (temp file + rename)."""
+        atomic_write_json(state_path, state)
+
+    # ------------------------------------------------------------------ run
+
+    def start(self, candidate_ids: Optional[List[str]] = None) -> Optional[Path]:
+        """Serialize and submit a new batch run. Returns the state file path."""
+        evaluator = self.evaluator
+        run = evaluator.prepare_run(candidate_ids)
+        if run is None:
+            return None
+        prompt, exemplar_images, candidate_files, ai_ratings_file = run
+
+        state_dir = evaluator.base_dir / ".cache" / "batches" / ai_ratings_file.stem
+        state_dir.mkdir(parents=True, exist_ok=True)
+        state_path = state_dir / "state.json"
+
+        # Near-duplicates are filled in from their canonical candidate at collection time
+        duplicates = evaluator.find_duplicates()
+
+        # Candidates with unchanged inputs are served from the result cache, not submitted
+        cached_ratings: Dict[str, Any] = {}
+        cache_keys: Dict[str, str] = {}
+        to_submit: List[Path] = []
+        for candidate_file in candidate_files:
+            if candidate_file.stem.split("_")[1] in duplicates:
+                continue
+            cached = evaluator._cached_result(candidate_file, prompt)
+            if cached is not None:
+                cached_ratings[candidate_file.stem.split("_")[1]] = cached
+                continue
+            to_submit.append(candidate_file)
+            if evaluator.result_cache is not None:
+                # Fingerprint the inputs as submitted, so results are cached under them
+                cache_keys[candidate_file.stem.split("_")[1]] = evaluator._result_cache_key(candidate_file, prompt)
+        if cached_ratings:
+            print(f"\n♻️  {len(cached_ratings)} candidate(s) served from the result cache")
+
+        print(f"\n📦 Serializing {len(to_submit)} request(s) for batch submission...")
+        chunks = self._write_chunks(state_dir, prompt, exemplar_images, to_submit)
+
+        state = {
+            "provider": evaluator.provider.__class__.__name__,
+            "model": getattr(evaluator.provider, "model", "unknown"),
+            "started_at": evaluator.start_time.isoformat(),
+            "session_start": (evaluator.session_start or evaluator.start_time).isoformat(),
+            "run_file": str(ai_ratings_file.relative_to(evaluator.base_dir)),
+            "prompt": prompt,
+            "exemplar_images": evaluator.exemplar_images_used,
+            "exemplar_hashes": evaluator.exemplar_hashes,
+            "no_exemplars": evaluator.no_exemplars,
+            "compact_prompt_mode": evaluator.compact_prompt,
+            "candidates": {f.stem.split("_")[1]: f.name for f in candidate_files},
+            "cached_ratings": cached_ratings,
+            "result_cache_keys": cache_keys,
+            "duplicates": duplicates,
+            "batches": chunks,
+            "collected": False
+        }
+        self.save_state(state, state_path)
+        print(f"  State file: {state_path}")
+
+        return self._continue(state, state_path)
+
+    def resume(self, state_path: Path) -> Optional[Path]:
+        """Pick up a batch run from its state file."""
+        state_path = Path(state_path)
+        state = self.load_state(state_path)
+
+        provider = self.evaluator.provider
+        if state["provider"] != provider.__class__.__name__ or state["model"] != getattr(provider, "model", None):
+            raise ValueError(
+                f"Batch was created with {state['provider']} ({state['model']}); "
+                f"re-run with the same --model to resume it"
+            )
+        if state.get("collected"):
+            print(f"✓ Batch results already collected into {state['run_file']}")
+            return state_path
+
+        # Restore run identity so the results land in the original file
+        self.evaluator.start_time = datetime.fromisoformat(state["started_at"])
+        # Run time is measured from submission, not from this resume
+        self.evaluator.session_start = datetime.fromisoformat(state.get("session_start", state["started_at"]))
+        self.evaluator.full_prompt = state["prompt"]
+        self.evaluator.prompt_fingerprint = prompt_fingerprint(state["prompt"])
+        self.evaluator.exemplar_images_used = state["exemplar_images"]
+        self.evaluator.exemplar_hashes = state.get("exemplar_hashes", {})
+        self.evaluator.candidates_planned = list(state["candidates"].values())
+        self.evaluator.no_exemplars = state["no_exemplars"]
+        self.evaluator.compact_prompt = state.get("compact_prompt_mode", False)
+        self.evaluator.duplicates = state.get("duplicates", {})
+
+        print(f"🔁 Resuming batch run {state['run_file']}")
+        return self._continue(state, state_path)
+
+    def _continue(self, state: Dict[str, Any], state_path: Path) -> Optional[Path]:
+        self._submit_pending(state, state_path)
+
+        if state["batches"] and not self.wait:
+            print("\n⏸  Submitted without waiting. Collect results later with:")
+            print(f"   python3 scripts/evaluate_portfolios.py --batch-resume {state_path}")
+            return state_path
+
+        self._poll_until_done(state, state_path)
+        self._collect(state, state_path)
+        return state_path
+
+    def _write_chunks(self, state_dir: Path, prompt: str, exemplar_images: List[str],
+                      candidate_files: List[Path]) -> List[Dict[str, Any]]:
+        """Write request JSONL files, splitting so each stays under the upload limits."""
+        chunks: List[Dict[str, Any]] = []
+        handle = None
+        size = 0
+
+        try:
+            for candidate_file in candidate_files:
+                candidate_id = candidate_file.stem.split("_")[1]
+                params = self.evaluator.provider.build_request(str(candidate_file), prompt, exemplar_images)
+                line = json.dumps(self.backend.serialize(_custom_id(candidate_id), params)) + "\n"
+                line_bytes = len(line.encode("utf-8"))
+
+                if handle is None or size + line_bytes > MAX_BATCH_FILE_BYTES \
+                        or len(chunks[-1]["custom_ids"]) >= MAX_BATCH_REQUESTS:
+                    if handle:
+                        handle.close()
+                    path = state_dir / f"requests_{len(chunks) + 1}.jsonl"
+                    handle = open(path, "w")
+                    size = 0
+                    chunks.append({"input_file": path.name, "custom_ids": [], "batch_id": None, "status": None})
+
+                handle.write(line)
+                size += line_bytes
+                chunks[-1]["custom_ids"].append(_custom_id(candidate_id))
+        finally:
+            if handle:
+                handle.close()
+
+        print(f"  Wrote {len(chunks)} batch file(s)")
+        return chunks
+
+    def _submit_pending(self, state: Dict[str, Any], state_path: Path):
+        for i, chunk in enumerate(state["batches"], 1):
+            if chunk["batch_id"]:
+                continue
+            print(f"🚀 Submitting batch {i}/{len(state['batches'])} ({len(chunk['custom_ids'])} requests)...")
+            chunk["batch_id"] = self.backend.submit(state_path.parent / chunk["input_file"])
+            chunk["status"] = "submitted"
+            # Persist immediately so a crash never re-submits (and re-pays for) a batch
+            self.save_state(state, state_path)
+            print(f"  Batch id: {chunk['batch_id']}")
+
+    def _poll_until_done(self, state: Dict[str, Any], state_path: Path):
+        while True:
+            pending = 0
+            for chunk in state["batches"]:
+                if chunk.get("finished"):
+                    continue
+                status, finished, counts = self.backend.poll(chunk["batch_id"])
+                chunk["status"] = status
+                chunk["request_counts"] = counts
+                chunk["finished"] = finished
+                if not finished:
+                    pending += 1
+            self.save_state(state, state_path)
+
+            progress = ", ".join(f"{c['batch_id']}: {c['status']}" for c in state["batches"])
+            print(f"  [{datetime.now().strftime('%H:%M:%S')}] {progress}")
+            if not pending:
+                return
+            time.sleep(self.poll_interval)
+
+    def _collect(self, state: Dict[str, Any], state_path: Path):
+        """Map batch results back through structure_result and write the run file."""
+        evaluator = self.evaluator
+        provider = evaluator.provider
+        candidate_order = list(state["candidates"].keys())
+        ai_ratings: Dict[str, Any] = {}
+        failures: Dict[str, str] = {}
+
+        for chunk in state["batches"]:
+            for custom_id, body, error in self.backend.results(chunk["batch_id"]):
+                candidate_id = _candidate_id(custom_id)
+                if error is not None:
+                    failures[candidate_id] = error
+                    continue
+                try:
+                    raw_result = provider.parse_response_text(self.backend.response_text(body))
+                except Exception as e:
+                    failures[candidate_id] = f"{type(e).__name__}: {e}"
+                    continue
+                usage = provider._extract_usage(body)
+                cache_key = state.get("result_cache_keys", {}).get(candidate_id)
+                if cache_key and evaluator.result_cache is not None:
+                    evaluator.result_cache.put(cache_key, raw_result, usage, model=state["model"])
+                structured = evaluator.structure_result(raw_result, candidate_id, state["candidates"][candidate_id])
+                if usage:
+                    structured["usage"] = usage
+                    structured["call_metrics"] = {
+                        "model": state["model"],
+                        "batch": True,
+                        "cost_usd": evaluator.price_table.cost(state["model"], usage, batch=True)
+                    }
+                ai_ratings[candidate_id] = structured
+
+        ai_ratings.update(state.get("cached_ratings", {}))
+
+        for duplicate_id, match in evaluator.duplicates.items():
+            if match["candidate_id"] in ai_ratings:
+                evaluator._link_duplicates(ai_ratings, match["candidate_id"])
+            else:
+                failures[duplicate_id] = f"near-duplicate of candidate {match['candidate_id']}, which failed"
+
+        missing = [cid for cid in candidate_order if cid not in ai_ratings and cid not in failures]
+        for cid in missing:
+            failures[cid] = "no result returned by batch"
+
+        ai_ratings = evaluator._in_candidate_order(ai_ratings, candidate_order)
+        ai_ratings_file = evaluator.base_dir / state["run_file"]
+        evaluator.run_metadata["batch"] = {
+            "batch_ids": [c["batch_id"] for c in state["batches"]],
+            "failed_candidates": {cid: failures[cid] for cid in candidate_order if cid in failures}
+        }
+        evaluator.save_with_metadata(ai_ratings, ai_ratings_file, final=True)
+        evaluator.update_latest_symlink(ai_ratings_file)
+
+        state["collected"] = True
+        self.save_state(state, state_path)
+
+        print(f"\n✓ Batch evaluation complete!")
+        print(f"  Results saved to: {ai_ratings_file}")
+        print(f"  Evaluated: {len(ai_ratings)}/{len(candidate_order)} candidates")
+        if failures:
+            print(f"  Failed: {', '.join(cid for cid in candidate_order if cid in failures)}")
+        evaluator.print_summary(ai_ratings)
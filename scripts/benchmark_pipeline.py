@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the evaluation pipeline.
+
+Drives PortfolioEvaluator with a MockProvider (no API calls, no cost) over
+synthetic candidate sets and reports, per scenario (candidates x concurrency):
+throughput, how close the run came to the ideal wall time given the simulated
+model latency, peak memory, and time per pipeline stage (from the tracing spans).
+
+Results are written to reports/benchmarks/ and compared against a stored
+baseline, so a change that slows the pipeline down shows up as a regression:
+
+    python3 benchmark_pipeline.py                                 # 10/100/1000 candidates
+    python3 benchmark_pipeline.py --sizes 100 --concurrency 1 4 16 32
+    python3 benchmark_pipeline.py --save-baseline                 # accept current numbers
+    python3 benchmark_pipeline.py --fail-on-regression            # for CI
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.evaluate_portfolios import PortfolioEvaluator
+from scripts.mock_provider import MockProvider, LATENCY_DISTRIBUTIONS
+from scripts.image_cache import ImagePayloadCache
+from scripts.rate_limiter import RateLimiter
+from scripts.pricing import percentile_rollup
+from scripts.perceptual_hash import DEFAULT_THRESHOLD as DEDUPE_THRESHOLD
+from scripts.run_journal import atomic_write_json
+from scripts.tracing import start_tracing, stop_tracing
+
+try:
+    from PIL import Image, ImageDraw
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+BASE_DIR = Path(__file__).parent.parent
+RESULTS_DIR = BASE_DIR / "reports" / "benchmarks"
+DEFAULT_BASELINE = RESULTS_DIR / "pipeline-baseline.json"
+# Prompt inputs copied into the benchmark workspace
+PROMPT_FILES = ("core-prompt.md", "rubric.json", "examplars.json")
+
+
+def make_candidate_image(path: Path, size: tuple, seed: int):
+    """A synthetic portfolio page: coloured sections, image blocks and text lines.
+
+    Layouts differ per seed, so near-duplicate detection does not collapse them.
+    """
+    rng = random.Random(seed)
+    width, height = size
+    img = Image.new("RGB", size, tuple(rng.randint(200, 255) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    y = 0
+    while y < height:
+        section = rng.randint(height // 12, height // 4)
+        draw.rectangle([0, y, width, y + section], fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        for _ in range(rng.randint(1, 4)):
+            x0, y0 = rng.randint(0, width // 2), y + rng.randint(0, section // 2)
+            draw.rectangle([x0, y0, x0 + rng.randint(width // 8, width // 2), y0 + rng.randint(20, section // 2)],
+                           fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        for line in range(rng.randint(2, 8)):
+            ty = y + 20 + line * 28
+            draw.rectangle([40, ty, 40 + rng.randint(width // 6, width - 80), ty + 12], fill=(30, 30, 30))
+        y += section
+    img.save(path, "JPEG", quality=85)
+
+
+def prepare_workspace(work_dir: Path, count: int, size: tuple) -> Path:
+    """Benchmark base dir with the real prompt and exemplars and `count` synthetic candidates.
+
+    Candidates are generated once and reused by later runs (regenerated if the size changes).
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    for name in PROMPT_FILES:
+        (work_dir / name).write_bytes((BASE_DIR / name).read_bytes())
+    exemplars = work_dir / "examplar-images"
+    if not exemplars.exists():
+        exemplars.symlink_to((BASE_DIR / "examplar-images").resolve(), target_is_directory=True)
+
+    candidate_dir = work_dir / "candidate-images"
+    candidate_dir.mkdir(exist_ok=True)
+    marker = candidate_dir / ".size"
+    size_key = f"{size[0]}x{size[1]}"
+    if marker.exists() and marker.read_text() != size_key:
+        for old in candidate_dir.glob("candidate_*.jpg"):
+            old.unlink()
+    marker.write_text(size_key)
+
+    missing = [i for i in range(1, count + 1) if not (candidate_dir / f"candidate_{i}.jpg").exists()]
+    if missing:
+        print(f"🖼️  Generating {len(missing)} synthetic {size_key} candidate image(s)...")
+        for i in missing:
+            make_candidate_image(candidate_dir / f"candidate_{i}.jpg", size, seed=i)
+    return work_dir
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size (Linux), else None."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemorySampler:
+    """Peak RSS over a block, sampled on a background thread."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.start_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _rss_mb()
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb or 0.0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start_mb = _rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def stage_times(trace_events: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-stage call counts, total seconds and per-call millisecond percentiles."""
+    durations: Dict[str, List[float]] = {}
+    for event in trace_events:
+        if event["ph"] == "X":
+            durations.setdefault(event["name"], []).append(event["dur"] / 1000)
+    return {
+        name: {"count": len(values), "total_seconds": round(sum(values) / 1000, 3),
+               "ms": percentile_rollup(values, 2)}
+        for name, values in sorted(durations.items(), key=lambda item: -sum(item[1]))
+    }
+
+
+def run_scenario(work_dir: Path, candidates: int, concurrency: int, args) -> Dict[str, Any]:
+    """One benchmark run of `candidates` candidates on `concurrency` workers."""
+    provider = MockProvider(
+        latency=args.latency, latency_median=args.latency_median, latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate, parse_error_rate=args.parse_error_rate,
+        response_chars=args.response_chars, seed=args.seed,
+        image_cache=None if args.no_image_cache else ImagePayloadCache(),
+        # A fresh, unlimited budget per scenario
+        rate_limiter=RateLimiter("mock")
+    )
+    evaluator = PortfolioEvaluator(provider, work_dir, no_exemplars=args.no_exemplars, concurrency=concurrency,
+                                   dedupe_threshold=None if args.no_dedupe else DEDUPE_THRESHOLD)
+    candidate_ids = [str(i) for i in range(1, candidates + 1)]
+
+    tracer = start_tracing()
+    log = io.StringIO()
+    try:
+        with MemorySampler() as memory, contextlib.redirect_stdout(log):
+            started = time.perf_counter()
+            evaluator.evaluate_candidates(candidate_ids)
+            wall = time.perf_counter() - started
+    finally:
+        stop_tracing()
+
+    mock = provider.summary()
+    ideal = mock["simulated_latency_seconds"] / concurrency
+    return {
+        "candidates": candidates,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "candidates_per_minute": round(candidates / wall * 60, 1),
+        # Wall time if the pipeline added nothing to the simulated model latency
+        "ideal_wall_seconds": round(ideal, 3),
+        "efficiency": round(ideal / wall, 3) if wall else None,
+        "overhead_ms_per_candidate": round((wall - ideal) * concurrency / candidates * 1000, 1),
+        "rated": candidates - len(evaluator.dead_letter),
+        "dead_lettered": len(evaluator.dead_letter),
+        "mock_calls": mock,
+        "memory_mb": {
+            "start": round(memory.start_mb, 1) if memory.start_mb is not None else None,
+            "peak": round(memory.peak_mb, 1) if memory.peak_mb is not None else None
+        },
+        "stages": stage_times(tracer.trace_events())
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Scenario-by-scenario regressions against the baseline (throughput and peak memory)."""
+    regressions = []
+    for key, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(key)
+        if before is None:
+            continue
+        if current["candidates_per_minute"] < before["candidates_per_minute"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {current['candidates_per_minute']} vs "
+                               f"{before['candidates_per_minute']} candidates/min")
+        peak, peak_before = current["memory_mb"]["peak"], before["memory_mb"]["peak"]
+        if peak and peak_before and peak > peak_before * (1 + tolerance):
+            regressions.append(f"{key}: peak memory {peak} vs {peak_before} MB")
+    return regressions
+
+
+def print_scenario(key: str, scenario: Dict[str, Any], baseline: Optional[Dict[str, Any]]):
+    before = (baseline or {}).get("scenarios", {}).get(key)
+    change = ""
+    if before:
+        delta = scenario["candidates_per_minute"] / before["candidates_per_minute"] - 1
+        change = f" ({delta:+.1%} vs baseline)"
+    print(f"\n📊 {key}: {scenario['wall_seconds']}s, {scenario['candidates_per_minute']} candidates/min{change}")
+    print(f"   Efficiency {scenario['efficiency']} (ideal {scenario['ideal_wall_seconds']}s), "
+          f"overhead {scenario['overhead_ms_per_candidate']} ms/candidate, "
+          f"peak RSS {scenario['memory_mb']['peak']} MB, {scenario['dead_lettered']} dead-lettered")
+    for name, stage in list(scenario["stages"].items())[:8]:
+        print(f"   {name:<22} {stage['count']:>6} × p50 {stage['ms']['p50']:>9.2f} ms  "
+              f"p95 {stage['ms']['p95']:>9.2f} ms  total {stage['total_seconds']:>8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the evaluation pipeline offline with a mock provider')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], metavar='N',
+                        help='Candidate set sizes to run (default: 10 100 1000)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16], metavar='N',
+                        help='Worker counts to run each size with (default: 1 16)')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='lognormal',
+                        help='Simulated model latency distribution (default: lognormal)')
+    parser.add_argument('--latency-median', type=float, default=0.05, metavar='SECONDS',
+                        help='Median simulated latency (default: 0.05, to expose pipeline overhead)')
+    parser.add_argument('--latency-sigma', type=float, default=0.5,
+                        help='Lognormal sigma of the simulated latency (default: 0.5)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of calls failing with a retryable server error (default: 0)')
+    parser.add_argument('--parse-error-rate', type=float, default=0.0,
+                        help='Fraction of calls answering with truncated JSON (default: 0)')
+    parser.add_argument('--response-chars', type=int, default=1500,
+                        help='Approximate size of each JSON answer (default: 1500)')
+    parser.add_argument('--image-size', default='1440x2700', metavar='WxH',
+                        help='Synthetic candidate screenshot size (default: 1440x2700)')
+    parser.add_argument('--no-exemplars', action='store_true', help='Run without the exemplar images')
+    parser.add_argument('--no-image-cache', action='store_true', help='Re-encode every image on every call')
+    parser.add_argument('--no-dedupe', action='store_true', help='Skip near-duplicate hashing')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for latencies and scores (default: 1)')
+    parser.add_argument('--work-dir', type=Path, default=BASE_DIR / ".cache" / "benchmark",
+                        help='Workspace for synthetic candidates and run output (default: .cache/benchmark)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help=f'Baseline results to compare against (default: {DEFAULT_BASELINE.relative_to(BASE_DIR)})')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Relative throughput drop / memory growth counted as a regression (default: 0.15)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on a regression')
+    args = parser.parse_args()
+
+    if not PIL_AVAILABLE:
+        print("Error: Pillow is required to generate synthetic candidates (pip install Pillow)")
+        sys.exit(1)
+    try:
+        size = tuple(int(v) for v in args.image_size.lower().split("x"))
+        assert len(size) == 2
+    except (ValueError, AssertionError):
+        print(f"Error: --image-size must look like 1440x2700, got {args.image_size}")
+        sys.exit(1)
+
+    work_dir = prepare_workspace(args.work_dir, max(args.sizes), size)
+    baseline = None
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif args.fail_on_regression and not args.save_baseline:
+        # Without a baseline nothing can regress, which must not pass silently in CI
+        print(f"Error: --fail-on-regression needs a baseline, but {args.baseline} does not exist "
+              f"(record one with --save-baseline)")
+        sys.exit(1)
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "settings": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()
+                     if key not in ("save_baseline", "fail_on_regression", "baseline", "work_dir")},
+        "scenarios": {}
+    }
+    for candidates in sorted(args.sizes):
+        for concurrency in args.concurrency:
+            key = f"{candidates}x{concurrency}"
+            print(f"\n⏱️  Running {candidates} candidate(s) on {concurrency} worker(s)...")
+            results["scenarios"][key] = run_scenario(work_dir, candidates, concurrency, args)
+            print_scenario(key, results["scenarios"][key], baseline)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    results_file = RESULTS_DIR / f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    atomic_write_json(results_file, results)
+    print(f"\n✓ Results saved to: {results_file}")
+
+    regressions = []
+    if baseline is not None:
+        if baseline.get("settings") != results["settings"]:
+            print("⚠️  Baseline was recorded with different settings; comparing anyway")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+        else:
+            print(f"✓ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    if args.save_baseline:
+        atomic_write_json(args.baseline, results)
+        print(f"✓ Baseline updated: {args.baseline}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,18 @@ Cleanup script for candidate portfolio screenshots.
 
 import os
 import sys
+import time
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import argparse
 
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.perceptual_hash import PerceptualHashIndex, PHASH_AVAILABLE, DEFAULT_THRESHOLD
+
 # Check for PIL/Pillow
 try:
     from PIL import Image
@@ -72,13 +79,31 @@ def compress_image(input_path, output_path, max_width=1920, quality=85, format='
         return os.path.getsize(output_path) / 1024
 
 
+def _compress_job(job):
+    """
+    Process-pool entry point: compress one image and time it.
+    
+    Args:
+        job: (input_path, output_path, max_width, quality) tuple
+    
+    Returns:
+        (compressed size in KB, seconds spent)
+    """
+    input_path, output_path, max_width, quality = job
+    started = time.perf_counter()
+    compressed_size = compress_image(input_path, output_path, max_width=max_width, quality=quality)
+    return compressed_size, time.perf_counter() - started
+
+
 def cleanup_candidate_images(
     candidate_dir, 
     backup=True, 
     dry_run=False,
     max_width=1920,
     quality=85,
-    start_number=None
+    start_number=None,
+    workers=1,
+    hash_index_path=None
 ):
     """
     Clean up candidate images: compress and rename them.
@@ -90,6 +115,8 @@ def cleanup_candidate_images(
         max_width: Maximum width for images
         quality: JPEG compression quality
         start_number: Starting number for naming (auto-detect if None)
+        workers: Number of processes compressing in parallel (1 = in this process)
+        hash_index_path: Perceptual-hash index to update with the new images (None to skip)
     """
     
     candidate_dir = Path(candidate_dir)
@@ -162,54 +189,72 @@ def cleanup_candidate_images(
     # Sort images by name for consistent ordering
     unprocessed_images.sort(key=lambda x: x.name.lower())
     
+    # Names are assigned up front, so numbering never depends on which worker finishes first
+    new_paths = [candidate_dir / f"candidate_{start_number + idx}.jpg" for idx in range(len(unprocessed_images))]
+    
+    # Back up every original before any of them is compressed or removed
+    if backup and not dry_run:
+        for img_path in unprocessed_images:
+            shutil.copy2(img_path, backup_dir / img_path.name)
+        print(f"✅ Backed up {len(unprocessed_images)} original(s) to: {backup_dir.name}/")
+    
     print("\n" + "="*60)
     print("PROCESSING IMAGES")
     print("="*60)
     
-    for idx, img_path in enumerate(unprocessed_images):
-        current_number = start_number + idx
-        new_name = f"candidate_{current_number}.jpg"
-        new_path = candidate_dir / new_name
-        
-        # Get original size
-        original_size = os.path.getsize(img_path) / 1024  # KB
-        total_size_before += original_size
-        
-        print(f"\n📸 Image {idx + 1}/{len(unprocessed_images)}:")
-        print(f"   Original: {img_path.name} ({original_size:.1f} KB)")
-        print(f"   New name: {new_name}")
-        
-        if dry_run:
-            # Estimate compressed size (usually 20-40% of original for screenshots)
-            estimated_size = original_size * 0.3
-            print(f"   Estimated size: ~{estimated_size:.1f} KB")
-            total_size_after += estimated_size
+    if not dry_run:
+        jobs = [(img_path, new_path, max_width, quality) for img_path, new_path in zip(unprocessed_images, new_paths)]
+        started = time.perf_counter()
+        if workers > 1:
+            print(f"⚙️  Compressing with {workers} worker processes")
+            pool = ProcessPoolExecutor(max_workers=workers)
+            # map() yields in submission order, so output and removals stay in candidate order
+            results = pool.map(_compress_job, jobs)
         else:
-            # Backup original if requested
-            if backup:
-                backup_path = backup_dir / img_path.name
-                shutil.copy2(img_path, backup_path)
-                print(f"   ✅ Backed up to: backup/{img_path.name}")
+            pool = None
+            results = map(_compress_job, jobs)
+    
+    total_seconds = 0
+    try:
+        for idx, img_path in enumerate(unprocessed_images):
+            new_name = new_paths[idx].name
             
-            # Compress and save with new name
-            compressed_size = compress_image(
-                img_path, 
-                new_path,
-                max_width=max_width,
-                quality=quality
-            )
+            # Get original size
+            original_size = os.path.getsize(img_path) / 1024  # KB
+            total_size_before += original_size
+            
+            if dry_run:
+                print(f"\n📸 Image {idx + 1}/{len(unprocessed_images)}:")
+                print(f"   Original: {img_path.name} ({original_size:.1f} KB)")
+                print(f"   New name: {new_name}")
+                # Estimate compressed size (usually 20-40% of original for screenshots)
+                estimated_size = original_size * 0.3
+                print(f"   Estimated size: ~{estimated_size:.1f} KB")
+                total_size_after += estimated_size
+                continue
+            
+            compressed_size, seconds = next(results)
             total_size_after += compressed_size
+            total_seconds += seconds
+            
+            print(f"\n📸 Image {idx + 1}/{len(unprocessed_images)}:")
+            print(f"   Original: {img_path.name} ({original_size:.1f} KB)")
+            print(f"   New name: {new_name}")
             
             # Calculate compression ratio
             compression_ratio = (1 - compressed_size/original_size) * 100
             
             print(f"   ✅ Compressed to: {compressed_size:.1f} KB ({compression_ratio:.1f}% reduction)")
+            print(f"   ⏱️  {seconds:.2f}s ({original_size / 1024 / max(seconds, 1e-6):.1f} MB/s)")
             
             # Remove original (it's backed up)
             img_path.unlink()
             print(f"   🗑️  Removed original")
             
             processed_count += 1
+    finally:
+        if not dry_run and pool is not None:
+            pool.shutdown(cancel_futures=True)
     
     # Summary
     print("\n" + "="*60)
@@ -227,6 +272,15 @@ def cleanup_candidate_images(
         print(f"📉 Total size: {total_size_before/1024:.1f} MB → {total_size_after/1024:.1f} MB")
         print(f"💾 Space saved: {(total_size_before - total_size_after)/1024:.1f} MB")
         
+        # Aggregate throughput (wall clock) vs the summed per-image time. Per-image times
+        # grow when workers contend for CPU, so the ratio is not a speedup over sequential.
+        wall_seconds = time.perf_counter() - started
+        if wall_seconds > 0:
+            print(f"⏱️  {wall_seconds:.1f}s wall clock: {processed_count / wall_seconds:.2f} images/s, "
+                  f"{total_size_before / 1024 / wall_seconds:.1f} MB/s")
+            print(f"   Per-image time {total_seconds:.1f}s across {workers} worker(s) "
+                  f"(aggregate per-image time / wall time: {total_seconds / wall_seconds:.1f}x)")
+        
         if backup:
             print(f"📁 Originals backed up in: {backup_dir.name}/")
         
@@ -243,6 +297,32 @@ def cleanup_candidate_images(
                     continue
             if numbers:
                 print(f"   Range: candidate_{min(numbers)}.jpg to candidate_{max(numbers)}.jpg")
+        
+        if hash_index_path and PHASH_AVAILABLE:
+            index_perceptual_hashes(final_candidates, hash_index_path)
+
+
+def index_perceptual_hashes(candidate_files, hash_index_path):
+    """
+    Hash new candidate images into the perceptual-hash index and report near-duplicates.
+    
+    Args:
+        candidate_files: candidate_N.jpg paths
+        hash_index_path: Index file shared with evaluate_portfolios.py
+    """
+    # Same order as evaluation runs, so the same copy is reported as the one evaluated
+    candidate_files = sorted(candidate_files)
+    index = PerceptualHashIndex(hash_index_path)
+    started = time.perf_counter()
+    hashed = index.update(candidate_files)
+    index.save()
+    print(f"\n🔎 Perceptual hashes: {hashed} new image(s) indexed in {time.perf_counter() - started:.2f}s")
+    
+    duplicates = index.find_duplicates(candidate_files, DEFAULT_THRESHOLD)
+    if duplicates:
+        print(f"⧉ {len(duplicates)} near-duplicate(s) (evaluated once, cross-linked in the results):")
+        for name, match in duplicates.items():
+            print(f"   {name} ≈ {match['canonical']} (pHash distance {match['phash_distance']})")
 
 
 def main():
@@ -288,7 +368,16 @@ def main():
         help='Starting number for candidate naming (auto-detect if not specified)'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Compress images in N parallel processes (default: 1, sequential)'
+    )
+    
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error(f"--workers must be at least 1, got {args.workers}")
     
     # Get base directory
     base_dir = Path(__file__).parent.parent
@@ -300,6 +389,7 @@ def main():
     print(f"Max width: {args.max_width}px")
     print(f"JPEG quality: {args.quality}")
     print(f"Backup: {'Yes' if not args.no_backup else 'No'}")
+    print(f"Workers: {args.workers}")
     print("="*60 + "\n")
     
     # Run cleanup
@@ -309,7 +399,9 @@ def main():
         dry_run=args.dry_run,
         max_width=args.max_width,
         quality=args.quality,
-        start_number=args.start_number
+        start_number=args.start_number,
+        workers=args.workers,
+        hash_index_path=base_dir / ".cache" / "perceptual-hashes.json"
     )
 
 
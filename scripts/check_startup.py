@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Start-up import budget check for the CLI entry points.
+
+Imports each module in a fresh interpreter under `python -X importtime` and fails
+when the module's cumulative import time goes over the budget, or when a package
+that should only load on use (provider SDKs, httpx, Pillow, numpy, tenacity,
+dotenv) shows up in the start-up import graph. The heaviest imports are listed,
+so a regression points at its cause:
+
+    python3 check_startup.py                          # scripts.evaluate_portfolios, 150 ms budget
+    python3 check_startup.py --budget-ms 100 --runs 9
+    python3 check_startup.py --modules scripts.evaluate_portfolios scripts.mock_provider
+
+The interpreter's own start-up (site, encodings) is not counted.
+"""
+
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_MODULES = ["scripts.evaluate_portfolios"]
+DEFAULT_BUDGET_MS = 150.0
+# Loaded by the code paths that need them, never at import (see lazy_imports.py)
+DEFERRED_PACKAGES = ("openai", "anthropic", "httpx", "PIL", "numpy", "tenacity", "dotenv", "requests")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """`-X importtime` lines as {module, depth, self_us, cumulative_us}."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+    return imports
+
+
+def measure(module: str) -> List[Dict[str, Any]]:
+    """Import `module` in a fresh interpreter and return its import timings."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BASE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(result.stderr)
+
+
+def check_module(module: str, runs: int) -> Dict[str, Any]:
+    """Median cumulative import time over `runs` imports (after one warm-up), plus what was imported."""
+    measure(module)  # warm-up: byte-compiles anything stale
+    samples = []
+    for _ in range(runs):
+        imports = measure(module)
+        total = next(i["cumulative_us"] for i in imports if i["module"] == module and i["depth"] == 0)
+        samples.append((total, imports))
+    samples.sort(key=lambda sample: sample[0])
+    total_us, imports = samples[len(samples) // 2]
+
+    # Everything imported while the module loaded: its nested lines, which come right before
+    # its own top-level line (interpreter start-up imports are earlier top-level lines)
+    end = next(n for n, i in enumerate(imports) if i["module"] == module and i["depth"] == 0)
+    start = max((n for n in range(end) if imports[n]["depth"] == 0), default=-1) + 1
+    loaded = imports[start:end + 1]
+    deferred = sorted({i["module"].split(".")[0] for i in loaded} & set(DEFERRED_PACKAGES))
+    heaviest = sorted((i for i in loaded if i["depth"] == 1), key=lambda i: i["cumulative_us"], reverse=True)
+    return {
+        "module": module,
+        "median_ms": round(total_us / 1000, 1),
+        "min_ms": round(samples[0][0] / 1000, 1),
+        "max_ms": round(samples[-1][0] / 1000, 1),
+        "modules_loaded": len(loaded),
+        "deferred_packages_loaded": deferred,
+        "heaviest": [(i["module"], round(i["cumulative_us"] / 1000, 1)) for i in heaviest[:10]]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when CLI start-up imports exceed a time budget')
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES, metavar='MODULE',
+                        help='Modules to check (default: scripts.evaluate_portfolios)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Max median cumulative import time per module (default: {DEFAULT_BUDGET_MS:g})')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh-interpreter imports per module (default: 5)')
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        try:
+            report = check_module(module, max(1, args.runs))
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            failures.append(module)
+            continue
+        within = report["median_ms"] <= args.budget_ms
+        print(f"\n{'✓' if within else '❌'} {module}: {report['median_ms']} ms median "
+              f"(min {report['min_ms']}, max {report['max_ms']}; budget {args.budget_ms:g} ms), "
+              f"{report['modules_loaded']} modules")
+        for name, ms in report["heaviest"]:
+            print(f"   {ms:>8.1f} ms  {name}")
+        if not within:
+            failures.append(f"{module}: {report['median_ms']} ms over the {args.budget_ms:g} ms budget")
+        if report["deferred_packages_loaded"]:
+            failures.append(f"{module}: imports {', '.join(report['deferred_packages_loaded'])} at start-up")
+
+    if failures:
+        print("\n❌ Start-up check failed:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("\n✓ Start-up within budget")
+
+
+if __name__ == "__main__":
+    main()
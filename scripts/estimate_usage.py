@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Offline estimate of the tokens, request size and cost of an evaluation run.
+
+Replaces the old usage probes, which made a paid `max_tokens=1` API call to read the
+prompt size. Everything here is computed locally, without network round trips:
+- text tokens of the system prompt, the generated prompt (core prompt, rubric,
+  exemplar calibration) and the message scaffolding, with the same estimator as
+  `generate_prompt.py --size-report`
+- image tokens of each exemplar and the candidate, from the image dimensions and the
+  provider's billing formula (the image policies the evaluator sizes images with)
+- request bytes: the JSON body the provider's message layout produces, with each image
+  base64-encoded at the size it would be sent
+- the cost of an N-candidate run from the price table
+
+Token counts take milliseconds. Request bytes re-encode the images that get resized,
+decoding the JPEG at reduced scale (within a few percent of the evaluator's output,
+about a second for the repo's exemplars); `--skip-bytes` leaves them out.
+
+    python3 estimate_usage.py                                     # gpt-5 and claude-sonnet-4, 100 candidates
+    python3 estimate_usage.py --models gpt-4o claude-opus-4.1 --candidates 500 --prompt-cache
+    python3 estimate_usage.py --compact-prompt --image-token-budget 800
+    python3 estimate_usage.py --models claude-opus-4.1 --run evaluation-results/evaluation_X.json
+
+`--run` takes the output tokens from a real run and compares the estimated input
+tokens with what the API reported for it.
+"""
+
+import io
+import sys
+import json
+import argparse
+import statistics
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.evaluate_portfolios import SYSTEM_PROMPT, CLAUDE_MODEL_IDS
+from scripts.prompt_builder import get_prompt_builder, estimate_tokens
+from scripts.image_policy import ImagePolicy, OpenAIImagePolicy, ClaudeImagePolicy, PIL_AVAILABLE
+from scripts.pricing import PriceTable
+from scripts.run_journal import atomic_write_json
+
+
+BASE_DIR = Path(__file__).parent.parent
+RESULTS_DIR = BASE_DIR / "reports" / "benchmarks"
+MODEL_CHOICES = ['gpt-4o', 'gpt-5', 'o1', 'claude-sonnet-4', 'claude-opus-4.1']
+DEFAULT_MODELS = ["gpt-5", "claude-sonnet-4"]
+# Output tokens per call when no run is given (the evaluator's default output reserve)
+DEFAULT_OUTPUT_TOKENS = 1000
+
+# Scaffolding text around the prompt and images, as the providers build it
+CALIBRATION_PREFACE = "Here are exemplar portfolios for calibration:\n"
+EXEMPLAR_LABEL = "\nExemplar {n} (see image below):"
+CANDIDATE_INSTRUCTION = "\n\nNow evaluate this candidate portfolio:"
+
+
+def encoded_size(image_path: str, target_size: List[int], quality: int) -> int:
+    """JPEG bytes of the image resized to `target_size` (draft decoding; close to resize_to_plan)."""
+    from PIL import Image
+    with Image.open(image_path) as img:
+        # JPEGs decode straight to a 1/2, 1/4 or 1/8 scale that is still at least the target size
+        img.draft("RGB", tuple(target_size))
+        img = img.resize(tuple(target_size), Image.Resampling.LANCZOS)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality)
+        return buffer.tell()
+
+
+def image_section(name: str, image_path: str, policy: ImagePolicy, measure_bytes: bool = True) -> Dict[str, Any]:
+    """Tokens and sent bytes of one image at the size the policy plans for it."""
+    plan = policy.plan(image_path)
+    sent_bytes = Path(image_path).stat().st_size
+    if not measure_bytes:
+        sent_bytes = None
+    elif plan["resize"] and PIL_AVAILABLE:
+        sent_bytes = encoded_size(image_path, plan["target_size"], policy.jpeg_quality)
+    return {
+        "section": name,
+        "image": Path(image_path).name,
+        "size": plan["target_size"],
+        "detail": plan["detail"],
+        "image_tokens": plan["estimated_tokens"],
+        "image_bytes": sent_bytes
+    }
+
+
+def request_bytes(provider: str, model: str, texts: List[str], images: List[Dict[str, Any]]) -> Optional[int]:
+    """Size of the JSON request body, with placeholder base64 of each image's sent size.
+
+    `texts` and `images` alternate the way the provider lays out the user message
+    (see the providers' _build_prefix_content); only the lengths matter here.
+    """
+    if any(image["image_bytes"] is None for image in images):
+        return None
+
+    def image_block(image: Dict[str, Any]) -> Dict[str, Any]:
+        data = "A" * (4 * -(-image["image_bytes"] // 3))
+        if provider == "openai":
+            return {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{data}",
+                                                       "detail": image["detail"]}}
+        return {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": data}}
+
+    content = [{"type": "text", "text": text} for text in texts]
+    content += [image_block(image) for image in images]
+    if provider == "openai":
+        body = {"model": model, "messages": [{"role": "system", "content": SYSTEM_PROMPT},
+                                             {"role": "user", "content": content}]}
+    else:
+        body = {"model": model, "max_tokens": 2000, "system": SYSTEM_PROMPT,
+                "messages": [{"role": "user", "content": content}]}
+    return len(json.dumps(body))
+
+
+def estimate_request(model: str, sections: List[tuple], exemplar_images: List[str], candidate_image: str,
+                     image_token_budget: Optional[int] = None, measure_bytes: bool = True) -> Dict[str, Any]:
+    """Per-section tokens and the request size of one evaluation call."""
+    provider = "claude" if model.startswith("claude") else "openai"
+    policy = (ClaudeImagePolicy if provider == "claude" else OpenAIImagePolicy)(token_budget=image_token_budget)
+    prompt = "\n".join(part for _, parts in sections for part in parts)
+
+    if provider == "openai":
+        labels = [EXEMPLAR_LABEL.format(n=n) for n in range(1, len(exemplar_images) + 1)]
+        scaffolding = [CALIBRATION_PREFACE, *labels, "\n\n", CANDIDATE_INSTRUCTION]
+        texts = [CALIBRATION_PREFACE, *labels, f"\n\n{prompt}{CANDIDATE_INSTRUCTION}"]
+    else:
+        scaffolding = [CANDIDATE_INSTRUCTION]
+        texts = [prompt, CANDIDATE_INSTRUCTION]
+
+    breakdown = [{"section": "system_prompt", "text_tokens": estimate_tokens(SYSTEM_PROMPT)}]
+    breakdown += [{"section": name, "text_tokens": estimate_tokens("\n".join(parts))} for name, parts in sections]
+    breakdown.append({"section": "scaffolding", "text_tokens": sum(estimate_tokens(text) for text in scaffolding)})
+    images = [image_section(f"exemplar_{n}", path, policy, measure_bytes)
+              for n, path in enumerate(exemplar_images, 1)]
+    images.append(image_section("candidate", candidate_image, policy, measure_bytes))
+    breakdown += images
+
+    for section in breakdown:
+        section["tokens"] = section.get("text_tokens", 0) + section.get("image_tokens", 0)
+    prefix_tokens = sum(s["tokens"] for s in breakdown if s["section"] != "candidate")
+    return {
+        "model": model,
+        "provider": provider,
+        "sections": breakdown,
+        "text_tokens": sum(s.get("text_tokens", 0) for s in breakdown),
+        "image_tokens": sum(s.get("image_tokens", 0) for s in breakdown),
+        "input_tokens": prefix_tokens + images[-1]["tokens"],
+        # Everything before the candidate image is the same for every call (the prompt cache prefix)
+        "prefix_tokens": prefix_tokens,
+        "request_bytes": request_bytes(provider, model, texts, images)
+    }
+
+
+def project_run(estimate: Dict[str, Any], candidates: int, output_tokens: int, price_table: PriceTable,
+                prompt_cache: bool = False, batch: bool = False) -> Dict[str, Any]:
+    """Tokens and cost of evaluating `candidates` candidates with this request."""
+    per_call = {"input_tokens": estimate["input_tokens"], "output_tokens": output_tokens}
+    first_call = dict(per_call)
+    if prompt_cache:
+        # The first call writes the prefix; every later one reads it from cache
+        cached = {"cached_input_tokens": estimate["prefix_tokens"],
+                  "uncached_input_tokens": estimate["input_tokens"] - estimate["prefix_tokens"]}
+        per_call.update(cached)
+        if estimate["provider"] == "claude":
+            first_call.update({"cache_write_input_tokens": estimate["prefix_tokens"],
+                               "uncached_input_tokens": estimate["input_tokens"]})
+
+    model = CLAUDE_MODEL_IDS.get(estimate["model"], estimate["model"])
+    first_cost = price_table.cost(model, first_call, batch=batch)
+    call_cost = price_table.cost(model, per_call, batch=batch)
+    return {
+        "candidates": candidates,
+        "output_tokens_per_call": output_tokens,
+        "input_tokens": estimate["input_tokens"] * candidates,
+        "output_tokens": output_tokens * candidates,
+        "request_bytes": estimate["request_bytes"] * candidates if estimate["request_bytes"] else None,
+        "cost_per_call_usd": call_cost,
+        "cost_usd": round(first_cost + call_cost * (candidates - 1), 4) if call_cost is not None else None,
+        "prompt_cache": prompt_cache,
+        "batch": batch
+    }
+
+
+def observed_usage(run_file: Path) -> Optional[Dict[str, Any]]:
+    """Model and median input / output tokens per call reported by the API in a run file."""
+    with open(run_file, 'r') as f:
+        data = json.load(f)
+    usages = [r["usage"] for r in data.get("candidate_ratings", {}).values()
+              if isinstance(r, dict) and r.get("usage", {}).get("input_tokens")]
+    if not usages:
+        return None
+    return {
+        "model": data.get("evaluation_metadata", {}).get("model_used", {}).get("model"),
+        "calls": len(usages),
+        "input_tokens": int(statistics.median(u["input_tokens"] for u in usages)),
+        "output_tokens": int(statistics.median(u.get("output_tokens", 0) for u in usages))
+    }
+
+
+def default_candidate() -> Optional[Path]:
+    candidate_dir = BASE_DIR / "candidate-images"
+    preferred = candidate_dir / "candidate_1.jpg"
+    if preferred.exists():
+        return preferred
+    return next(iter(sorted(candidate_dir.glob("candidate_*.jpg"))), None)
+
+
+def print_estimate(estimate: Dict[str, Any], projection: Dict[str, Any]):
+    print(f"\n🧮 {estimate['model']} ({estimate['provider']})")
+    print(f"   {'section':<22} {'text':>7} {'image':>7} {'total':>7}")
+    for section in estimate["sections"]:
+        label = section["section"] + (f" [{section['size'][0]}x{section['size'][1]}]" if section.get("size") else "")
+        print(f"   {label:<22} {section.get('text_tokens', 0):>7} {section.get('image_tokens', 0):>7} "
+              f"{section['tokens']:>7}")
+    print(f"   {'per call':<22} {estimate['text_tokens']:>7} {estimate['image_tokens']:>7} "
+          f"{estimate['input_tokens']:>7}"
+          + (f"  (~{estimate['request_bytes'] / 1024:.0f} KB request)" if estimate["request_bytes"] else ""))
+
+    cost = projection["cost_usd"]
+    modes = ", ".join(m for m in ("prompt cache" if projection["prompt_cache"] else "",
+                                  "batch" if projection["batch"] else "") if m)
+    print(f"\n   {projection['candidates']} candidates{f' ({modes})' if modes else ''}: "
+          f"{projection['input_tokens']:,} input + {projection['output_tokens']:,} output tokens "
+          f"({projection['output_tokens_per_call']}/call), "
+          + (f"{projection['request_bytes'] / 1024 ** 2:.1f} MB uploaded, " if projection["request_bytes"] else "")
+          + (f"~${cost:,.2f}" if cost is not None else "no price for this model"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate tokens, request size and cost of a run without calling the API')
+    parser.add_argument('--models', nargs='+', choices=MODEL_CHOICES, default=DEFAULT_MODELS,
+                        help=f'Models to estimate for (default: {" ".join(DEFAULT_MODELS)})')
+    parser.add_argument('--candidates', type=int, default=100, metavar='N',
+                        help='Candidates in the projected run (default: 100)')
+    parser.add_argument('--candidate', type=Path, metavar='IMAGE',
+                        help='Candidate image to size the request with (default: candidate-images/candidate_1.jpg)')
+    parser.add_argument('--output-tokens', type=int, default=DEFAULT_OUTPUT_TOKENS, metavar='N',
+                        help=f'Output tokens per call (default: {DEFAULT_OUTPUT_TOKENS}, or the median of --run)')
+    parser.add_argument('--run', type=Path, metavar='RUN_FILE',
+                        help='Take output tokens from a run file and compare its reported input tokens')
+    parser.add_argument('--no-exemplars', action='store_true', help='Rubric-only prompt, no exemplar images')
+    parser.add_argument('--compact-prompt', action='store_true', help='The compact prompt rendering')
+    parser.add_argument('--image-token-budget', type=int, metavar='TOKENS',
+                        help='Per-image token budget, as in evaluate_portfolios.py')
+    parser.add_argument('--skip-bytes', action='store_true',
+                        help="Don't re-encode resized images to measure request bytes (tokens and cost only)")
+    parser.add_argument('--prompt-cache', action='store_true', help='Bill the shared prefix as cached after the first call')
+    parser.add_argument('--batch', action='store_true', help='Apply the batch API discount')
+    parser.add_argument('--price-table', type=Path, metavar='JSON_FILE', help='Override token prices')
+    parser.add_argument('--save', action='store_true', help='Also write reports/benchmarks/usage_estimate_<timestamp>.json')
+    args = parser.parse_args()
+
+    if not PIL_AVAILABLE:
+        print(f"⚠️  Pillow is not installed: images are counted as {ImagePolicy.FALLBACK_TOKENS} tokens each")
+
+    candidate = args.candidate or default_candidate()
+    if candidate is None or not candidate.exists():
+        print("❌ No candidate image found (add one to candidate-images/ or pass --candidate)")
+        sys.exit(1)
+    exemplar_images = [] if args.no_exemplars else [
+        str(p) for p in sorted((BASE_DIR / "examplar-images").glob("exemplar_*.jpg"),
+                               key=lambda p: int(p.stem.split("_")[-1]) if p.stem.split("_")[-1].isdigit() else 0)]
+
+    sections = get_prompt_builder(BASE_DIR).sections(no_exemplars=args.no_exemplars, compact=args.compact_prompt)
+
+    observed = observed_usage(args.run) if args.run else None
+    if args.run and observed is None:
+        print(f"⚠️  {args.run.name} has no recorded usage; using --output-tokens")
+    output_tokens = observed["output_tokens"] if observed else args.output_tokens
+    price_table = PriceTable(args.price_table)
+
+    report = {"generated_at": datetime.now().isoformat(), "candidate_image": candidate.name,
+              "prompt_mode": "compact" if args.compact_prompt else "verbose",
+              "no_exemplars": args.no_exemplars, "observed": observed, "models": {}}
+    for model in args.models:
+        estimate = estimate_request(model, sections, exemplar_images, str(candidate), args.image_token_budget,
+                                    measure_bytes=not args.skip_bytes)
+        projection = project_run(estimate, args.candidates, output_tokens, price_table,
+                                 prompt_cache=args.prompt_cache, batch=args.batch)
+        report["models"][model] = {**estimate, "projection": projection}
+        print_estimate(estimate, projection)
+        if observed and observed["model"] == CLAUDE_MODEL_IDS.get(model, model):
+            error = estimate["input_tokens"] / observed["input_tokens"] - 1
+            print(f"   vs {args.run.name}: {observed['input_tokens']:,} input tokens reported "
+                  f"(median of {observed['calls']} calls), estimate off by {error:+.1%}")
+
+    if args.save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output_file = RESULTS_DIR / f"usage_estimate_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        atomic_write_json(output_file, report)
+        print(f"\n💾 Estimate saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
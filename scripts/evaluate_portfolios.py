@@ -13,86 +13,276 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from abc import ABC, abstractmethod
 import time
+import statistics
+import hashlib
+import copy
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-# Try importing required packages
-try:
-    from dotenv import load_dotenv
-    import requests
-except ImportError as e:
-    print(f"Missing required package: {e}")
-    print("Please install: pip install python-dotenv requests")
-    sys.exit(1)
-
-# Try importing OpenAI (optional, for OpenAI provider)
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
-# Try importing Anthropic (optional, for Claude provider)
-try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
+from scripts.image_cache import ImagePayloadCache, file_sha256
+from scripts.batch_runner import BatchRunner
+from scripts.run_journal import RunJournal, atomic_write_json, journal_path_for, replay_journal
+from scripts.result_cache import ResultCache, result_fingerprint
+from scripts.rate_limiter import RateLimiter, get_rate_limiter, classify_failure, PERMANENT, ResponseParseError
+from scripts.stream_json import read_json_stream, add_throughput
+from scripts.image_policy import ImagePolicy, OpenAIImagePolicy, ClaudeImagePolicy, resize_to_plan, PIL_AVAILABLE
+from scripts.image_tiling import ImageTiler, tiles_note, DEFAULT_MAX_TILES
+from scripts.http_pool import (HTTPPool, configure_http_pool, get_http_pool, DEFAULT_POOL_SIZE,
+                               DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+from scripts.sampling import SamplingPolicy
+from scripts.pricing import PriceTable, percentile_rollup
+from scripts.tracing import span, current_candidate, start_tracing, stop_tracing
+from scripts.perceptual_hash import PerceptualHashIndex, PHASH_AVAILABLE, DEFAULT_THRESHOLD as DEDUPE_THRESHOLD
+from scripts.lazy_imports import module_available
+from scripts.prompt_builder import get_prompt_builder
+
+# Provider SDKs are optional and imported by the provider that uses them, so --help,
+# prompt previews and single-provider runs don't pay for both (see lazy_imports.py)
+OPENAI_AVAILABLE = module_available("openai")
+ANTHROPIC_AVAILABLE = module_available("anthropic")
+
+
+SYSTEM_PROMPT = "You are a senior product design hiring manager. Evaluate portfolios strictly based on visual craft."
+
+# Rough text token estimate (~4 characters per token)
+CHARS_PER_TOKEN = 4
+
+
+def _usage_field(obj: Any, name: str, default: Any = 0) -> Any:
+    """Read a usage field from an SDK object or a plain dict (newer fields arrive as dicts on older SDKs)."""
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        value = obj.get(name, default)
+    else:
+        value = getattr(obj, name, default)
+    return default if value is None else value
+
+
+def check_answer_shape(answer: Any) -> Dict[str, Any]:
+    """The parsed answer, if structure_result can use it; ResponseParseError otherwise.
+
+    Malformed answers must fail here, as ResponseParseError, so they are retried as
+    parse failures (see classify_failure) rather than surfacing later as code errors.
+    """
+    if not isinstance(answer, dict):
+        raise ResponseParseError(f"Answer is a JSON {type(answer).__name__}, not an object")
+    scores = answer.get("scores", {})
+    if not isinstance(scores, dict) or not all(isinstance(v, dict) for v in scores.values()):
+        raise ResponseParseError("Answer's scores are not objects keyed by dimension")
+    for dimension, entry in scores.items():
+        score = entry.get("score")
+        if score is not None and (not isinstance(score, (int, float)) or isinstance(score, bool)):
+            raise ResponseParseError(f"Answer's {dimension} score is not a number: {score!r}")
+    return answer
+
+
+# Set by HedgedProvider on the thread running each of its calls
+_hedge_context = threading.local()
+
+
+class HedgeCancelled(Exception):
+    """The other call of a hedged pair already produced a result."""
+
+
+def _raise_if_hedge_lost():
+    """Stop reading a streamed response once its hedged twin has won."""
+    cancelled = getattr(_hedge_context, "cancelled", None)
+    if cancelled is not None and cancelled.is_set():
+        raise HedgeCancelled("hedged call lost the race")
 
 
 class ModelProvider(ABC):
-    """Abstract base class for model providers."""
+    """Abstract base class for model providers.
+    
+    Providers may attach a `_usage` dict (input/cached/output token counts), an
+    `_image_tokens` dict (estimated vs actual) and a `_call_metrics` dict (images,
+    request bytes, latency, retries) to the result they return; the evaluator
+    moves them into the candidate record.
+    """
+    
+    # How images are sized for this provider's vision token billing (None = sent as-is)
+    image_policy: Optional[ImagePolicy] = None
+    # Splits tall candidate screenshots into viewport crops (None = candidate sent whole)
+    image_tiler: Optional[ImageTiler] = None
+    # Process-wide pooled HTTP client the SDK client is built on (None = SDK default)
+    http_pool: Optional[HTTPPool] = None
     
     @abstractmethod
     def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
         """Evaluate a portfolio image and return structured results."""
         pass
+    
+    def warm_connections(self, connections: int):
+        """Open pooled connections to the API host before the first candidate."""
+        if self.http_pool is not None:
+            self.http_pool.warm(str(self.client.base_url), connections)
+    
+    def warm_exemplars(self, exemplar_images: List[str]):
+        """Encode the exemplar images into the payload cache before the first candidate."""
+        if getattr(self, "image_cache", None) is None:
+            return
+        for exemplar_path in exemplar_images:
+            self._encode_image(exemplar_path)
+    
+    def candidate_images(self, image_path: str) -> List[str]:
+        """Images sent for the candidate: its viewport tiles when tiling applies, else the image itself."""
+        if self.image_tiler is None:
+            return [image_path]
+        return self.image_tiler.tiles_for(image_path)
+    
+    def _candidate_content(self, image_path: str) -> List[Dict[str, Any]]:
+        """Candidate section of the user message: one image, or a described run of tiles."""
+        images = self.candidate_images(image_path)
+        if len(images) == 1:
+            return [self._image_block(images[0])]
+        content = [{"type": "text", "text": tiles_note(len(images))}]
+        content.extend(self._image_block(tile) for tile in images)
+        return content
+    
+    def estimate_input_tokens(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, int]:
+        """Estimated text and image input tokens for one evaluation."""
+        images = [*exemplar_images, *self.candidate_images(image_path)]
+        if self.image_policy is not None:
+            image_tokens = sum(self.image_policy.plan(path)["estimated_tokens"] for path in images)
+        else:
+            image_tokens = ImagePolicy.FALLBACK_TOKENS * len(images)
+        return {
+            "estimated_text_tokens": (len(SYSTEM_PROMPT) + len(prompt)) // CHARS_PER_TOKEN,
+            "estimated_image_tokens": image_tokens
+        }
+    
+    def output_token_reserve(self) -> int:
+        """Output tokens to budget for before the response arrives."""
+        return 1000
+    
+    def estimate_request_tokens(self, image_path: str, prompt: str, exemplar_images: List[str]) -> int:
+        """Estimated tokens (input + output reserve) one evaluation will use, for rate limiting."""
+        estimate = self.estimate_input_tokens(image_path, prompt, exemplar_images)
+        return sum(estimate.values()) + self.output_token_reserve()
+    
+    @staticmethod
+    def image_token_report(estimate: Dict[str, int], usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Estimated vs actual image tokens; actual = billed input tokens minus the text estimate."""
+        report = dict(estimate)
+        if usage:
+            report["actual_input_tokens"] = usage["input_tokens"]
+            report["actual_image_tokens"] = max(0, usage["input_tokens"] - estimate["estimated_text_tokens"])
+        return report
+    
+    def call_metrics(self, request: Dict[str, Any], image_path: str, exemplar_images: List[str],
+                     latency: float) -> Dict[str, Any]:
+        """Size, wall latency and retries of one API call (priced later from its usage)."""
+        return {
+            "model": getattr(self, 'model', 'unknown'),
+            "image_count": len(exemplar_images) + len(self.candidate_images(image_path)),
+            # Base64 payloads dominate; json.dumps escapes to ASCII, so chars == bytes
+            "request_bytes": len(json.dumps(request)),
+            "latency_seconds": round(latency, 3),
+            "retries": self.rate_limiter.last_call_retries()
+        }
+    
+    def request_params(self) -> Dict[str, Any]:
+        """Parameters (besides prompt and images) that change the model's output.
+        
+        Part of the result cache fingerprint, so changing any of them re-evaluates.
+        """
+        params = {"provider": self.__class__.__name__, "model": getattr(self, 'model', 'unknown')}
+        if self.image_tiler is not None:
+            params["tiling"] = self.image_tiler.params()
+        return params
 
 
 class OpenAIProvider(ModelProvider):
     """OpenAI GPT-4o vision model provider."""
     
-    def __init__(self, api_key: str, model: str = "gpt-5", debug: bool = False):
+    # Output tokens reserved against the TPM budget when the request sets no max_tokens
+    DEFAULT_OUTPUT_RESERVE = 2000
+    
+    def __init__(self, api_key: str, model: str = "gpt-5", debug: bool = False,
+                 image_cache: Optional[ImagePayloadCache] = None, prompt_cache: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None, stream: bool = False,
+                 image_policy: Optional[ImagePolicy] = None, http_pool: Optional[HTTPPool] = None,
+                 base_url: Optional[str] = None):
         if not OPENAI_AVAILABLE:
             raise ImportError("OpenAI package not installed. Run: pip install openai")
+        import openai
         
-        self.client = openai.OpenAI(api_key=api_key)
+        # Built on the shared connection pool (keep-alive, HTTP/2, explicit timeouts)
+        self.http_pool = http_pool or get_http_pool()
+        # base_url points the SDK at another endpoint, e.g. the local stand-in server
+        self.client = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=self.http_pool.client,
+                                    timeout=self.http_pool.timeout)
         self.model = model
         self.debug = debug
+        self.image_cache = image_cache
+        # Shared by all workers using this model; owns retries (SDK retries are disabled per call)
+        self.rate_limiter = rate_limiter or get_rate_limiter("openai", model)
+        # Images are pre-sized to the tile grid (and detail level) they are billed at
+        self.image_policy = image_policy or OpenAIImagePolicy()
+        # Stream completions: records TTFT / tokens per second and aborts bad JSON early
+        self.stream = stream
+        # OpenAI caches repeated prompt prefixes automatically; in prompt cache mode we
+        # build the shared prefix once and reuse it byte-for-byte for every candidate
+        self.prompt_cache = prompt_cache
+        self._prefix = None  # (cache key, content blocks)
         
     def _encode_image(self, image_path: str) -> str:
-        """Encode image to base64."""
-        with open(image_path, "rb") as image_file:
-            image_bytes = image_file.read()
+        """Encode image to base64 (served from the payload cache when available)."""
+        if self.image_cache is None:
+            with span("encode_image", image=Path(image_path).name):
+                return self._encode_image_uncached(image_path)
+        
+        # Images the policy leaves at full size are sent as the original file bytes
+        transform = {"provider": "openai", **self.image_policy.transform_key()}
+        with span("encode_image", image=Path(image_path).name):
+            payload, hit = self.image_cache.get_or_encode(image_path, transform, self._encode_image_uncached)
+        if hit and self.debug:
+            print(f"      ♻️  Cached {Path(image_path).name}: {len(payload) * 3 / 4 / 1024:.1f} KB")
+        return payload
+    
+    def _encode_image_uncached(self, image_path: str) -> str:
+        """Read and base64-encode an image, downsizing it first if the image policy says so."""
+        plan = self.image_policy.plan(image_path)
+        if plan["resize"] and PIL_AVAILABLE:
+            with span("pillow_resize"):
+                image_bytes = resize_to_plan(image_path, plan, self.image_policy.jpeg_quality)
             if self.debug:
-                size_kb = len(image_bytes) / 1024
-                print(f"      📷 Encoded {Path(image_path).name}: {size_kb:.1f} KB")
+                print(f"      🔧 Resized {Path(image_path).name}: {tuple(plan['original_size'])} → "
+                      f"{tuple(plan['target_size'])} (detail {plan['detail']}, ~{plan['estimated_tokens']} tokens)")
+        else:
+            with open(image_path, "rb") as image_file:
+                image_bytes = image_file.read()
+        if self.debug:
+            size_kb = len(image_bytes) / 1024
+            print(f"      📷 Encoded {Path(image_path).name}: {size_kb:.1f} KB")
+        with span("base64", bytes=len(image_bytes)):
             return base64.b64encode(image_bytes).decode('utf-8')
     
-    def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
-        """Evaluate a portfolio using GPT-4o vision."""
-        
-        if self.debug:
-            print("\n" + "="*60)
-            print("🔍 DEBUG: Preparing API Call")
-            print("="*60)
-            print(f"   Model: {self.model}")
-            print(f"   Candidate Image: {Path(image_path).name}")
-            print(f"   Number of Exemplars: {len(exemplar_images)}")
-            print(f"   Prompt Length: {len(prompt)} characters")
-            print("\n   Encoding images:")
-        
-        # Build messages with images
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a senior product design hiring manager. Evaluate portfolios strictly based on visual craft."
+    def _image_block(self, image_path: str) -> Dict[str, Any]:
+        """image_url content block at the planned size and detail level."""
+        plan = self.image_policy.plan(image_path)
+        payload = self._encode_image(image_path)
+        self.image_policy.record(image_path, plan, len(payload) * 3 // 4)
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{payload}",
+                "detail": plan["detail"]
             }
-        ]
+        }
+    
+    def _build_prefix_content(self, prompt: str, exemplar_images: List[str]) -> List[Dict[str, Any]]:
+        """Build the calibration prefix (exemplar images + prompt) shared by every candidate."""
+        prefix_key = hashlib.sha256("\n".join([prompt, *exemplar_images]).encode("utf-8")).hexdigest()
+        if self.prompt_cache and self._prefix and self._prefix[0] == prefix_key:
+            return self._prefix[1]
         
-        # Create the main content with exemplar images first
         content = [
             {"type": "text", "text": "Here are exemplar portfolios for calibration:\n"}
         ]
@@ -103,13 +293,7 @@ class OpenAIProvider(ModelProvider):
                 "type": "text", 
                 "text": f"\nExemplar {i} (see image below):"
             })
-            encoded_exemplar = self._encode_image(exemplar_path)
-            content.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{encoded_exemplar}"
-                }
-            })
+            content.append(self._image_block(exemplar_path))
         
         # Add the main prompt
         content.append({
@@ -117,20 +301,196 @@ class OpenAIProvider(ModelProvider):
             "text": f"\n\n{prompt}\n\nNow evaluate this candidate portfolio:"
         })
         
-        # Add candidate image
-        encoded_candidate = self._encode_image(image_path)
-        content.append({
-            "type": "image_url",
-            "image_url": {
-                "url": f"data:image/jpeg;base64,{encoded_candidate}"
+        if self.prompt_cache:
+            self._prefix = (prefix_key, content)
+        return content
+    
+    @staticmethod
+    def _extract_usage(response: Any) -> Dict[str, Any]:
+        """Normalize chat completion usage into cached vs uncached input tokens."""
+        usage = _usage_field(response, "usage", None)
+        if usage is None:
+            return {}
+        input_tokens = _usage_field(usage, "prompt_tokens")
+        cached = _usage_field(_usage_field(usage, "prompt_tokens_details", None), "cached_tokens")
+        return {
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached,
+            "uncached_input_tokens": input_tokens - cached,
+            "output_tokens": _usage_field(usage, "completion_tokens"),
+            # Hidden reasoning (gpt-5, o1) is billed as output and included in output_tokens
+            "reasoning_tokens": _usage_field(_usage_field(usage, "completion_tokens_details", None),
+                                             "reasoning_tokens"),
+        }
+    
+    def output_token_reserve(self) -> int:
+        return self._generation_params().get("max_tokens", self.DEFAULT_OUTPUT_RESERVE)
+    
+    def build_request(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        """Build the chat.completions.create parameters for one candidate.
+        
+        Shared by the interactive path and batch mode, so both send identical requests.
+        """
+        # Build messages with images
+        messages = [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
             }
-        })
+        ]
+        
+        # Create the main content: exemplar images first, then the prompt
+        content = list(self._build_prefix_content(prompt, exemplar_images))
+        
+        # Add candidate image (or its viewport tiles)
+        content.extend(self._candidate_content(image_path))
         
         messages.append({
             "role": "user",
             "content": content
         })
         
+        completion_params = {
+            "model": self.model,
+            "messages": messages,
+            **self._generation_params()
+        }
+        
+        if self.model.startswith("o1"):
+            print("   ⚠️  Note: o1 model may not support structured JSON output")
+        
+        if self.prompt_cache:
+            # Route requests sharing this prefix to the same cache
+            completion_params["extra_body"] = {"prompt_cache_key": f"portfolio-eval-{self._prefix[0][:16]}"}
+        
+        return completion_params
+    
+    def _generation_params(self) -> Dict[str, Any]:
+        """Model-specific sampling parameters for chat.completions.create."""
+        # GPT-5 has different parameter requirements
+        if self.model.startswith("gpt-5"):
+            # GPT-5 uses natural completion - no token limit needed
+            # GPT-5 only supports default temperature (1)
+            # Not setting temperature or max_completion_tokens will use defaults
+            return {"response_format": {"type": "json_object"}}  # Ensure JSON response
+        if self.model.startswith("o1"):
+            # o1 reasoning models have specific requirements
+            # No temperature or max_tokens supported - uses reasoning approach
+            # No response_format for o1 as it may not support structured output
+            return {}
+        # GPT-4o and other models
+        return {
+            "response_format": {"type": "json_object"},
+            "max_tokens": 2000,
+            "temperature": 0.3  # Lower temperature for more consistent evaluations
+        }
+    
+    def request_params(self) -> Dict[str, Any]:
+        return {
+            **super().request_params(),
+            "system": SYSTEM_PROMPT,
+            "image_policy": self.image_policy.transform_key(),
+            **self._generation_params()
+        }
+    
+    def parse_response_text(self, content: Optional[str]) -> Dict[str, Any]:
+        """Parse the model's JSON answer."""
+        if not content:
+            raise ResponseParseError("API returned empty response content")
+        return check_answer_shape(json.loads(content))
+    
+    def _completion(self, completion_params: Dict[str, Any], estimated_tokens: int):
+        """Blocking call; returns (content text, usage)."""
+        # The raw response exposes the x-ratelimit-* headers to the rate limiter
+        raw_response = self.rate_limiter.call(
+            lambda: self.client.with_options(max_retries=0).chat.completions.with_raw_response.create(
+                **completion_params),
+            estimated_tokens
+        )
+        with span("parse_sdk_response"):
+            response = raw_response.parse()
+        usage = self._extract_usage(response)
+        
+        if self.debug:
+            print(f"\n   ✅ API Response Received:")
+            print(f"   - Model used: {response.model}")
+            print(f"   - Tokens used: {response.usage.total_tokens if response.usage else 'N/A'}")
+            if usage:
+                print(f"   - Cached input tokens: {usage['cached_input_tokens']}/{usage['input_tokens']}")
+            print(f"   - Number of choices: {len(response.choices)}")
+            
+            choice = response.choices[0]
+            print(f"   - Finish reason: {choice.finish_reason}")
+            print(f"   - Message role: {choice.message.role}")
+            
+            content = choice.message.content
+            if content:
+                print(f"   - Response length: {len(content)} chars")
+                # Show the raw response
+                print(f"\n   Raw Response (first 500 chars):")
+                print(f"   {content[:500]}...")
+            else:
+                print(f"   - Response content is None or empty")
+                # Debug the entire message structure
+                print(f"   - Full message dict: {choice.message.model_dump() if hasattr(choice.message, 'model_dump') else 'N/A'}")
+        
+        return response.choices[0].message.content, usage
+    
+    def _stream_completion(self, completion_params: Dict[str, Any], estimated_tokens: int):
+        """Streaming call validated as it arrives; returns (content text, usage, stream stats).
+        
+        Raises StreamValidationError (closing the stream) once the answer cannot be valid.
+        """
+        started = time.perf_counter()
+        raw_response = self.rate_limiter.call(
+            lambda: self.client.with_options(max_retries=0).chat.completions.with_raw_response.create(
+                **completion_params, stream=True, stream_options={"include_usage": True}),
+            estimated_tokens
+        )
+        stream = raw_response.parse()
+        usage_chunk = {}
+        
+        def deltas():
+            for chunk in stream:
+                _raise_if_hedge_lost()
+                # The final chunk carries usage and no choices
+                if getattr(chunk, "usage", None):
+                    usage_chunk["usage"] = chunk.usage
+                for choice in chunk.choices:
+                    if choice.delta and choice.delta.content:
+                        yield choice.delta.content
+        
+        try:
+            with span("stream_read"):
+                content_text, stream_stats = read_json_stream(deltas(), started)
+        finally:
+            stream.close()
+        
+        usage = self._extract_usage(usage_chunk)
+        add_throughput(stream_stats, usage.get("output_tokens"))
+        if self.debug:
+            print(f"\n   ✅ Stream complete: TTFT {stream_stats['ttft_seconds']}s, "
+                  f"{stream_stats['tokens_per_second']} tokens/s, {stream_stats['chars']} chars")
+        return content_text, usage, stream_stats
+    
+    def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        """Evaluate a portfolio using GPT-4o vision."""
+        
+        if self.debug:
+            print("\n" + "="*60)
+            print("🔍 DEBUG: Preparing API Call")
+            print("="*60)
+            print(f"   Model: {self.model}")
+            print(f"   Candidate Image: {Path(image_path).name}")
+            print(f"   Number of Exemplars: {len(exemplar_images)}")
+            print(f"   Prompt Length: {len(prompt)} characters")
+            print("\n   Encoding images:")
+        
+        with span("build_request"):
+            completion_params = self.build_request(image_path, prompt, exemplar_images)
+        messages = completion_params["messages"]
+        content = messages[-1]["content"]
+        
         if self.debug:
             print("\n   API Request Structure:")
             print(f"   - System message: {len(messages[0]['content'])} chars")
@@ -146,59 +506,24 @@ class OpenAIProvider(ModelProvider):
             print(f"\n   Calling OpenAI API...")
         
         try:
-            # GPT-5 has different parameter requirements
-            completion_params = {
-                "model": self.model,
-                "messages": messages,
-                "response_format": {"type": "json_object"}  # Ensure JSON response
-            }
-            
-            if self.model.startswith("gpt-5"):
-                # GPT-5 uses natural completion - no token limit needed
-                # GPT-5 only supports default temperature (1)
-                # Not setting temperature or max_completion_tokens will use defaults
-                pass
-            elif self.model.startswith("o1"):
-                # o1 reasoning models have specific requirements
-                # No temperature or max_tokens supported - uses reasoning approach
-                # Remove response_format for o1 as it may not support structured output
-                if "response_format" in completion_params:
-                    del completion_params["response_format"]
-                    print("   ⚠️  Note: o1 model may not support structured JSON output")
-            else:
-                # GPT-4o and other models
-                completion_params["max_tokens"] = 2000
-                completion_params["temperature"] = 0.3  # Lower temperature for more consistent evaluations
-            
-            response = self.client.chat.completions.create(**completion_params)
-            
-            if self.debug:
-                print(f"\n   ✅ API Response Received:")
-                print(f"   - Model used: {response.model}")
-                print(f"   - Tokens used: {response.usage.total_tokens if response.usage else 'N/A'}")
-                print(f"   - Number of choices: {len(response.choices)}")
-                
-                choice = response.choices[0]
-                print(f"   - Finish reason: {choice.finish_reason}")
-                print(f"   - Message role: {choice.message.role}")
-                
-                content = choice.message.content
-                if content:
-                    print(f"   - Response length: {len(content)} chars")
-                    # Show the raw response
-                    print(f"\n   Raw Response (first 500 chars):")
-                    print(f"   {content[:500]}...")
+            # Rate limited + retried (see _completion / _stream_completion)
+            estimate = self.estimate_input_tokens(image_path, prompt, exemplar_images)
+            estimated_tokens = sum(estimate.values()) + self.output_token_reserve()
+            stream_stats = None
+            started = time.perf_counter()
+            with span("api_call", model=self.model, stream=self.stream):
+                if self.stream:
+                    content_text, usage, stream_stats = self._stream_completion(completion_params, estimated_tokens)
                 else:
-                    print(f"   - Response content is None or empty")
-                    # Debug the entire message structure
-                    print(f"   - Full message dict: {choice.message.model_dump() if hasattr(choice.message, 'model_dump') else 'N/A'}")
+                    content_text, usage = self._completion(completion_params, estimated_tokens)
+            call_metrics = self.call_metrics(completion_params, image_path, exemplar_images,
+                                             time.perf_counter() - started)
+            if usage:
+                self.rate_limiter.reconcile(estimated_tokens, usage["input_tokens"] + usage["output_tokens"])
             
             # Parse the JSON response
-            content = response.choices[0].message.content
-            if not content:
-                raise ValueError("API returned empty response content")
-            
-            result = json.loads(content)
+            with span("parse_json"):
+                result = self.parse_response_text(content_text)
             
             if self.debug:
                 print(f"\n   📊 Parsed Result Summary:")
@@ -211,6 +536,11 @@ class OpenAIProvider(ModelProvider):
                 print(f"   - Red Flags: {result.get('red_flags', [])}")
                 print("="*60 + "\n")
             
+            result["_usage"] = usage
+            result["_image_tokens"] = self.image_token_report(estimate, usage)
+            result["_call_metrics"] = call_metrics
+            if stream_stats:
+                result["_stream"] = stream_stats
             return result
             
         except Exception as e:
@@ -223,57 +553,91 @@ class OpenAIProvider(ModelProvider):
 class ClaudeProvider(ModelProvider):
     """Anthropic Claude provider for Sonnet 4 and Opus 4.1 models."""
     
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514", debug: bool = False):
+    # Images are re-encoded as JPEG at this quality (sized by ClaudeImagePolicy)
+    JPEG_QUALITY = 90
+    MAX_TOKENS = 4000
+    
+    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514", debug: bool = False,
+                 image_cache: Optional[ImagePayloadCache] = None, prompt_cache: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None, stream: bool = False,
+                 image_policy: Optional[ImagePolicy] = None, http_pool: Optional[HTTPPool] = None,
+                 base_url: Optional[str] = None):
         if not ANTHROPIC_AVAILABLE:
             raise ImportError("Anthropic package not installed. Run: pip install anthropic")
+        import anthropic
         
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # Built on the shared connection pool (keep-alive, HTTP/2, explicit timeouts)
+        self.http_pool = http_pool or get_http_pool()
+        self.client = anthropic.Anthropic(api_key=api_key, base_url=base_url, http_client=self.http_pool.client,
+                                          timeout=self.http_pool.timeout)
         self.model = model
         self.debug = debug
+        self.image_cache = image_cache
+        # Shared by all workers using this model; owns retries (SDK retries are disabled per call)
+        self.rate_limiter = rate_limiter or get_rate_limiter("anthropic", model)
+        # Images are pre-sized to what Claude bills (1568px long edge / ~1.15MP)
+        self.image_policy = image_policy or ClaudeImagePolicy(jpeg_quality=self.JPEG_QUALITY)
+        # Stream responses: records TTFT / tokens per second and aborts bad JSON early
+        self.stream = stream
+        # Mark the shared prompt + exemplar prefix with a cache_control breakpoint
+        self.prompt_cache = prompt_cache
+        self._prefix = None  # (cache key, content blocks)
         
     def _encode_image(self, image_path: str) -> str:
+        """Encode image to base64 (served from the payload cache when available)."""
+        if self.image_cache is None:
+            with span("encode_image", image=Path(image_path).name):
+                return self._encode_image_uncached(image_path)
+        
+        transform = {
+            "provider": "claude",
+            "encoder": "pillow" if PIL_AVAILABLE else "raw",
+            **self.image_policy.transform_key(),
+            "format": "JPEG",
+        }
+        with span("encode_image", image=Path(image_path).name):
+            payload, hit = self.image_cache.get_or_encode(image_path, transform, self._encode_image_uncached)
+        if hit and self.debug:
+            print(f"      ♻️  Cached {Path(image_path).name}: {len(payload) * 3 / 4 / 1024:.1f} KB")
+        return payload
+    
+    def _encode_image_uncached(self, image_path: str) -> str:
         """Encode image to base64, resizing for Claude if needed."""
-        try:
-            from PIL import Image
-            import io
+        if PIL_AVAILABLE:
+            # Resize to the size Claude bills at (or smaller, to fit the token budget)
+            plan = self.image_policy.plan(image_path)
+            with span("pillow_resize"):
+                image_bytes = resize_to_plan(image_path, plan, self.image_policy.jpeg_quality)
+            if plan["resize"] and self.debug:
+                print(f"      🔧 Resized {Path(image_path).name}: {tuple(plan['original_size'])} → "
+                      f"{tuple(plan['target_size'])} (~{plan['estimated_tokens']} tokens)")
             
-            # Open and check image dimensions
-            with Image.open(image_path) as img:
-                original_size = img.size
-                max_dim = max(img.size)
-                
-                # Claude has 8000px max dimension limit
-                if max_dim > 8000:
-                    # Resize while maintaining aspect ratio
-                    ratio = 8000 / max_dim
-                    new_size = (int(img.width * ratio), int(img.height * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    
-                    if self.debug:
-                        print(f"      🔧 Resized {Path(image_path).name}: {original_size} → {new_size}")
-                
-                # Convert to bytes
-                img_buffer = io.BytesIO()
-                img.save(img_buffer, format='JPEG', quality=90)
-                image_bytes = img_buffer.getvalue()
-                
-                if self.debug:
-                    size_kb = len(image_bytes) / 1024
-                    print(f"      📷 Encoded {Path(image_path).name}: {size_kb:.1f} KB")
-                
+            if self.debug:
+                size_kb = len(image_bytes) / 1024
+                print(f"      📷 Encoded {Path(image_path).name}: {size_kb:.1f} KB")
+            
+            with span("base64", bytes=len(image_bytes)):
                 return base64.b64encode(image_bytes).decode('utf-8')
-                
-        except ImportError:
+        else:
             # Fallback if PIL not available
             with open(image_path, "rb") as image_file:
                 image_bytes = image_file.read()
                 if self.debug:
                     size_kb = len(image_bytes) / 1024
                     print(f"      📷 Encoded {Path(image_path).name}: {size_kb:.1f} KB (no resize - PIL not available)")
-                return base64.b64encode(image_bytes).decode('utf-8')
+                with span("base64", bytes=len(image_bytes)):
+                    return base64.b64encode(image_bytes).decode('utf-8')
         
-    def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
-        """Evaluate a portfolio using Claude models."""
+    def _build_prefix_content(self, prompt: str, exemplar_images: List[str]) -> List[Dict[str, Any]]:
+        """Build the prompt + exemplar prefix shared by every candidate.
+        
+        In prompt cache mode the last prefix block carries a `cache_control`
+        breakpoint, so Anthropic caches the system prompt, prompt text and all
+        exemplar images and only the candidate image is processed fresh.
+        """
+        prefix_key = hashlib.sha256("\n".join([prompt, *exemplar_images]).encode("utf-8")).hexdigest()
+        if self.prompt_cache and self._prefix and self._prefix[0] == prefix_key:
+            return self._prefix[1]
         
         # Build message content with images
         content = []
@@ -286,29 +650,62 @@ class ClaudeProvider(ModelProvider):
         
         # Add exemplar images if provided
         for ex_path in exemplar_images:
-            content.append({
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": "image/jpeg",
-                    "data": self._encode_image(ex_path)
-                }
-            })
+            content.append(self._image_block(ex_path))
         
-        # Add instruction and candidate image
+        # Add instruction (the candidate image follows it)
         content.append({
             "type": "text", 
             "text": "\n\nNow evaluate this candidate portfolio:"
         })
         
-        content.append({
+        if self.prompt_cache:
+            content[-1]["cache_control"] = {"type": "ephemeral"}
+            self._prefix = (prefix_key, content)
+        return content
+    
+    @staticmethod
+    def _extract_usage(response: Any) -> Dict[str, Any]:
+        """Normalize Messages API usage into cached vs uncached input tokens."""
+        usage = _usage_field(response, "usage", None)
+        if usage is None:
+            return {}
+        # input_tokens only counts tokens after the last cache breakpoint
+        uncached = _usage_field(usage, "input_tokens")
+        cache_write = _usage_field(usage, "cache_creation_input_tokens")
+        cache_read = _usage_field(usage, "cache_read_input_tokens")
+        return {
+            "input_tokens": uncached + cache_write + cache_read,
+            "cached_input_tokens": cache_read,
+            "cache_write_input_tokens": cache_write,
+            "uncached_input_tokens": uncached + cache_write,
+            "output_tokens": _usage_field(usage, "output_tokens"),
+        }
+    
+    def _image_block(self, image_path: str) -> Dict[str, Any]:
+        """Base64 image content block at the planned size."""
+        payload = self._encode_image(image_path)
+        self.image_policy.record(image_path, self.image_policy.plan(image_path), len(payload) * 3 // 4)
+        return {
             "type": "image",
             "source": {
-                "type": "base64", 
+                "type": "base64",
                 "media_type": "image/jpeg",
-                "data": self._encode_image(image_path)
+                "data": payload
             }
-        })
+        }
+    
+    def output_token_reserve(self) -> int:
+        return self.MAX_TOKENS
+    
+    def build_request(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        """Build the messages.create parameters for one candidate.
+        
+        Shared by the interactive path and batch mode, so both send identical requests.
+        """
+        # Prompt + exemplars first, then the candidate image (or its viewport tiles)
+        content = list(self._build_prefix_content(prompt, exemplar_images))
+        
+        content.extend(self._candidate_content(image_path))
         
         messages = [
             {
@@ -317,6 +714,103 @@ class ClaudeProvider(ModelProvider):
             }
         ]
         
+        return {
+            "model": self.model,
+            "max_tokens": self.MAX_TOKENS,
+            "messages": messages,
+            "system": SYSTEM_PROMPT
+        }
+    
+    def request_params(self) -> Dict[str, Any]:
+        return {
+            **super().request_params(),
+            "system": SYSTEM_PROMPT,
+            "max_tokens": self.MAX_TOKENS,
+            "image_policy": self.image_policy.transform_key()
+        }
+    
+    def parse_response_text(self, content_text: Optional[str]) -> Dict[str, Any]:
+        """Parse Claude's JSON answer, tolerating markdown code fences."""
+        if not content_text:
+            raise ResponseParseError("Claude API returned empty response content")
+        
+        # Claude sometimes wraps JSON in markdown code blocks
+        content_text = content_text.strip()
+        if content_text.startswith("```json"):
+            content_text = content_text.replace("```json", "").replace("```", "").strip()
+        elif content_text.startswith("```"):
+            content_text = content_text.replace("```", "").strip()
+        
+        try:
+            answer = json.loads(content_text)
+        except json.JSONDecodeError as e:
+            if self.debug:
+                print(f"\n   ❌ JSON Parsing Error: {e}")
+                print(f"   Raw response (first 500 chars):")
+                print(f"   {content_text[:500]}...")
+            raise ResponseParseError(f"Claude returned invalid JSON: {e}")
+        return check_answer_shape(answer)
+    
+    def _create(self, request_params: Dict[str, Any], estimated_tokens: int):
+        """Blocking call; returns (response text, usage)."""
+        # The raw response exposes the anthropic-ratelimit-* headers to the rate limiter
+        raw_response = self.rate_limiter.call(
+            lambda: self.client.with_options(max_retries=0).messages.with_raw_response.create(**request_params),
+            estimated_tokens
+        )
+        with span("parse_sdk_response"):
+            response = raw_response.parse()
+        
+        if self.debug:
+            print(f"\n   ✅ Claude API Response Received:")
+            print(f"   - Model used: {response.model}")
+            print(f"   - Usage: {response.usage}")
+            print(f"   - Response length: {len(response.content[0].text)} chars")
+        
+        return response.content[0].text, self._extract_usage(response)
+    
+    def _stream_create(self, request_params: Dict[str, Any], estimated_tokens: int):
+        """Streaming call validated as it arrives; returns (response text, usage, stream stats).
+        
+        Raises StreamValidationError (closing the stream) once the answer cannot be valid.
+        """
+        started = time.perf_counter()
+        raw_response = self.rate_limiter.call(
+            lambda: self.client.with_options(max_retries=0).messages.with_raw_response.create(
+                **request_params, stream=True),
+            estimated_tokens
+        )
+        stream = raw_response.parse()
+        usage_fields: Dict[str, Any] = {}
+        
+        def deltas():
+            for event in stream:
+                _raise_if_hedge_lost()
+                if event.type == "message_start":
+                    # Input (and cache) token counts arrive up front, output tokens at the end
+                    for name in ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+                        usage_fields[name] = _usage_field(event.message.usage, name)
+                elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    yield event.delta.text
+                elif event.type == "message_delta":
+                    usage_fields["output_tokens"] = _usage_field(event.usage, "output_tokens")
+        
+        try:
+            with span("stream_read"):
+                content_text, stream_stats = read_json_stream(deltas(), started)
+        finally:
+            stream.close()
+        
+        usage = self._extract_usage({"usage": usage_fields}) if usage_fields else {}
+        add_throughput(stream_stats, usage.get("output_tokens"))
+        if self.debug:
+            print(f"\n   ✅ Claude stream complete: TTFT {stream_stats['ttft_seconds']}s, "
+                  f"{stream_stats['tokens_per_second']} tokens/s, {stream_stats['chars']} chars")
+        return content_text, usage, stream_stats
+    
+    def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        """Evaluate a portfolio using Claude models."""
+        
         if self.debug:
             print(f"\n============================================================")
             print(f"🔍 DEBUG: Preparing Claude API Call")
@@ -326,42 +820,29 @@ class ClaudeProvider(ModelProvider):
             print(f"   Number of Exemplars: {len(exemplar_images)}")
             print(f"   Prompt Length: {len(prompt)} characters")
             print(f"\n   Encoding images:")
-            
+        
+        with span("build_request"):
+            request_params = self.build_request(image_path, prompt, exemplar_images)
+        
         try:
-            # Claude API call
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4000,
-                messages=messages,
-                system="You are a senior product design hiring manager. Evaluate portfolios strictly based on visual craft."
-            )
-            
-            if self.debug:
-                print(f"\n   ✅ Claude API Response Received:")
-                print(f"   - Model used: {response.model}")
-                print(f"   - Usage: {response.usage}")
-                print(f"   - Response length: {len(response.content[0].text)} chars")
+            # Claude API call (rate limited + retried, see _create / _stream_create)
+            estimate = self.estimate_input_tokens(image_path, prompt, exemplar_images)
+            estimated_tokens = sum(estimate.values()) + self.output_token_reserve()
+            stream_stats = None
+            started = time.perf_counter()
+            with span("api_call", model=self.model, stream=self.stream):
+                if self.stream:
+                    content_text, usage, stream_stats = self._stream_create(request_params, estimated_tokens)
+                else:
+                    content_text, usage = self._create(request_params, estimated_tokens)
+            call_metrics = self.call_metrics(request_params, image_path, exemplar_images,
+                                             time.perf_counter() - started)
+            if usage:
+                self.rate_limiter.reconcile(estimated_tokens, usage["input_tokens"] + usage["output_tokens"])
                 
             # Parse the JSON response
-            content_text = response.content[0].text
-            if not content_text:
-                raise ValueError("Claude API returned empty response content")
-            
-            # Claude sometimes wraps JSON in markdown code blocks
-            content_text = content_text.strip()
-            if content_text.startswith("```json"):
-                content_text = content_text.replace("```json", "").replace("```", "").strip()
-            elif content_text.startswith("```"):
-                content_text = content_text.replace("```", "").strip()
-            
-            try:
-                result = json.loads(content_text)
-            except json.JSONDecodeError as e:
-                if self.debug:
-                    print(f"\n   ❌ JSON Parsing Error: {e}")
-                    print(f"   Raw response (first 500 chars):")
-                    print(f"   {content_text[:500]}...")
-                raise ValueError(f"Claude returned invalid JSON: {e}")
+            with span("parse_json"):
+                result = self.parse_response_text(content_text)
             
             if self.debug:
                 print(f"\n   📊 Parsed Result Summary:")
@@ -376,6 +857,11 @@ class ClaudeProvider(ModelProvider):
                     print(f"   - Red Flags: {red_flags}")
                 print(f"============================================================\n")
             
+            result["_usage"] = usage
+            result["_image_tokens"] = self.image_token_report(estimate, usage)
+            result["_call_metrics"] = call_metrics
+            if stream_stats:
+                result["_stream"] = stream_stats
             return result
             
         except Exception as e:
@@ -385,125 +871,262 @@ class ClaudeProvider(ModelProvider):
             raise
 
 
+class HedgedProvider(ModelProvider):
+    """Races a secondary provider against a primary call that is slower than usual.
+    
+    The primary is called first. If it fails, or has not answered within the hedge
+    delay (a percentile of its recent latencies), the same evaluation is sent to the
+    secondary and the first valid result wins. A losing streamed call is closed; a
+    losing blocking call cannot be interrupted, so its result is discarded when it arrives.
+    
+    The winner's result carries a `_hedge` dict (winner, backend, delays, latency). The
+    latency saved is only known once the losing primary finishes, so it is totalled in
+    `stats` (see hedge_summary) rather than on the result.
+    """
+    
+    # Recent primary latencies the hedge delay percentile is computed over
+    LATENCY_WINDOW = 200
+    
+    def __init__(self, primary: ModelProvider, secondary: ModelProvider, percentile: float = 90.0,
+                 initial_delay: float = 30.0, min_samples: int = 5):
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        # Hedge delay until min_samples primary latencies have been observed
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.model = f"{getattr(primary, 'model', 'unknown')}+hedge:{getattr(secondary, 'model', 'unknown')}"
+        
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        # Calls run here so the evaluator's worker can wait on both at once
+        self._executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="hedge")
+        self.stats = {
+            "calls": 0, "hedged": 0, "hedged_on_failure": 0, "primary_wins": 0, "secondary_wins": 0,
+            "losers_cancelled": 0, "latency_saved_seconds": 0.0, "latency_saved_calls": 0
+        }
+    
+    # The evaluator reads these from the provider; the primary's settings describe the run
+    @property
+    def image_policy(self) -> Optional[ImagePolicy]:
+        return self.primary.image_policy
+    
+    @property
+    def http_pool(self) -> Optional[HTTPPool]:
+        return self.primary.http_pool
+    
+    @property
+    def image_tiler(self) -> Optional[ImageTiler]:
+        return self.primary.image_tiler
+    
+    @image_tiler.setter
+    def image_tiler(self, tiler: Optional[ImageTiler]):
+        self.primary.image_tiler = tiler
+        self.secondary.image_tiler = tiler
+    
+    def __getattr__(self, name: str):
+        # rate_limiter, stream, prompt_cache, image_cache, client, ...
+        if name in ("primary", "secondary"):
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+    
+    def warm_exemplars(self, exemplar_images: List[str]):
+        self.primary.warm_exemplars(exemplar_images)
+        self.secondary.warm_exemplars(exemplar_images)
+    
+    def request_params(self) -> Dict[str, Any]:
+        return {
+            "provider": self.__class__.__name__,
+            "primary": self.primary.request_params(),
+            "secondary": self.secondary.request_params()
+        }
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging: a percentile of its recent latencies."""
+        with self._lock:
+            samples = list(self._latencies)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        cut_points = statistics.quantiles(samples, n=100, method="inclusive")
+        return cut_points[min(98, max(0, round(self.percentile) - 1))]
+    
+    @staticmethod
+    def _backend(provider: ModelProvider) -> str:
+        return f"{provider.__class__.__name__}/{getattr(provider, 'model', 'unknown')}"
+    
+    def _call(self, provider: ModelProvider, cancelled: threading.Event, image_path: str, prompt: str,
+              exemplar_images: List[str], candidate: Optional[str] = None) -> Dict[str, Any]:
+        _hedge_context.cancelled = cancelled
+        try:
+            with span("hedge_call", candidate=candidate, backend=self._backend(provider)):
+                return provider.evaluate_portfolio(image_path, prompt, exemplar_images)
+        finally:
+            _hedge_context.cancelled = None
+    
+    def _record_primary(self, future, started: float):
+        """Primary latencies (including losing calls that finished) feed the hedge delay."""
+        if not future.cancelled() and future.exception() is None:
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+    
+    def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        delay = self.hedge_delay()
+        cancel = {"primary": threading.Event(), "secondary": threading.Event()}
+        
+        # Hedge threads carry the worker's candidate label into the trace
+        candidate = current_candidate()
+        primary = self._executor.submit(self._call, self.primary, cancel["primary"], image_path, prompt,
+                                        exemplar_images, candidate)
+        primary.add_done_callback(lambda f: self._record_primary(f, started))
+        with self._lock:
+            self.stats["calls"] += 1
+        
+        done, _ = wait([primary], timeout=delay)
+        primary_failed = bool(done) and primary.exception() is not None
+        if done and not primary_failed:
+            # Answered before the hedge delay: nothing to race
+            result = primary.result()
+            with self._lock:
+                self.stats["primary_wins"] += 1
+            result["_hedge"] = {
+                "winner": "primary",
+                "backend": self._backend(self.primary),
+                "hedged": False,
+                "hedge_delay_seconds": round(delay, 3),
+                "latency_seconds": round(time.perf_counter() - started, 3)
+            }
+            return result
+        
+        if getattr(self.primary, 'debug', False):
+            reason = f"Primary failed ({type(primary.exception()).__name__})" if primary_failed \
+                else f"Primary slower than {delay:.1f}s"
+            print(f"   ⏱️  {reason}; hedging with {self._backend(self.secondary)}")
+        secondary = self._executor.submit(self._call, self.secondary, cancel["secondary"], image_path, prompt,
+                                          exemplar_images, candidate)
+        with self._lock:
+            self.stats["hedged"] += 1
+            self.stats["hedged_on_failure"] += int(primary_failed)
+        
+        # First valid result wins; a failed call leaves the other one racing
+        racing = {secondary: "secondary"} if primary_failed else {primary: "primary", secondary: "secondary"}
+        errors: Dict[str, BaseException] = {"primary": primary.exception()} if primary_failed else {}
+        winner, result = None, None
+        while racing and winner is None:
+            done, _ = wait(list(racing), return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: racing[f]):
+                role = racing.pop(future)
+                if future.exception() is None:
+                    winner, result = role, future.result()
+                    break
+                errors[role] = future.exception()
+        
+        if winner is None:
+            raise errors["primary"]
+        
+        latency = time.perf_counter() - started
+        loser_role = "secondary" if winner == "primary" else "primary"
+        loser = primary if loser_role == "primary" else secondary
+        loser_provider = self.primary if loser_role == "primary" else self.secondary
+        loser_cancelled = False
+        if loser in racing:
+            # Streams stop at the next chunk; blocking calls run to completion
+            cancel[loser_role].set()
+            loser_cancelled = bool(getattr(loser_provider, 'stream', False))
+        
+        hedge = {
+            "winner": winner,
+            "backend": self._backend(self.primary if winner == "primary" else self.secondary),
+            "hedged": True,
+            "primary_failed": primary_failed,
+            "hedge_delay_seconds": round(delay, 3),
+            "latency_seconds": round(latency, 3),
+            "loser_cancelled": loser_cancelled
+        }
+        with self._lock:
+            self.stats["primary_wins" if winner == "primary" else "secondary_wins"] += 1
+            self.stats["losers_cancelled"] += int(loser_cancelled)
+        
+        if winner == "secondary" and loser in racing:
+            # Runs after this result has been returned (and journaled), so only the run totals change
+            def record_saving(future):
+                if future.cancelled() or future.exception() is not None:
+                    return
+                saved = (time.perf_counter() - started) - latency
+                with self._lock:
+                    self.stats["latency_saved_seconds"] += saved
+                    self.stats["latency_saved_calls"] += 1
+            primary.add_done_callback(record_saving)
+        
+        result["_hedge"] = hedge
+        return result
+    
+    def hedge_summary(self) -> Dict[str, Any]:
+        """Hedging counters for the run metadata."""
+        with self._lock:
+            stats = dict(self.stats)
+            samples = len(self._latencies)
+        return {
+            "primary": self._backend(self.primary),
+            "secondary": self._backend(self.secondary),
+            "percentile": self.percentile,
+            "current_delay_seconds": round(self.hedge_delay(), 3),
+            "latency_samples": samples,
+            **stats,
+            "latency_saved_seconds": round(stats["latency_saved_seconds"], 3)
+        }
+
+
 class PortfolioEvaluator:
     """Main evaluator class that coordinates the evaluation process."""
     
-    def __init__(self, provider: ModelProvider, base_dir: Path, no_exemplars: bool = False):
+    def __init__(self, provider: ModelProvider, base_dir: Path, no_exemplars: bool = False,
+                 concurrency: int = 1, result_cache: Optional[ResultCache] = None, max_attempts: int = 3,
+                 dedupe_threshold: Optional[int] = DEDUPE_THRESHOLD, sampling: Optional[SamplingPolicy] = None,
+                 price_table: Optional[PriceTable] = None, compact_prompt: bool = False):
         self.provider = provider
         self.base_dir = base_dir
         self.no_exemplars = no_exemplars
+        # Token-minimized prompt rendering (flattened rubric, exemplar table; see prompt_builder.py)
+        self.compact_prompt = compact_prompt
+        # Number of candidates evaluated in parallel (1 = sequential, the original behaviour)
+        self.concurrency = max(1, concurrency)
+        # Raw model outputs memoized by input fingerprint across runs (None = always call the API)
+        self.result_cache = result_cache
+        # Evaluation attempts per candidate before a transient/parse failure is dead-lettered
+        self.max_attempts = max(1, max_attempts)
+        self.dead_letter: Dict[str, Dict[str, Any]] = {}
+        # Max pHash distance for collapsing near-duplicate candidates (None = evaluate every image)
+        self.dedupe_threshold = dedupe_threshold
+        # Candidate ID -> the earlier candidate it duplicates, with hash distances
+        self.duplicates: Dict[str, Dict[str, Any]] = {}
+        # Adaptive self-consistency sampling (None = one evaluation per candidate)
+        self.sampling = sampling
+        # Token prices for per-call cost accounting
+        self.price_table = price_table or PriceTable()
         self.start_time = None
         self.end_time = None
+        # When this session started, and active time from earlier sessions of a resumed run
+        self.session_start = None
+        self.prior_duration = 0.0
         self.full_prompt = None
+        self.prompt_fingerprint = None
         self.exemplar_images_used = []
+        self.exemplar_hashes: Dict[str, str] = {}
+        self.candidates_planned: List[str] = []
+        # Extra mode-specific fields merged into evaluation_metadata (e.g. batch ids)
+        self.run_metadata: Dict[str, Any] = {}
         
-    def load_json(self, filename: str) -> Dict:
-        """Load JSON file from project directory."""
-        filepath = self.base_dir / filename
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    
-    def load_text(self, filename: str) -> str:
-        """Load text file from project directory."""
-        filepath = self.base_dir / filename
-        with open(filepath, 'r') as f:
-            return f.read()
-    
     def generate_prompt(self) -> str:
-        """Generate the complete prompt from components."""
-        
-        # Load components
-        core_prompt = self.load_text("core-prompt.md")
-        rubric = self.load_json("rubric.json")
-        exemplars = self.load_json("examplars.json")
-
-        # Build compact exemplar calibration (numeric anchors only)
-        def get_dimension_weights(rubric_dict: dict) -> dict:
-            weights: dict = {}
-            for dim in rubric_dict.get("rubric", {}).get("dimensions", []):
-                dim_id = dim.get("id")
-                weight = dim.get("weight")
-                if dim_id is not None and weight is not None:
-                    weights[dim_id] = float(weight)
-            return weights
-
-        def build_exemplar_calibration_summary(exemplars_dict: dict, weights_dict: dict) -> dict:
-            penalty_weights = {
-                "template_scent_high": 0.5,
-                "sloppy_images": 0.3,
-                "process_soup": 0.2,
-            }
-            items = []
-            for key in sorted(exemplars_dict.keys(), key=lambda k: int(k) if str(k).isdigit() else str(k)):
-                ex = exemplars_dict[key]
-                criteria = ex.get("criteria", {})
-                crit_scores = {
-                    "typography": criteria.get("typography", {}).get("score", 0),
-                    "layout_composition": criteria.get("layout_composition", {}).get("score", 0),
-                    "color": criteria.get("color", {}).get("score", 0),
-                }
-                base = (
-                    weights_dict.get("typography", 0.0) * float(crit_scores["typography"])
-                    + weights_dict.get("layout_composition", 0.0) * float(crit_scores["layout_composition"])
-                    + weights_dict.get("color", 0.0) * float(crit_scores["color"])
-                )
-                red_flags = ex.get("red_flags", []) or []
-                penalty = sum(penalty_weights.get(flag, 0.0) for flag in red_flags)
-                overall = ex.get("overall_weighted_score", round(base - penalty, 2))
-                items.append({
-                    "exemplar_id": ex.get("exemplar_id", key),
-                    "portfolio_category": ex.get("portfolio_category", "Unknown"),
-                    "criteria_scores": crit_scores,
-                    "overall_weighted_score": overall,
-                })
-            return {
-                "exemplars": items,
-                "guidance": [
-                    "Use these numeric anchors to calibrate scoring.",
-                    "Prioritize the rubric; exemplars are calibration points, not instructions.",
-                    "Use the full 1–5 range when warranted.",
-                ],
-            }
-
-        # Build the complete prompt
-        if self.no_exemplars:
-            # Pure rubric-only mode - modify core prompt to remove exemplar references
-            modified_core_prompt = core_prompt.replace(
-                "4. **Be consistent with the exemplars:**\n   - Use the provided exemplar ratings as calibration for your scores\n   - Apply the same standards strictly across all evaluations",
-                "4. **Be consistent in your evaluations:**\n   - Apply the rubric standards strictly and consistently across all evaluations\n   - Use the full 1-5 rating scale when warranted"
-            )
-            prompt_parts = [
-                "# EVALUATION PROMPT\n",
-                modified_core_prompt,
-                "\n\n# RUBRIC (authoritative)\n",
-                "The rubric is the primary guide. Follow it strictly.\n",
-                json.dumps(rubric, indent=2),
-            ]
-        else:
-            # Include exemplar calibration
-            weights = get_dimension_weights(rubric)
-            exemplar_calibration = build_exemplar_calibration_summary(exemplars, weights)
-            
-            prompt_parts = [
-                "# EVALUATION PROMPT\n",
-                core_prompt,
-                "\n\n# RUBRIC (authoritative)\n",
-                "The rubric is the primary guide. Follow it strictly. Exemplars are calibration anchors only.\n",
-                json.dumps(rubric, indent=2),
-                "\n\n# EXEMPLAR CALIBRATION (compact)\n",
-                json.dumps(exemplar_calibration, indent=2),
-            ]
-        
-        full_prompt = "\n".join(prompt_parts)
+        """The complete prompt from its components (memoized; generated-prompt.md is rewritten only on change)."""
+        built = get_prompt_builder(self.base_dir).build(no_exemplars=self.no_exemplars,
+                                                         compact=self.compact_prompt)
         
         # Store for metadata
-        self.full_prompt = full_prompt
+        self.full_prompt = built["prompt"]
+        self.prompt_fingerprint = built["fingerprint"]
         
-        # Save generated prompt
-        with open(self.base_dir / "generated-prompt.md", 'w') as f:
-            f.write(full_prompt)
-        
-        return full_prompt
+        return built["prompt"]
     
     def get_exemplar_images(self) -> List[str]:
         """Get list of exemplar image paths."""
@@ -522,32 +1145,68 @@ class PortfolioEvaluator:
 
         for path in all_exemplars:
             images.append(str(path))
-            # Store relative path for metadata
-            self.exemplar_images_used.append(str(path.relative_to(self.base_dir)))
+            # Store relative path (and content hash, to detect changes on resume) for metadata
+            relative_path = str(path.relative_to(self.base_dir))
+            self.exemplar_images_used.append(relative_path)
+            self.exemplar_hashes[relative_path] = file_sha256(str(path))
 
         return images
     
-    def evaluate_candidates(self, candidate_ids: Optional[List[str]] = None):
-        """Evaluate all candidate portfolios."""
+    def prepare_run(self, candidate_ids: Optional[List[str]] = None):
+        """Start a run: build the prompt, collect exemplar and candidate images.
+        
+        Returns (prompt, exemplar_images, candidate_files, ai_ratings_file), or None
+        when there is nothing to evaluate.
+        """
         
         # Track start time
         self.start_time = datetime.now()
+        self.session_start = self.start_time
         
         print("Starting portfolio evaluation...")
         print(f"Using provider: {self.provider.__class__.__name__}")
         print(f"Start time: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         
+        prompt, exemplar_images = self._load_prompt_and_exemplars()
+        
+        # Get candidate images
+        candidate_files = self.list_candidate_files(candidate_ids)
+        
+        if not candidate_files:
+            print("No candidate images found!")
+            return None
+        
+        print(f"Found {len(candidate_files)} candidate(s) to evaluate")
+        self.candidates_planned = [f.name for f in candidate_files]
+        
+        # Create evaluation results directory
+        results_dir = self.base_dir / "evaluation-results"
+        results_dir.mkdir(exist_ok=True)
+        
+        # Generate timestamped filename
+        timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
+        ai_ratings_file = results_dir / f"evaluation_{timestamp}.json"
+        
+        return prompt, exemplar_images, candidate_files, ai_ratings_file
+    
+    def _load_prompt_and_exemplars(self):
+        """Generate the prompt and collect exemplar images for this run."""
+        
         # Generate the prompt
         print("Generating evaluation prompt...")
-        prompt = self.generate_prompt()
+        with span("generate_prompt"):
+            prompt = self.generate_prompt()
         
         # Get exemplar images (conditionally)
+        self.exemplar_images_used = []
+        self.exemplar_hashes = {}
         if self.no_exemplars:
             exemplar_images = []
             print("🚫 Skipping exemplar images (--no-exemplars flag set)")
             print("📋 Running rubric-only evaluation for calibration")
         else:
-            exemplar_images = self.get_exemplar_images()
+            with span("load_exemplars"):
+                exemplar_images = self.get_exemplar_images()
             print(f"Loaded {len(exemplar_images)} exemplar images")
         
         # Print the final prompt for verification
@@ -557,89 +1216,568 @@ class PortfolioEvaluator:
         print(prompt)
         print("="*80 + "\n")
         
-        # Get candidate images
+        return prompt, exemplar_images
+    
+    def list_candidate_files(self, candidate_ids: Optional[List[str]] = None) -> List[Path]:
+        """Candidate image paths, either the given IDs or everything in candidate-images/."""
         candidate_dir = self.base_dir / "candidate-images"
         
         if candidate_ids:
             # Evaluate specific candidates
-            candidate_files = [candidate_dir / f"candidate_{cid}.jpg" for cid in candidate_ids]
-        else:
-            # Evaluate all candidates in directory
-            candidate_files = sorted(candidate_dir.glob("candidate_*.jpg"))
+            return [candidate_dir / f"candidate_{cid}.jpg" for cid in candidate_ids]
+        # Evaluate all candidates in directory
+        return sorted(candidate_dir.glob("candidate_*.jpg"))
+    
+    def find_duplicates(self) -> Dict[str, Dict[str, Any]]:
+        """Find planned candidates that are near-duplicates of an earlier one (perceptual hashes).
         
-        if not candidate_files:
-            print("No candidate images found!")
+        Each duplicate is keyed by candidate ID and points at the first matching candidate
+        in run order, which is the only one sent to the model.
+        """
+        self.duplicates = {}
+        if self.dedupe_threshold is None or not PHASH_AVAILABLE:
+            return self.duplicates
+        
+        candidate_dir = self.base_dir / "candidate-images"
+        files = [candidate_dir / name for name in self.candidates_planned if (candidate_dir / name).exists()]
+        index = PerceptualHashIndex(self.base_dir / ".cache" / "perceptual-hashes.json")
+        matches = index.find_duplicates(files, self.dedupe_threshold)
+        index.save()
+        
+        for name, match in matches.items():
+            self.duplicates[Path(name).stem.split('_')[1]] = {
+                "candidate_id": Path(match["canonical"]).stem.split('_')[1],
+                "image_filename": match["canonical"],
+                "dhash_distance": match["dhash_distance"],
+                "phash_distance": match["phash_distance"]
+            }
+        if self.duplicates:
+            print(f"⧉ {len(self.duplicates)} near-duplicate candidate(s) will reuse an earlier evaluation: "
+                  + ", ".join(f"{cid}→{m['candidate_id']}" for cid, m in self.duplicates.items()))
+        return self.duplicates
+    
+    def _duplicate_group(self, canonical_id: str) -> List[str]:
+        """IDs of the candidates collapsed onto canonical_id."""
+        return [cid for cid, match in self.duplicates.items() if match["candidate_id"] == canonical_id]
+    
+    def _link_duplicates(self, ai_ratings: Dict, canonical_id: str) -> List[str]:
+        """Copy a canonical candidate's evaluation to its near-duplicates and cross-link them.
+        
+        Returns the IDs of the duplicates added to ai_ratings.
+        """
+        group = self._duplicate_group(canonical_id)
+        if not group or canonical_id not in ai_ratings:
+            return []
+        canonical = ai_ratings[canonical_id]
+        canonical["duplicates"] = group
+        
+        linked = []
+        for cid in group:
+            if cid in ai_ratings:
+                continue
+            # Same scores; no API call (and so no usage, streaming or cache data) of its own
+            result = {key: value for key, value in copy.deepcopy(canonical).items()
+                      if key not in ("usage", "stream", "image_tokens", "cache_hit", "failed_attempts",
+                                     "duplicates", "candidate_tiles", "hedge", "sampling", "call_metrics")}
+            result["candidate_id"] = cid
+            result["image_filename"] = f"candidate_{cid}.jpg"
+            result["duplicate_of"] = self.duplicates[cid]
+            ai_ratings[cid] = result
+            linked.append(cid)
+        return linked
+    
+    def update_latest_symlink(self, ai_ratings_file: Path):
+        """Point ai-ratings.json at the given run file (backwards compatibility)."""
+        latest_link = self.base_dir / "ai-ratings.json"
+        if latest_link.exists() or latest_link.is_symlink():
+            latest_link.unlink()
+        latest_link.symlink_to(Path(ai_ratings_file).resolve().relative_to(Path(self.base_dir).resolve()))
+    
+    def evaluate_candidates(self, candidate_ids: Optional[List[str]] = None):
+        """Evaluate all candidate portfolios."""
+        
+        with span("prepare_run"):
+            run = self.prepare_run(candidate_ids)
+        if run is None:
             return
+        prompt, exemplar_images, candidate_files, ai_ratings_file = run
         
-        print(f"Found {len(candidate_files)} candidate(s) to evaluate")
+        self._run_candidates(prompt, exemplar_images, candidate_files, ai_ratings_file, ai_ratings={})
+    
+    def resume_run(self, run_path: Path, state: Optional[Dict[str, Any]] = None):
+        """Continue an interrupted run: evaluate only missing or failed candidates.
         
-        # Create evaluation results directory
-        results_dir = self.base_dir / "evaluation-results"
-        results_dir.mkdir(exist_ok=True)
+        `run_path` is an `evaluation_*.json` file or its `.journal.ndjson`. The prompt,
+        model and exemplar set must match the original run; the same results file
+        is finalized with the accumulated duration. Pass the `state` from
+        load_resume_state() to keep its errors apart from errors during the run.
+        """
+        if state is None:
+            state = self.load_resume_state(run_path)
+        self._run_candidates(state["prompt"], state["exemplar_images"], state["missing_files"],
+                             state["ai_ratings_file"], ai_ratings=state["ai_ratings"])
+    
+    def load_resume_state(self, run_path: Path) -> Dict[str, Any]:
+        """Load an interrupted run and check it can be resumed (raises FileNotFoundError / ValueError)."""
+        run_path = Path(run_path).resolve()
+        if run_path.name.endswith(".journal.ndjson"):
+            ai_ratings_file = run_path.with_name(run_path.name[:-len(".journal.ndjson")] + ".json")
+        else:
+            ai_ratings_file = run_path
+        journal_file = journal_path_for(ai_ratings_file)
         
-        # Generate timestamped filename
-        timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
-        ai_ratings_file = results_dir / f"evaluation_{timestamp}.json"
+        if not ai_ratings_file.exists() and not journal_file.exists():
+            raise FileNotFoundError(f"No run file or journal found for {run_path}")
+        
+        stored = self._load_run_state(ai_ratings_file, journal_file)
+        
+        # A resumed run must produce results comparable with what is already saved
+        if stored["model_used"] and stored["model_used"] != self._model_info():
+            raise ValueError(f"Run used {stored['model_used']}, but the current provider is "
+                             f"{self._model_info()}. Re-run with the same --model.")
+        self.no_exemplars = stored["no_exemplars_mode"]
+        self.compact_prompt = stored["compact_prompt_mode"]
+        
+        self.start_time = datetime.fromisoformat(stored["timestamp"])
+        self.session_start = datetime.now()
+        self.prior_duration = stored["elapsed_seconds"]
+        self.run_metadata["resumed_at"] = stored["resumed_at"] + [self.session_start.isoformat()]
+        
+        print(f"🔁 Resuming {ai_ratings_file.name} (started {self.start_time.strftime('%Y-%m-%d %H:%M:%S')})")
+        prompt, exemplar_images = self._load_prompt_and_exemplars()
+        
+        if stored["full_prompt"] != prompt:
+            raise ValueError("The generated prompt no longer matches the prompt used by this run "
+                             "(core-prompt.md, rubric.json or examplars.json changed). Start a new run instead.")
+        if stored["exemplar_images"] != self.exemplar_images_used or (
+                stored["exemplar_hashes"] and stored["exemplar_hashes"] != self.exemplar_hashes):
+            raise ValueError("The exemplar images no longer match the ones used by this run. Start a new run instead.")
+        
+        # Candidates the run set out to evaluate (older runs without a plan: whatever is on disk now)
+        planned = stored["candidates"] or [f.name for f in self.list_candidate_files()]
+        self.candidates_planned = planned
+        candidate_dir = self.base_dir / "candidate-images"
+        ai_ratings = stored["ratings"]
+        missing_files = [candidate_dir / name for name in planned if Path(name).stem.split('_')[1] not in ai_ratings]
+        
+        print(f"Already evaluated: {len(ai_ratings)}/{len(planned)} candidate(s)")
+        print(f"Remaining (missing or failed): {len(missing_files)}")
+        
+        return {"ai_ratings_file": ai_ratings_file, "prompt": prompt, "exemplar_images": exemplar_images,
+                "missing_files": missing_files, "ai_ratings": ai_ratings}
+    
+    def _load_run_state(self, ai_ratings_file: Path, journal_file: Path) -> Dict[str, Any]:
+        """Merge what a results file and its journal know about a run."""
+        stored = {
+            "timestamp": None, "model_used": None, "full_prompt": None, "exemplar_images": [],
+            "exemplar_hashes": {}, "no_exemplars_mode": False, "compact_prompt_mode": False, "candidates": [], "ratings": {},
+            "elapsed_seconds": 0.0, "resumed_at": []
+        }
+        
+        if ai_ratings_file.exists():
+            with open(ai_ratings_file, 'r') as f:
+                data = json.load(f)
+            meta = data.get("evaluation_metadata", {})
+            stored.update({
+                "timestamp": meta.get("timestamp"),
+                "model_used": meta.get("model_used"),
+                "full_prompt": data.get("full_prompt_used"),
+                "exemplar_images": meta.get("exemplar_images", []),
+                "exemplar_hashes": meta.get("exemplar_hashes") or {},
+                "no_exemplars_mode": meta.get("no_exemplars_mode", False),
+                "compact_prompt_mode": meta.get("compact_prompt_mode", False),
+                "candidates": meta.get("candidates_planned") or [],
+                "ratings": data.get("candidate_ratings", {}),
+                "elapsed_seconds": meta.get("duration_seconds") or meta.get("elapsed_seconds") or 0.0,
+                "resumed_at": meta.get("resumed_at") or []
+            })
+        
+        if journal_file.exists():
+            header, journal_ratings, _ = replay_journal(journal_file)
+            if header:
+                stored["timestamp"] = stored["timestamp"] or header.get("timestamp")
+                stored["model_used"] = stored["model_used"] or header.get("model_used")
+                stored["full_prompt"] = stored["full_prompt"] or header.get("full_prompt")
+                stored["exemplar_images"] = stored["exemplar_images"] or header.get("exemplar_images", [])
+                stored["exemplar_hashes"] = stored["exemplar_hashes"] or header.get("exemplar_hashes") or {}
+                stored["no_exemplars_mode"] = header.get("no_exemplars_mode", stored["no_exemplars_mode"])
+                stored["compact_prompt_mode"] = header.get("compact_prompt_mode", stored["compact_prompt_mode"])
+                stored["candidates"] = stored["candidates"] or header.get("candidates", [])
+            stored["ratings"] = {**stored["ratings"], **journal_ratings}
+            elapsed = [r.get("elapsed_seconds", 0.0) for r in RunJournal.read(journal_file)]
+            stored["elapsed_seconds"] = max([stored["elapsed_seconds"], *elapsed])
+        
+        if not stored["timestamp"]:
+            raise ValueError(f"{ai_ratings_file.name} has no run metadata to resume from")
+        return stored
+    
+    def _elapsed_seconds(self) -> float:
+        """Active run time: earlier sessions of a resumed run plus this session so far."""
+        session_start = self.session_start or self.start_time
+        if not session_start:
+            return self.prior_duration
+        return self.prior_duration + (datetime.now() - session_start).total_seconds()
+    
+    def _run_candidates(self, prompt: str, exemplar_images: List[str], candidate_files: List[Path],
+                        ai_ratings_file: Path, ai_ratings: Dict):
+        """Evaluate candidate_files, journal each result and finalize the results file."""
         
-        # Initialize empty ratings
-        ai_ratings = {}
+        self.dead_letter = {}
+        candidate_ids_in_order = [Path(name).stem.split('_')[1] for name in self.candidates_planned]
         
-        # Evaluate each candidate
+        # Near-duplicates wait for their canonical candidate instead of being sent to the model
+        with span("find_duplicates"):
+            self.find_duplicates()
+        scheduled = {f.stem.split('_')[1] for f in candidate_files}
+        held: Dict[str, Path] = {}
+        pending_files = []
         for candidate_file in candidate_files:
-            # Extract candidate ID from filename
-            candidate_id = candidate_file.stem.split('_')[1]
+            match = self.duplicates.get(candidate_file.stem.split('_')[1])
+            if match and (match["candidate_id"] in scheduled or match["candidate_id"] in ai_ratings):
+                held[candidate_file.stem.split('_')[1]] = candidate_file
+            else:
+                pending_files.append(candidate_file)
+        
+        # Each result is appended to the run journal; the full results file is only
+        # written (atomically) when the run finishes or is interrupted
+        journal_file = journal_path_for(ai_ratings_file)
+        new_journal = not journal_file.exists()
+        journal = RunJournal(journal_file)
+        if new_journal:
+            journal.append({
+                "type": "run_started",
+                "timestamp": self.start_time.isoformat(),
+                "model_used": self._model_info(),
+                "full_prompt": prompt,
+                "exemplar_images": self.exemplar_images_used,
+                "exemplar_hashes": self.exemplar_hashes,
+                "no_exemplars_mode": self.no_exemplars,
+                "compact_prompt_mode": self.compact_prompt,
+                "candidates": self.candidates_planned
+            })
+        
+        if self.concurrency > 1:
+            print(f"Running with {self.concurrency} concurrent workers")
+        
+        # Evaluate candidates on a worker pool. Results are collected as they complete,
+        # but always saved in candidate order so the output file is deterministic.
+        # Transient and parse failures are re-queued behind everything already queued.
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="evaluator")
+        attempts: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            futures = {}
             
-            print(f"\nEvaluating candidate {candidate_id}...")
+            def submit(candidate_file: Path):
+                future = executor.submit(self._attempt_candidate, candidate_file, prompt, exemplar_images)
+                futures[future] = candidate_file
+                return future
             
-            try:
-                # Call the model
-                result = self.provider.evaluate_portfolio(
-                    str(candidate_file),
-                    prompt,
-                    exemplar_images
-                )
-                
-                # Process and structure the result
-                structured_result = self.structure_result(result, candidate_id, candidate_file.name)
-                
-                # Add to ratings
-                ai_ratings[candidate_id] = structured_result
-                
-                # Save after each evaluation (in case of interruption)
-                # Include metadata in every save
-                self.save_with_metadata(ai_ratings, ai_ratings_file)
-                
-                print(f"✓ Candidate {candidate_id} evaluated successfully")
-                print(f"  Overall score: {structured_result.get('overall_weighted_score', 'N/A'):.2f}")
-                
-                # Rate limiting (be nice to the API)
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"✗ Error evaluating candidate {candidate_id}: {e}")
-                continue
+            def link_duplicates(canonical_id: str):
+                for duplicate_id in self._link_duplicates(ai_ratings, canonical_id):
+                    held.pop(duplicate_id, None)
+                    journal.append({
+                        "type": "rating",
+                        "candidate_id": duplicate_id,
+                        "result": ai_ratings[duplicate_id],
+                        "elapsed_seconds": self._elapsed_seconds()
+                    })
+                    print(f"⧉ Candidate {duplicate_id} is a near-duplicate of {canonical_id}; reusing its evaluation")
+            
+            # Resumed run: canonicals rated in an earlier session
+            for canonical_id in {self.duplicates[cid]["candidate_id"] for cid in held}:
+                if canonical_id in ai_ratings:
+                    link_duplicates(canonical_id)
+            
+            # Encode the exemplars and open the pooled connections now, so the first
+            # wave of workers doesn't all queue behind the same one-off setup
+            if pending_files:
+                with span("warm_exemplars"):
+                    self.provider.warm_exemplars(exemplar_images)
+                with span("warm_connections"):
+                    self.provider.warm_connections(min(self.concurrency, len(pending_files)))
+            
+            # With provider-side prompt caching, let the first call write the cache
+            # before fanning out so concurrent workers read it instead of all missing
+            if getattr(self.provider, 'prompt_cache', False) and self.concurrency > 1 and len(pending_files) > 1:
+                wait([submit(pending_files.pop(0))])
+            
+            for candidate_file in pending_files:
+                submit(candidate_file)
+            
+            while futures:
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    candidate_file = futures.pop(future)
+                    candidate_id = candidate_file.stem.split('_')[1]
+                    structured_result, error, latency = future.result()
+                    
+                    if error is not None:
+                        # One failed candidate never takes down the rest of the run
+                        failure_class = classify_failure(error)
+                        attempt = {
+                            "attempt": len(attempts.get(candidate_id, [])) + 1,
+                            "failure_class": failure_class,
+                            "error_type": type(error).__name__,
+                            "error": str(error),
+                            "latency_seconds": round(latency, 3)
+                        }
+                        if getattr(error, "stream_stats", None):
+                            # Aborted stream: how far it got before validation failed
+                            attempt["stream"] = error.stream_stats
+                        attempts.setdefault(candidate_id, []).append(attempt)
+                        retry = failure_class != PERMANENT and attempt["attempt"] < self.max_attempts
+                        journal.append({
+                            "type": "failure",
+                            "candidate_id": candidate_id,
+                            **attempt,
+                            "requeued": retry,
+                            "elapsed_seconds": self._elapsed_seconds()
+                        })
+                        
+                        if retry:
+                            print(f"↻ Candidate {candidate_id} failed ({failure_class}: {error}); "
+                                  f"re-queued (attempt {attempt['attempt'] + 1}/{self.max_attempts})")
+                            submit(candidate_file)
+                        else:
+                            print(f"✗ Error evaluating candidate {candidate_id}: {error} "
+                                  f"({failure_class}, {attempt['attempt']} attempt(s)) - dead-lettered")
+                            self.dead_letter[candidate_id] = {
+                                "image_filename": candidate_file.name,
+                                "failure_class": failure_class,
+                                "error_type": attempt["error_type"],
+                                "error": attempt["error"],
+                                "attempts": attempts[candidate_id]
+                            }
+                            # Its near-duplicates can no longer borrow a result: evaluate them directly
+                            for duplicate_id, duplicate_file in list(held.items()):
+                                if self.duplicates[duplicate_id]["candidate_id"] == candidate_id:
+                                    del held[duplicate_id]
+                                    self.duplicates.pop(duplicate_id)
+                                    submit(duplicate_file)
+                        continue
+                    
+                    if candidate_id in attempts:
+                        structured_result["failed_attempts"] = attempts[candidate_id]
+                    
+                    # Add to ratings
+                    ai_ratings[candidate_id] = structured_result
+                    if self._duplicate_group(candidate_id):
+                        structured_result["duplicates"] = self._duplicate_group(candidate_id)
+                    
+                    # Persist after each evaluation (in case of interruption) - O(1) append
+                    with span("journal_append", candidate=candidate_id):
+                        journal.append({
+                            "type": "rating",
+                            "candidate_id": candidate_id,
+                            "result": structured_result,
+                            "elapsed_seconds": self._elapsed_seconds()
+                        })
+                    
+                    print(f"✓ Candidate {candidate_id} evaluated successfully "
+                          f"({len(ai_ratings)}/{len(candidate_ids_in_order)})")
+                    print(f"  Overall score: {structured_result.get('overall_weighted_score', 'N/A'):.2f}")
+                    link_duplicates(candidate_id)
+        except KeyboardInterrupt:
+            print("\n⚠️  Interrupted - cancelling queued candidates and saving progress...")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.save_with_metadata(self._in_candidate_order(ai_ratings, candidate_ids_in_order), ai_ratings_file)
+            journal.close()
+            raise
+        finally:
+            executor.shutdown(wait=True)
         
-        # Track end time
-        self.end_time = datetime.now()
-        duration = (self.end_time - self.start_time).total_seconds()
+        ai_ratings = self._in_candidate_order(ai_ratings, candidate_ids_in_order)
         
-        # Final save with complete metadata
+        # Final save with complete metadata (compacts the journal into the results file)
         self.save_with_metadata(ai_ratings, ai_ratings_file, final=True)
+        journal.remove()
+        duration = self._elapsed_seconds()
+        throughput = (len(ai_ratings) / duration * 60) if duration > 0 else 0.0
         
         # Create symlink to latest results for backwards compatibility
-        latest_link = self.base_dir / "ai-ratings.json"
-        if latest_link.exists() or latest_link.is_symlink():
-            latest_link.unlink()
-        latest_link.symlink_to(ai_ratings_file.relative_to(self.base_dir))
+        self.update_latest_symlink(ai_ratings_file)
         
         print(f"\n✓ Evaluation complete!")
         print(f"  Results saved to: {ai_ratings_file}")
         print(f"  Latest symlink: ai-ratings.json")
         print(f"  Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
+        print(f"  Evaluated: {len(ai_ratings)}/{len(candidate_ids_in_order)} candidates "
+              f"({self.concurrency} worker{'s' if self.concurrency != 1 else ''})")
+        print(f"  Throughput: {throughput:.1f} candidates/minute")
+        prompt_cache_stats = self._summarize_prompt_cache(ai_ratings)
+        if prompt_cache_stats["input_tokens"]:
+            print(f"  Input tokens: {prompt_cache_stats['input_tokens']:,} "
+                  f"({prompt_cache_stats['cached_input_tokens']:,} served from prompt cache)")
+        usage_stats = self._summarize_usage(ai_ratings)
+        if usage_stats["calls"]:
+            latency = usage_stats["percentiles"]["latency_seconds"] or {}
+            cost = f"${usage_stats['cost_usd']:.4f}" if usage_stats["cost_usd"] is not None else "cost unknown"
+            print(f"  API calls: {usage_stats['calls']} ({cost}, latency p50 {latency.get('p50')}s / "
+                  f"p95 {latency.get('p95')}s / p99 {latency.get('p99')}s, {usage_stats['retries']} retries)")
+        streaming = self._summarize_streaming(ai_ratings)
+        if streaming and streaming["streamed_calls"]:
+            print(f"  Streaming: median TTFT {streaming['ttft_seconds_median']}s, "
+                  f"{streaming['tokens_per_second_mean']} tokens/s, {streaming['aborted_streams']} aborted")
+        image_cache = getattr(self.provider, 'image_cache', None)
+        if image_cache is not None:
+            cache_stats = image_cache.summary()
+            hits = cache_stats['memory_hits'] + cache_stats['disk_hits'] + cache_stats['coalesced']
+            print(f"  Image cache: {hits} hits, {cache_stats['misses']} encodes")
+        if self.provider.http_pool is not None:
+            pool_stats = self.provider.http_pool.summary()
+            print(f"  HTTP pool: {pool_stats['requests']} request(s) over {pool_stats['connections_opened']} "
+                  f"connection(s){' (HTTP/2)' if pool_stats['http2'] else ''}")
+        if self.result_cache is not None:
+            cache_hits = sum(1 for r in ai_ratings.values() if r.get("cache_hit"))
+            print(f"  Result cache: {cache_hits} candidate(s) reused, "
+                  f"{len(ai_ratings) - cache_hits} evaluated by the API")
+        if self.dead_letter:
+            print(f"  Failed (dead letter): {', '.join(self._in_candidate_order(self.dead_letter, candidate_ids_in_order))}")
         
         # Print summary
         self.print_summary(ai_ratings)
     
+    def _attempt_candidate(self, candidate_file: Path, prompt: str, exemplar_images: List[str]):
+        """Run one evaluation attempt; returns (structured_result, error, latency_seconds)."""
+        started = time.perf_counter()
+        try:
+            with span("candidate", candidate=candidate_file.stem.split('_')[1]):
+                result = self.evaluate_candidate(candidate_file, prompt, exemplar_images)
+        except Exception as e:
+            return None, e, time.perf_counter() - started
+        return result, None, time.perf_counter() - started
+    
+    def evaluate_candidate(self, candidate_file: Path, prompt: str, exemplar_images: List[str]) -> Dict:
+        """Evaluate a single candidate and return its structured result.
+        
+        Runs on a worker thread; any exception propagates to the caller's future.
+        """
+        if self.sampling is not None and self.sampling.max_samples > 1:
+            return self._sample_candidate(candidate_file, prompt, exemplar_images)
+        return self._evaluate_once(candidate_file, prompt, exemplar_images)
+    
+    def _sample_candidate(self, candidate_file: Path, prompt: str, exemplar_images: List[str]) -> Dict:
+        """Draw evaluations in waves until the sampling policy is satisfied, then aggregate them."""
+        candidate_id = candidate_file.stem.split('_')[1]
+        samples: List[Dict] = []
+        errors: List[str] = []
+        stop_reason = None
+        
+        with ThreadPoolExecutor(max_workers=self.sampling.wave, thread_name_prefix="sample") as executor:
+            while True:
+                wave = self.sampling.next_wave(len(samples) + len(errors))
+                if wave == 0:
+                    stop_reason = "max_samples"
+                    break
+                first = len(samples) + len(errors)
+                futures = [executor.submit(self._evaluate_once, candidate_file, prompt, exemplar_images, i)
+                           for i in range(first, first + wave)]
+                for future in futures:
+                    try:
+                        samples.append(future.result())
+                    except Exception as e:
+                        errors.append(f"{type(e).__name__}: {e}")
+                if errors:
+                    if not samples:
+                        # Nothing to aggregate: let the run's retry queue handle it
+                        raise futures[0].exception() or RuntimeError(errors[0])
+                    stop_reason = "sample_error"
+                    break
+                stop, stop_reason = self.sampling.converged(samples)
+                if stop:
+                    break
+        
+        result = self.sampling.aggregate(samples, stop_reason)
+        if errors:
+            result["sampling"]["errors"] = errors
+        print(f"  Candidate {candidate_id}: {len(samples)} sample(s), {stop_reason} "
+              f"(overall {result['overall_weighted_score']:.2f} ± {result['sampling']['overall']['ci95_half_width'] or 0:.2f})")
+        return result
+    
+    def _evaluate_once(self, candidate_file: Path, prompt: str, exemplar_images: List[str], sample: int = 0) -> Dict:
+        """One model evaluation (or its cached output); `sample` > 0 numbers extra self-consistency samples."""
+        candidate_id = candidate_file.stem.split('_')[1]
+        label = f"candidate {candidate_id}" + (f" (sample {sample + 1})" if sample else "")
+        
+        # Unchanged inputs: reuse the stored model output instead of calling the API
+        with span("result_cache_lookup", candidate=candidate_id, sample=sample):
+            structured_result = self._cached_result(candidate_file, prompt, sample)
+        if structured_result is not None:
+            print(f"\n♻️  {label[0].upper() + label[1:]}: reusing cached result from {structured_result['cache_hit']['cached_at']}")
+            return structured_result
+        
+        print(f"\nEvaluating {label}...")
+        
+        # Call the model
+        with span("evaluate_portfolio", candidate=candidate_id, sample=sample):
+            result = self.provider.evaluate_portfolio(
+                str(candidate_file),
+                prompt,
+                exemplar_images
+            )
+        
+        # Process and structure the result
+        usage = result.pop("_usage", None)
+        stream_stats = result.pop("_stream", None)
+        image_tokens = result.pop("_image_tokens", None)
+        hedge = result.pop("_hedge", None)
+        call_metrics = result.pop("_call_metrics", None)
+        with span("structure_result", candidate=candidate_id):
+            self._remember_result(candidate_file, prompt, result, usage, sample)
+            structured_result = self.structure_result(result, candidate_id, candidate_file.name)
+        if usage:
+            structured_result["usage"] = usage
+        if stream_stats:
+            structured_result["stream"] = stream_stats
+        if image_tokens:
+            structured_result["image_tokens"] = image_tokens
+        if hedge:
+            structured_result["hedge"] = hedge
+        if call_metrics:
+            call_metrics["cost_usd"] = self.price_table.cost(call_metrics["model"], usage)
+            structured_result["call_metrics"] = call_metrics
+        if self.provider.image_tiler is not None:
+            structured_result["candidate_tiles"] = len(self.provider.candidate_images(str(candidate_file)))
+        
+        return structured_result
+    
+    def _result_cache_key(self, candidate_file: Path, prompt: str, sample: int = 0) -> str:
+        """Fingerprint of everything sent to the model for this candidate."""
+        exemplar_hashes = [self.exemplar_hashes[path] for path in self.exemplar_images_used]
+        request_params = self.provider.request_params()
+        if sample:
+            # Each self-consistency sample is its own entry (sample 0 is the plain evaluation)
+            request_params = {**request_params, "sample": sample}
+        return result_fingerprint(request_params, prompt, exemplar_hashes, file_sha256(str(candidate_file)))
+    
+    def _cached_result(self, candidate_file: Path, prompt: str, sample: int = 0) -> Optional[Dict]:
+        """Structured result rebuilt from the result cache, or None on a miss."""
+        if self.result_cache is None:
+            return None
+        cache_key = self._result_cache_key(candidate_file, prompt, sample)
+        entry = self.result_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        candidate_id = candidate_file.stem.split('_')[1]
+        structured_result = self.structure_result(entry["raw_result"], candidate_id, candidate_file.name)
+        # No API call was made, so no usage is attributed to this run
+        structured_result["cache_hit"] = {"fingerprint": cache_key, "cached_at": entry["cached_at"]}
+        return structured_result
+    
+    def _remember_result(self, candidate_file: Path, prompt: str, raw_result: Dict, usage: Optional[Dict],
+                         sample: int = 0):
+        """Store a raw model output in the result cache."""
+        if self.result_cache is None:
+            return
+        self.result_cache.put(self._result_cache_key(candidate_file, prompt, sample), raw_result, usage,
+                              model=getattr(self.provider, 'model', None))
+    
+    @staticmethod
+    def _in_candidate_order(ratings: Dict, candidate_ids: List[str]) -> Dict:
+        """Return ratings re-keyed in the original candidate order."""
+        return {cid: ratings[cid] for cid in candidate_ids if cid in ratings}
+    
     def structure_result(self, raw_result: Dict, candidate_id: str, filename: str) -> Dict:
         """Structure the raw model output into our desired format."""
         
@@ -698,38 +1836,189 @@ class PortfolioEvaluator:
     def save_with_metadata(self, ratings: Dict, filepath: Path, final: bool = False):
         """Save ratings with metadata about the evaluation run."""
         
-        # Calculate duration if this is the final save
-        duration = None
-        if final and self.start_time:
-            self.end_time = datetime.now()
-            duration = (self.end_time - self.start_time).total_seconds()
-        
-        # Get model info
-        model_info = {
+        with span("save_with_metadata", final=final, candidates=len(ratings)):
+            # Calculate duration if this is the final save (active time across all sessions)
+            duration = None
+            if final and self.start_time:
+                self.end_time = datetime.now()
+                duration = self._elapsed_seconds()
+            
+            # Get model info
+            model_info = self._model_info()
+            
+            image_cache = getattr(self.provider, 'image_cache', None)
+            rate_limiter = getattr(self.provider, 'rate_limiter', None)
+            image_tiler = self.provider.image_tiler
+            http_pool = self.provider.http_pool
+            hedge_summary = getattr(self.provider, 'hedge_summary', None)
+            
+            # Build metadata
+            metadata = {
+                "evaluation_metadata": {
+                    "timestamp": self.start_time.isoformat() if self.start_time else datetime.now().isoformat(),
+                    "end_time": self.end_time.isoformat() if self.end_time else None,
+                    "duration_seconds": duration,
+                    "elapsed_seconds": round(self._elapsed_seconds(), 3),
+                    "model_used": model_info,
+                    "exemplar_images": self.exemplar_images_used,
+                    "exemplar_hashes": self.exemplar_hashes,
+                    "candidates_planned": self.candidates_planned,
+                    "total_candidates_evaluated": len(ratings),
+                    "failed_candidates": len(self.dead_letter),
+                    "prompt_length_chars": len(self.full_prompt) if self.full_prompt else 0,
+                    "prompt_fingerprint": self.prompt_fingerprint,
+                    "evaluation_complete": final,
+                    "no_exemplars_mode": self.no_exemplars,
+                    "compact_prompt_mode": self.compact_prompt,
+                    "concurrency": self.concurrency,
+                    "throughput_candidates_per_minute": round(len(ratings) / duration * 60, 2) if duration else None,
+                    "image_cache": image_cache.summary() if image_cache is not None else None,
+                    "prompt_cache": self._summarize_prompt_cache(ratings),
+                    "usage_and_cost": self._summarize_usage(ratings),
+                    "streaming": self._summarize_streaming(ratings),
+                    "image_policy": self._summarize_image_tokens(ratings),
+                    "image_tiling": image_tiler.summary() if image_tiler is not None else None,
+                    "result_cache": self.result_cache.summary() if self.result_cache is not None else None,
+                    "rate_limiter": rate_limiter.summary() if rate_limiter is not None else None,
+                    "http_pool": http_pool.summary() if http_pool is not None else None,
+                    "hedging": hedge_summary() if hedge_summary is not None else None,
+                    "sampling": self._summarize_sampling(ratings),
+                    "result_cache_hits": sum(1 for r in ratings.values() if r.get("cache_hit")),
+                    "near_duplicates": {
+                        "threshold": self.dedupe_threshold,
+                        "collapsed": len(self.duplicates),
+                        "candidates": self.duplicates
+                    } if self.dedupe_threshold is not None and PHASH_AVAILABLE else None,
+                    **self.run_metadata
+                },
+                "full_prompt_used": self.full_prompt,
+                "candidate_ratings": ratings,
+                # Candidates that exhausted their attempts (or failed permanently), with per-attempt errors
+                "dead_letter": self.dead_letter
+            }
+            
+            # Save with metadata (temp file + rename, so a crash never leaves a truncated file)
+            atomic_write_json(filepath, metadata)
+    
+    def _model_info(self) -> Dict[str, str]:
+        """Provider and model identifiers for run metadata."""
+        return {
             "provider": self.provider.__class__.__name__,
             "model": getattr(self.provider, 'model', 'unknown')
         }
-        
-        # Build metadata
-        metadata = {
-            "evaluation_metadata": {
-                "timestamp": self.start_time.isoformat() if self.start_time else datetime.now().isoformat(),
-                "end_time": self.end_time.isoformat() if self.end_time else None,
-                "duration_seconds": duration,
-                "model_used": model_info,
-                "exemplar_images": self.exemplar_images_used,
-                "total_candidates_evaluated": len(ratings),
-                "prompt_length_chars": len(self.full_prompt) if self.full_prompt else 0,
-                "evaluation_complete": final,
-                "no_exemplars_mode": self.no_exemplars
+    
+    def _summarize_prompt_cache(self, ratings: Dict) -> Dict[str, Any]:
+        """Aggregate cached vs uncached input tokens across all candidate calls."""
+        usages = [r["usage"] for r in ratings.values() if r.get("usage")]
+        input_tokens = sum(u.get("input_tokens", 0) for u in usages)
+        cached_tokens = sum(u.get("cached_input_tokens", 0) for u in usages)
+        return {
+            "enabled": getattr(self.provider, 'prompt_cache', False),
+            "calls_with_usage": len(usages),
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached_tokens,
+            "uncached_input_tokens": sum(u.get("uncached_input_tokens", 0) for u in usages),
+            "cache_write_input_tokens": sum(u.get("cache_write_input_tokens", 0) for u in usages),
+            "cached_ratio": round(cached_tokens / input_tokens, 3) if input_tokens else None
+        }
+    
+    @staticmethod
+    def _calls(ratings: Dict) -> List[Dict[str, Any]]:
+        """One {usage, call_metrics} entry per API call (sampled candidates contribute each sample)."""
+        calls = []
+        for rating in ratings.values():
+            per_sample = (rating.get("sampling") or {}).get("per_sample")
+            for entry in (per_sample if per_sample else [rating]):
+                if entry.get("call_metrics"):
+                    calls.append({"usage": entry.get("usage") or {}, "call_metrics": entry["call_metrics"]})
+        return calls
+    
+    def _summarize_usage(self, ratings: Dict) -> Dict[str, Any]:
+        """Token, size, latency and cost totals with p50/p95/p99 rollups across API calls."""
+        calls = self._calls(ratings)
+        usages = [c["usage"] for c in calls]
+        metrics = [c["call_metrics"] for c in calls]
+        costs = [m["cost_usd"] for m in metrics if m.get("cost_usd") is not None]
+        by_model: Dict[str, Dict[str, Any]] = {}
+        for m in metrics:
+            model = by_model.setdefault(m["model"], {"calls": 0, "cost_usd": 0.0})
+            model["calls"] += 1
+            model["cost_usd"] = round(model["cost_usd"] + (m.get("cost_usd") or 0.0), 6)
+        candidates = sum(1 for r in ratings.values() if r.get("call_metrics"))
+        return {
+            "price_table": self.price_table.source,
+            "calls": len(calls),
+            "tokens": {
+                name: sum(u.get(f"{name}_tokens", 0) for u in usages)
+                for name in ("input", "cached_input", "uncached_input", "cache_write_input", "output", "reasoning")
             },
-            "full_prompt_used": self.full_prompt,
-            "candidate_ratings": ratings
+            "images": sum(m.get("image_count", 0) for m in metrics),
+            "request_bytes": sum(m.get("request_bytes", 0) for m in metrics),
+            "retries": sum(m.get("retries", 0) for m in metrics),
+            "cost_usd": round(sum(costs), 6) if costs else None,
+            "unpriced_calls": len(metrics) - len(costs),
+            "cost_per_candidate_usd": round(sum(costs) / candidates, 6) if costs and candidates else None,
+            "by_model": by_model,
+            "percentiles": {
+                "latency_seconds": percentile_rollup([m.get("latency_seconds") for m in metrics]),
+                "input_tokens": percentile_rollup([u.get("input_tokens") for u in usages], 1),
+                "output_tokens": percentile_rollup([u.get("output_tokens") for u in usages], 1),
+                "reasoning_tokens": percentile_rollup([u.get("reasoning_tokens") for u in usages], 1),
+                "request_bytes": percentile_rollup([m.get("request_bytes") for m in metrics], 0),
+                "cost_usd": percentile_rollup(costs, 6)
+            }
+        }
+    
+    def _summarize_image_tokens(self, ratings: Dict) -> Optional[Dict[str, Any]]:
+        """Image policy totals plus estimated vs actual image tokens across calls."""
+        image_policy = getattr(self.provider, 'image_policy', None)
+        if image_policy is None:
+            return None
+        reports = [r["image_tokens"] for r in ratings.values() if r.get("image_tokens")]
+        with_actual = [r for r in reports if "actual_image_tokens" in r]
+        estimated = sum(r["estimated_image_tokens"] for r in with_actual)
+        actual = sum(r["actual_image_tokens"] for r in with_actual)
+        return {
+            **image_policy.summary(),
+            "calls": len(reports),
+            "estimated_image_tokens": sum(r["estimated_image_tokens"] for r in reports),
+            "actual_image_tokens": actual if with_actual else None,
+            "actual_vs_estimated": round(actual / estimated, 3) if estimated else None
+        }
+    
+    def _summarize_sampling(self, ratings: Dict) -> Optional[Dict[str, Any]]:
+        """Samples drawn per candidate and why sampling stopped."""
+        if self.sampling is None or self.sampling.max_samples <= 1:
+            return None
+        sampled = [r["sampling"] for r in ratings.values() if r.get("sampling")]
+        counts = [s["samples"] for s in sampled]
+        return {
+            **self.sampling.settings(),
+            "candidates": len(sampled),
+            "total_samples": sum(counts),
+            "mean_samples": round(statistics.mean(counts), 2) if counts else None,
+            "stop_reasons": {reason: sum(1 for s in sampled if s["stop_reason"] == reason)
+                             for reason in sorted({s["stop_reason"] for s in sampled})}
+        }
+    
+    def _summarize_streaming(self, ratings: Dict) -> Optional[Dict[str, Any]]:
+        """Time-to-first-token and generation speed across streamed calls."""
+        if not getattr(self.provider, 'stream', False):
+            return None
+        stats = [r["stream"] for r in ratings.values() if r.get("stream")]
+        ttfts = [s["ttft_seconds"] for s in stats if s.get("ttft_seconds") is not None]
+        speeds = [s["tokens_per_second"] for s in stats if s.get("tokens_per_second")]
+        # Aborted streams are failures, recorded with their attempts
+        aborted = sum(1 for attempts in [*[r.get("failed_attempts", []) for r in ratings.values()],
+                                         *[d["attempts"] for d in self.dead_letter.values()]]
+                      for a in attempts if a["error_type"] == "StreamValidationError")
+        return {
+            "streamed_calls": len(stats),
+            "aborted_streams": aborted,
+            "ttft_seconds_median": round(statistics.median(ttfts), 3) if ttfts else None,
+            "ttft_seconds_mean": round(statistics.mean(ttfts), 3) if ttfts else None,
+            "tokens_per_second_mean": round(statistics.mean(speeds), 1) if speeds else None
         }
-        
-        # Save with metadata
-        with open(filepath, 'w') as f:
-            json.dump(metadata, f, indent=2)
     
     def print_summary(self, ai_ratings: Dict):
         """Print a summary of the evaluation results."""
@@ -764,16 +2053,109 @@ class PortfolioEvaluator:
                 print(f"  Red flags: {', '.join(rating['red_flags'])}")
 
 
+# Friendly --model names for Claude -> actual model IDs
+CLAUDE_MODEL_IDS = {
+    "claude-sonnet-4": "claude-sonnet-4-20250514",      # Actual Claude Sonnet 4
+    "claude-opus-4.1": "claude-opus-4-1-20250805"       # Actual Claude Opus 4.1
+}
+
+
 def main():
     """Main execution function."""
     
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Evaluate portfolio candidates using AI vision models')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode with verbose output')
+    parser.add_argument('--trace', metavar='TRACE_FILE',
+                        help='Record per-stage timings (image encoding, request, network, parsing, saving) and '
+                             'write a Chrome/Perfetto trace-event file')
     parser.add_argument('--model', choices=['gpt-4o', 'gpt-5', 'o1', 'claude-sonnet-4', 'claude-opus-4.1'], 
                         help='Override model selection (gpt-4o, gpt-5, o1, claude-sonnet-4, or claude-opus-4.1)')
     parser.add_argument('--no-exemplars', action='store_true', 
                         help='Skip exemplar images - evaluate using rubric only (for calibration)')
+    parser.add_argument('--compact-prompt', action='store_true',
+                        help='Send the token-minimized prompt rendering (see generate_prompt.py --size-report)')
+    parser.add_argument('--concurrency', type=int, default=1, metavar='N',
+                        help='Number of candidates to evaluate in parallel (default: 1, sequential)')
+    parser.add_argument('--no-image-cache', action='store_true',
+                        help='Re-encode every image on every call instead of using the image payload cache')
+    parser.add_argument('--prompt-cache', action='store_true',
+                        help='Cache the shared prompt + exemplar prefix provider-side (Anthropic cache_control, '
+                             'stable OpenAI prefix)')
+    parser.add_argument('--image-token-budget', type=int, metavar='TOKENS',
+                        help='Max vision tokens per image; larger images are downscaled (OpenAI falls back to '
+                             'detail=low below one tile). Default: only the provider\'s own downscaling')
+    parser.add_argument('--tile-tall-images', action='store_true',
+                        help='Send tall full-page candidate screenshots as ordered, overlapping viewport crops '
+                             'instead of one downscaled image')
+    parser.add_argument('--max-tiles', type=int, default=DEFAULT_MAX_TILES, metavar='N',
+                        help=f'With --tile-tall-images: most crops per candidate; longer pages get taller crops '
+                             f'(default: {DEFAULT_MAX_TILES})')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream responses: record time-to-first-token and tokens/sec, and abort '
+                             'generations that cannot produce the expected JSON')
+    parser.add_argument('--batch', action='store_true',
+                        help='Submit all candidates through the provider Batch API (about half the cost, '
+                             'results within 24h)')
+    parser.add_argument('--batch-resume', metavar='STATE_FILE',
+                        help='Resume polling/collecting a batch run from its .cache/batches/*/state.json')
+    parser.add_argument('--batch-no-wait', action='store_true',
+                        help='With --batch: submit and exit; collect later with --batch-resume')
+    parser.add_argument('--batch-poll-interval', type=float, default=60, metavar='SECONDS',
+                        help='Seconds between batch status checks (default: 60)')
+    parser.add_argument('--no-result-cache', action='store_true',
+                        help='Always call the API; do not read or write the cross-run result cache')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Ignore cached results and sample fresh outputs (new outputs still refresh the cache)')
+    parser.add_argument('--rpm', type=float, metavar='N',
+                        help='Requests-per-minute budget shared by all workers (default: follow provider headers)')
+    parser.add_argument('--tpm', type=float, metavar='N',
+                        help='Tokens-per-minute budget shared by all workers (default: follow provider headers)')
+    parser.add_argument('--http-pool-size', type=int, metavar='N',
+                        help=f'Pooled connections shared by all workers (default: the larger of '
+                             f'{DEFAULT_POOL_SIZE} and --concurrency)')
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, metavar='SECONDS',
+                        help=f'TCP/TLS connect timeout (default: {DEFAULT_CONNECT_TIMEOUT:g})')
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, metavar='SECONDS',
+                        help=f'Max wait between response bytes (default: {DEFAULT_READ_TIMEOUT:g})')
+    parser.add_argument('--no-http2', action='store_true',
+                        help='Use HTTP/1.1 keep-alive connections even when the h2 package is installed')
+    parser.add_argument('--base-url', metavar='URL',
+                        help='Send API calls to this server root instead of api.openai.com / api.anthropic.com '
+                             '(e.g. http://127.0.0.1:8080 for stand_in_server.py, which also serves the batch APIs)')
+    parser.add_argument('--hedge-model', choices=['gpt-4o', 'gpt-5', 'o1', 'claude-sonnet-4', 'claude-opus-4.1'],
+                        help='When a call runs longer than usual, send the same evaluation to this model too '
+                             'and keep the first valid answer')
+    parser.add_argument('--hedge-percentile', type=float, default=90, metavar='P',
+                        help='Hedge once a call exceeds this percentile of recent primary latencies (default: 90)')
+    parser.add_argument('--hedge-after', type=float, default=30, metavar='SECONDS',
+                        help='Hedge delay until enough latencies have been observed (default: 30)')
+    parser.add_argument('--samples', type=int, default=1, metavar='K',
+                        help='Adaptive self-consistency: up to K evaluations per candidate, stopping early once '
+                             'they agree (default: 1, a single evaluation)')
+    parser.add_argument('--min-samples', type=int, default=2, metavar='N',
+                        help='With --samples: evaluations drawn before checking agreement (default and minimum: 2)')
+    parser.add_argument('--sample-wave', type=int, default=1, metavar='N',
+                        help='With --samples: evaluations requested in parallel per round (default: 1)')
+    parser.add_argument('--max-spread', type=float, default=1.0, metavar='POINTS',
+                        help='With --samples: max highest-minus-lowest score per dimension, and overall when '
+                             'comparing two samples (default: 1.0)')
+    parser.add_argument('--ci-width', type=float, default=0.25, metavar='POINTS',
+                        help='With --samples: max 95%% CI half-width of overall_weighted_score, from three samples on '
+                             '(default: 0.25)')
+    parser.add_argument('--price-table', metavar='JSON_FILE',
+                        help='Per-model token prices (USD per 1M tokens) overriding the built-in table, '
+                             'used for the cost figures in the run metadata')
+    parser.add_argument('--max-attempts', type=int, default=3, metavar='N',
+                        help='Attempts per candidate before a transient or parse failure is dead-lettered (default: 3)')
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help='Evaluate every candidate image, even near-duplicates of another candidate')
+    parser.add_argument('--dedupe-threshold', type=int, default=DEDUPE_THRESHOLD, metavar='BITS',
+                        help=f'Max perceptual-hash distance (of 256 bits) for two candidates to count as '
+                             f'the same portfolio (default: {DEDUPE_THRESHOLD})')
+    parser.add_argument('--resume', metavar='RUN_FILE',
+                        help='Continue an interrupted run (evaluation_*.json or its .journal.ndjson), '
+                             'evaluating only missing or failed candidates')
     
     args = parser.parse_args()
     
@@ -781,11 +2163,34 @@ def main():
     debug = args.debug or os.getenv('DEBUG', '').lower() in ('true', '1', 'yes')
     
     # Load environment variables
+    try:
+        from dotenv import load_dotenv
+    except ImportError as e:
+        print(f"Missing required package: {e}")
+        print("Please install: pip install python-dotenv")
+        sys.exit(1)
     load_dotenv()
     
     # Get base directory
     base_dir = Path(__file__).parent.parent
     
+    # Encoded image payloads are cached in memory for the run and on disk across runs
+    image_cache = None if args.no_image_cache else ImagePayloadCache(base_dir / ".cache" / "image-payloads")
+    
+    # One keep-alive connection pool shared by every provider client and worker
+    configure_http_pool(pool_size=args.http_pool_size or max(DEFAULT_POOL_SIZE, args.concurrency),
+                        connect_timeout=args.connect_timeout, read_timeout=args.read_timeout,
+                        http2=not args.no_http2)
+    
+    # Point every provider at another API root (e.g. stand_in_server.py); it needs no real keys
+    openai_base_url = claude_base_url = None
+    if args.base_url:
+        claude_base_url = args.base_url.rstrip("/")
+        openai_base_url = f"{claude_base_url}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "stand-in")
+        os.environ.setdefault("ANTHROPIC_API_KEY", "stand-in")
+        print(f"🧪 Using API base URL {claude_base_url}")
+    
     # Get API configuration
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
@@ -803,17 +2208,14 @@ def main():
             sys.exit(1)
         
         # Map friendly names to actual model IDs
-        claude_model_map = {
-            "claude-sonnet-4": "claude-sonnet-4-20250514",      # Actual Claude Sonnet 4
-            "claude-opus-4.1": "claude-opus-4-1-20250805"       # Actual Claude Opus 4.1
-        }
-        actual_model = claude_model_map.get(args.model, args.model)
+        actual_model = CLAUDE_MODEL_IDS.get(args.model, args.model)
         
         print(f"🔄 Command line override: using {args.model} (API: {actual_model})")
         if debug:
             print(f"🔧 Debug mode enabled")
             print(f"🤖 Using Claude model: {actual_model}")
-        provider = ClaudeProvider(claude_key, model=actual_model, debug=debug)
+        provider = ClaudeProvider(claude_key, model=actual_model, debug=debug, image_cache=image_cache,
+                                  prompt_cache=args.prompt_cache, stream=args.stream, base_url=claude_base_url)
         
     else:
         # OpenAI models (default behavior)
@@ -830,7 +2232,9 @@ def main():
             if debug:
                 print(f"🔧 Debug mode enabled")
                 print(f"🤖 Using OpenAI model: {model_name}")
-            provider = OpenAIProvider(api_key, model=model_name, debug=debug)
+            provider = OpenAIProvider(api_key, model=model_name, debug=debug, image_cache=image_cache,
+                                      prompt_cache=args.prompt_cache, stream=args.stream,
+                                      base_url=openai_base_url)
         elif provider_choice == "claude":
             # Legacy: Claude selected via environment variable
             claude_key = os.getenv("ANTHROPIC_API_KEY")
@@ -839,16 +2243,100 @@ def main():
                 sys.exit(1)
             default_claude_model = "claude-sonnet-4-20250514"  # Default to Sonnet 4
             print(f"🔄 Environment variable: using claude provider ({default_claude_model})")
-            provider = ClaudeProvider(claude_key, model=default_claude_model, debug=debug)
+            provider = ClaudeProvider(claude_key, model=default_claude_model, debug=debug,
+                                      image_cache=image_cache, prompt_cache=args.prompt_cache,
+                                      stream=args.stream, base_url=claude_base_url)
         else:
             print(f"Unknown provider: {provider_choice}")
             sys.exit(1)
     
+    # Race calls slower than the primary's usual latency against a second model
+    if args.hedge_model:
+        if args.batch or args.batch_resume:
+            print("Error: --hedge-model applies to interactive runs, not --batch")
+            sys.exit(1)
+        hedge_options = dict(debug=debug, image_cache=image_cache, prompt_cache=args.prompt_cache,
+                             stream=args.stream)
+        if args.hedge_model.startswith("claude-"):
+            claude_key = os.getenv("ANTHROPIC_API_KEY")
+            if not claude_key:
+                print("Error: ANTHROPIC_API_KEY not found for the --hedge-model provider")
+                sys.exit(1)
+            secondary = ClaudeProvider(claude_key, model=CLAUDE_MODEL_IDS.get(args.hedge_model, args.hedge_model),
+                                       base_url=claude_base_url, **hedge_options)
+        else:
+            secondary = OpenAIProvider(api_key, model=args.hedge_model, base_url=openai_base_url, **hedge_options)
+        provider = HedgedProvider(provider, secondary, percentile=args.hedge_percentile,
+                                  initial_delay=args.hedge_after)
+        print(f"🏁 Hedging calls slower than p{args.hedge_percentile:g} of recent latency with {args.hedge_model}")
+    backends = [provider.primary, provider.secondary] if isinstance(provider, HedgedProvider) else [provider]
+    
     # Create evaluator
-    evaluator = PortfolioEvaluator(provider, base_dir, no_exemplars=args.no_exemplars)
+    # Per-image vision token budget (the policy downsizes images that exceed it)
+    if args.image_token_budget:
+        for backend in backends:
+            backend.image_policy.token_budget = args.image_token_budget
+    
+    # Tall candidates become viewport tiles, generated once per image hash
+    if args.tile_tall_images:
+        provider.image_tiler = ImageTiler(base_dir / ".cache" / "tiles", max_tiles=args.max_tiles)
+    
+    # Local rate budget (server rate-limit headers can only lower it)
+    if args.rpm or args.tpm:
+        for backend in backends:
+            backend.rate_limiter.configure(rpm=args.rpm, tpm=args.tpm)
+    
+    sampling = None
+    if args.samples > 1:
+        if args.batch or args.batch_resume:
+            print("Error: --samples applies to interactive runs, not --batch")
+            sys.exit(1)
+        sampling = SamplingPolicy(args.samples, min_samples=args.min_samples, wave=args.sample_wave,
+                                  max_spread=args.max_spread, ci_half_width=args.ci_width)
+    
+    try:
+        price_table = PriceTable(Path(args.price_table) if args.price_table else None)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: cannot read --price-table {args.price_table}: {e}")
+        sys.exit(1)
+    
+    result_cache = None
+    if not args.no_result_cache:
+        result_cache = ResultCache(base_dir / ".cache" / "results", read=not args.fresh)
+    evaluator = PortfolioEvaluator(provider, base_dir, no_exemplars=args.no_exemplars,
+                                   concurrency=args.concurrency, result_cache=result_cache,
+                                   max_attempts=args.max_attempts,
+                                   dedupe_threshold=None if args.no_dedupe else args.dedupe_threshold,
+                                   sampling=sampling, price_table=price_table,
+                                   compact_prompt=args.compact_prompt)
+    
+    if args.trace:
+        start_tracing()
     
     # Run evaluation
-    evaluator.evaluate_candidates()
+    try:
+        if args.batch or args.batch_resume:
+            runner = BatchRunner(evaluator, poll_interval=args.batch_poll_interval, wait=not args.batch_no_wait)
+            if args.batch_resume:
+                runner.resume(Path(args.batch_resume))
+            else:
+                runner.start()
+        elif args.resume:
+            # Only loading and checking the run is a "cannot resume"; errors while it runs propagate
+            try:
+                resume_state = evaluator.load_resume_state(Path(args.resume))
+            except (FileNotFoundError, ValueError) as e:
+                print(f"Error: cannot resume {args.resume}: {e}")
+                sys.exit(1)
+            evaluator.resume_run(Path(args.resume), resume_state)
+        else:
+            evaluator.evaluate_candidates()
+    finally:
+        # Also written when the run is interrupted, to see where the time went
+        tracer = stop_tracing()
+        if tracer is not None:
+            spans = tracer.write(Path(args.trace))
+            print(f"🧭 Trace: {spans} spans written to {args.trace} (open in https://ui.perfetto.dev)")
 
 
 if __name__ == "__main__":
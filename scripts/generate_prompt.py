@@ -2,139 +2,75 @@
 """
 Standalone script to generate the evaluation prompt from components.
 This can be run separately to preview the prompt without running evaluations.
+
+The prompt is built by scripts/prompt_builder.py, the same code the evaluator
+uses, so the preview is exactly what the model receives. `--size-report` compares
+the verbose rendering with the compact one (evaluate_portfolios.py --compact-prompt)
+section by section, in characters and estimated tokens.
 """
 
-import json
+import sys
+import argparse
 from pathlib import Path
 
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.prompt_builder import get_prompt_builder, estimate_tokens, OUTPUT_FILE
+
+
+def generate_prompt(no_exemplars: bool = False, compact: bool = False) -> str:
+    """Generate the complete evaluation prompt (generated-prompt.md is only rewritten when it changes)."""
 
-def load_json(filepath: Path) -> dict:
-    """Load JSON file."""
-    with open(filepath, 'r') as f:
-        return json.load(f)
-
-
-def load_text(filepath: Path) -> str:
-    """Load text file."""
-    with open(filepath, 'r') as f:
-        return f.read()
-
-
-def get_dimension_weights(rubric: dict) -> dict:
-    """Extract dimension weights from rubric.json structure."""
-    weights: dict = {}
-    for dimension in rubric.get("rubric", {}).get("dimensions", []):
-        dim_id = dimension.get("id")
-        weight = dimension.get("weight")
-        if dim_id is not None and weight is not None:
-            weights[dim_id] = float(weight)
-    return weights
-
-
-def build_exemplar_calibration_summary(exemplars: dict, weights: dict) -> dict:
-    """Create a compact calibration block: scores and overall only (no long comments)."""
-    penalty_weights = {
-        "template_scent_high": 0.5,
-        "sloppy_images": 0.3,
-        "process_soup": 0.2,
-    }
-
-    summary_items = []
-    for key in sorted(exemplars.keys(), key=lambda k: int(k) if str(k).isdigit() else str(k)):
-        ex = exemplars[key]
-        criteria = ex.get("criteria", {})
-        crit_scores = {
-            "typography": criteria.get("typography", {}).get("score", 0),
-            "layout_composition": criteria.get("layout_composition", {}).get("score", 0),
-            "color": criteria.get("color", {}).get("score", 0),
-        }
-
-        # Compute base/overall if missing
-        base = (
-            weights.get("typography", 0.0) * float(crit_scores["typography"])
-            + weights.get("layout_composition", 0.0) * float(crit_scores["layout_composition"])
-            + weights.get("color", 0.0) * float(crit_scores["color"])
-        )
-        red_flags = ex.get("red_flags", []) or []
-        penalty = sum(penalty_weights.get(flag, 0.0) for flag in red_flags)
-        overall = ex.get("overall_weighted_score", round(base - penalty, 2))
-
-        summary_items.append({
-            "exemplar_id": ex.get("exemplar_id", key),
-            "portfolio_category": ex.get("portfolio_category", "Unknown"),
-            "criteria_scores": crit_scores,
-            "overall_weighted_score": overall,
-        })
-
-    return {
-        "exemplars": summary_items,
-        "guidance": [
-            "Use these numeric anchors to calibrate scoring.",
-            "Prioritize the rubric; exemplars are calibration points, not instructions.",
-            "Use the full 1–5 range when warranted.",
-        ],
-    }
-
-
-def generate_prompt():
-    """Generate the complete evaluation prompt."""
-    
     # Get base directory
     base_dir = Path(__file__).parent.parent
-    
-    # Load components
-    print("Loading core prompt...")
-    core_prompt = load_text(base_dir / "core-prompt.md")
-    
-    print("Loading rubric...")
-    rubric = load_json(base_dir / "rubric.json")
-    
-    print("Loading exemplars...")
-    exemplars = load_json(base_dir / "examplars.json")
-
-    # Build compact exemplar calibration block (scores only)
-    weights = get_dimension_weights(rubric)
-    exemplar_calibration = build_exemplar_calibration_summary(exemplars, weights)
-    
-    # Build the complete prompt
-    prompt_parts = [
-        "# PORTFOLIO EVALUATION FRAMEWORK\n",
-        "## Core Instructions\n",
-        core_prompt,
-        "\n---\n",
-        "## Evaluation Rubric (authoritative)\n",
-        "The rubric below is the primary guide. Follow it strictly. Exemplars are only calibration anchors.\n",
-        "```json",
-        json.dumps(rubric, indent=2),
-        "```",
-        "\n---\n",
-        "## Exemplar Calibration (compact)\n",
-        "Numeric anchors only; no prose. Use these to calibrate your scores.\n",
-        "```json",
-        json.dumps(exemplar_calibration, indent=2),
-        "```",
-        "\n---\n",
-        "## Your Task\n",
-        "Evaluate the provided portfolio image using the rubric above.",
-        "Be consistent with the exemplar numeric anchors.",
-        "Return your evaluation as a JSON object following the specified format."
-    ]
-    
-    full_prompt = "\n".join(prompt_parts)
-    
-    # Save generated prompt
-    output_path = base_dir / "generated-prompt.md"
-    with open(output_path, 'w') as f:
-        f.write(full_prompt)
-    
-    print(f"\n✓ Generated prompt saved to: {output_path}")
-    print(f"  Total length: {len(full_prompt)} characters")
-    
+
+    print("Building prompt from core-prompt.md, rubric.json and examplars.json...")
+    built = get_prompt_builder(base_dir).build(no_exemplars=no_exemplars, compact=compact)
+    full_prompt = built["prompt"]
+
+    output_path = base_dir / OUTPUT_FILE
+    if built["written"]:
+        print(f"\n✓ Generated prompt saved to: {output_path}")
+    else:
+        print(f"\n✓ {output_path} is already up to date")
+    print(f"  Total length: {len(full_prompt)} characters (~{estimate_tokens(full_prompt)} tokens)")
+    print(f"  Fingerprint: {built['fingerprint'][:16]}")
+
     return full_prompt
 
 
+def print_size_report(no_exemplars: bool = False):
+    """Verbose vs compact prompt size, per section and in total."""
+    report = get_prompt_builder(Path(__file__).parent.parent).size_report(no_exemplars=no_exemplars)
+
+    print(f"\n📏 Prompt size, verbose vs compact{' (rubric only)' if no_exemplars else ''}:")
+    print(f"   {'section':<22} {'chars':>15} {'~tokens':>15}")
+    rows = list(report["sections"].items()) + [("total", report)]
+    for name, sizes in rows:
+        verbose, compact = sizes["verbose"], sizes["compact"]
+        print(f"   {name:<22} {verbose['chars']:>6} → {compact['chars']:<6} {verbose['tokens']:>6} → {compact['tokens']:<6}")
+    saved = report["saved"]
+    print(f"\n   Saved {saved['chars']} characters, ~{saved['tokens']} tokens per call ({saved['ratio']:.0%}); "
+          f"~{saved['tokens'] * 1000:,} tokens per 1,000 calls")
+    print("   (token counts are a tokenizer-free estimate; compare them with each other, not with invoices)")
+
+
 if __name__ == "__main__":
-    prompt = generate_prompt()
+    parser = argparse.ArgumentParser(description='Generate the evaluation prompt without running evaluations')
+    parser.add_argument('--no-exemplars', action='store_true',
+                        help='Preview the rubric-only prompt used by evaluate_portfolios.py --no-exemplars')
+    parser.add_argument('--compact', action='store_true',
+                        help='Preview the token-minimized prompt used by evaluate_portfolios.py --compact-prompt')
+    parser.add_argument('--size-report', action='store_true',
+                        help='Compare verbose and compact prompt sizes instead of generating the prompt')
+    args = parser.parse_args()
+
+    if args.size_report:
+        print_size_report(no_exemplars=args.no_exemplars)
+        sys.exit(0)
+
+    prompt = generate_prompt(no_exemplars=args.no_exemplars, compact=args.compact)
     print("\nFirst 500 characters of generated prompt:")
     print("-" * 50)
     print(prompt[:500] + "...")
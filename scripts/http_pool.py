@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+One pooled HTTP client shared by every provider SDK client in the process.
+
+Left to themselves the OpenAI and Anthropic SDKs each build an httpx client with
+their own default limits, so under concurrency a run keeps paying for TCP + TLS
+handshakes. Instead, both SDK clients are constructed on a single `httpx.Client`
+with an explicit pool size, keep-alive, HTTP/2 when the `h2` package is installed,
+and separate connect / read timeouts. The pool is warmed (connections opened)
+before the first candidate, and connection reuse is counted through httpx's
+trace extension so the run metadata shows whether workers shared connections.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from scripts.lazy_imports import module_available
+
+# httpx is imported when the pool is built; h2 (if present) enables its HTTP/2 support
+HTTPX_AVAILABLE = module_available("httpx")
+HTTP2_AVAILABLE = module_available("h2")
+
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 90.0    # seconds an idle connection is kept open
+DEFAULT_CONNECT_TIMEOUT = 10.0
+# Vision calls with several images can take minutes before the first byte
+DEFAULT_READ_TIMEOUT = 300.0
+
+
+class HTTPPool:
+    """A configured httpx.Client plus connection reuse counters."""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+                 http2: Optional[bool] = None):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx not installed (it ships with the openai/anthropic SDKs)")
+        import httpx
+        self.pool_size = max(1, pool_size)
+        self.http2 = HTTP2_AVAILABLE if http2 is None else (http2 and HTTP2_AVAILABLE)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.client = httpx.Client(
+            http2=self.http2,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size,
+                                keepalive_expiry=keepalive_expiry),
+            event_hooks={"request": [self._attach_trace]},
+        )
+
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "connections_opened": 0, "tls_handshakes": 0,
+                      "connect_seconds": 0.0, "http2_requests": 0, "warmed_connections": 0}
+        self._connect_started = threading.local()
+
+    def _attach_trace(self, request):
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event_name: str, info: Dict[str, Any]):
+        """httpcore trace callback: one call per connection / request phase."""
+        if event_name == "connection.connect_tcp.started":
+            self._connect_started.at = time.perf_counter()
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            started = getattr(self._connect_started, "at", None)
+            finished = time.perf_counter()
+            with self._lock:
+                if event_name == "connection.connect_tcp.complete":
+                    self.stats["connections_opened"] += 1
+                else:
+                    self.stats["tls_handshakes"] += 1
+                if started is not None:
+                    self.stats["connect_seconds"] += finished - started
+            self._connect_started.at = finished
+        elif event_name in ("http11.send_request_headers.started", "http2.send_request_headers.started"):
+            with self._lock:
+                self.stats["requests"] += 1
+                if event_name.startswith("http2"):
+                    self.stats["http2_requests"] += 1
+
+    def warm(self, base_url: str, connections: int = 1):
+        """Open connections to an API host ahead of the first real request.
+
+        Any response (even a 404) leaves a kept-alive connection in the pool. Over
+        HTTP/2 one connection multiplexes every request, so only one is opened.
+        """
+        connections = 1 if self.http2 else max(1, min(connections, self.pool_size))
+
+        import httpx
+
+        def ping(_):
+            try:
+                self.client.head(base_url, timeout=self.timeout.connect)
+            except httpx.HTTPError:
+                pass  # the real request will surface (and retry) connection problems
+
+        with self._lock:
+            before = self.stats["connections_opened"]
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(ping, range(connections)))
+        with self._lock:
+            opened = self.stats["connections_opened"] - before
+            self.stats["warmed_connections"] += opened
+        return opened
+
+    def summary(self) -> Dict[str, Any]:
+        """Pool configuration and connection reuse counters (for run metadata)."""
+        with self._lock:
+            stats = dict(self.stats)
+        requests = stats["requests"]
+        return {
+            "pool_size": self.pool_size,
+            "http2": self.http2,
+            "connect_timeout": self.timeout.connect,
+            "read_timeout": self.timeout.read,
+            **stats,
+            "connect_seconds": round(stats["connect_seconds"], 3),
+            "reused_requests": max(0, requests - stats["connections_opened"]),
+            "reuse_ratio": round(1 - stats["connections_opened"] / requests, 3) if requests else None,
+        }
+
+
+_pool: Optional[HTTPPool] = None
+_pool_lock = threading.Lock()
+
+
+def configure_http_pool(**settings) -> HTTPPool:
+    """Create the process-wide pool with explicit settings (call before building providers)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.client.close()
+        _pool = HTTPPool(**settings)
+        return _pool
+
+
+def get_http_pool() -> HTTPPool:
+    """The process-wide pool, created with defaults on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HTTPPool()
+        return _pool
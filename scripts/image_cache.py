@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of encoded image payloads.
+
+Every API call sends the same exemplar images, and each provider transforms them
+the same way every time (read, optionally resize/re-encode, base64). This cache
+stores the final base64 payload keyed by the image's content hash plus the
+provider's transform parameters, so each image is encoded once per run (in memory)
+and reused across runs (on disk). Concurrent misses on the same key are coalesced:
+the first worker encodes, the others wait for its payload instead of decoding the
+image again.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Tuple
+
+
+DEFAULT_MAX_MEMORY_BYTES = 256 * 1024 * 1024   # 256 MB of base64 held in memory per run
+DEFAULT_MAX_DISK_BYTES = 1024 * 1024 * 1024     # 1 GB persisted across runs
+# Disk eviction frees down to this fraction of the budget, so a full cache is not
+# rescanned on every write
+DISK_EVICT_TO = 0.9
+
+
+def file_sha256(image_path: str) -> str:
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImagePayloadCache:
+    """Two-level (memory + disk) LRU cache of base64 image payloads.
+
+    Keys are derived from the SHA-256 of the source file and the transform
+    parameters (e.g. max dimension, JPEG quality, output format), so a changed
+    file or a changed transform never returns a stale payload.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        # Key -> {"done": Event, "payload"} for encodes in progress (single-flight)
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+        # (path, mtime_ns, size) -> sha256, so unchanged files are only hashed once
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+        # Disk entries key -> size, least recently used first; seeded once from the directory
+        # and rescanned only when over budget (other runs may share the directory)
+        self._disk_lock = threading.Lock()
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "coalesced": 0, "misses": 0, "evictions": 0}
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with self._disk_lock:
+                self._scan_disk()
+
+    def file_hash(self, image_path: str) -> str:
+        """Content hash of an image, memoized on (path, mtime, size)."""
+        st = os.stat(image_path)
+        stat_key = (str(image_path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._file_hashes.get(stat_key)
+        if cached:
+            return cached
+
+        digest = file_sha256(image_path)
+        with self._lock:
+            self._file_hashes[stat_key] = digest
+        return digest
+
+    def cache_key(self, image_path: str, transform: Dict[str, Any]) -> str:
+        """Build the cache key for an image under a given transform."""
+        transform_json = json.dumps(transform, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{self.file_hash(image_path)}:{transform_json}".encode("utf-8")).hexdigest()
+
+    def get_or_encode(self, image_path: str, transform: Dict[str, Any],
+                      encoder: Callable[[str], str]) -> Tuple[str, bool]:
+        """Return (base64 payload, cache_hit) for an image, encoding it on a miss.
+
+        `encoder` is called with the image path and must return the base64 payload
+        produced by `transform`. Only one caller per key runs the disk read / encode;
+        concurrent callers wait for its payload.
+        """
+        key = self.cache_key(image_path, transform)
+
+        while True:
+            # 1. Memory, or an encode of the same key already in progress
+            with self._lock:
+                payload = self._memory.get(key)
+                if payload is not None:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return payload, True
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    flight = self._in_flight[key] = {"done": threading.Event(), "payload": None}
+                    break
+
+            flight["done"].wait()
+            if flight["payload"] is not None:
+                with self._lock:
+                    self.stats["coalesced"] += 1
+                return flight["payload"], True
+            # The encoding caller failed: try again (and raise our own error if it fails too)
+
+        try:
+            # 2. Disk
+            payload = self._read_disk(key)
+            if payload is not None:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                self._remember(key, payload)
+                flight["payload"] = payload
+                return payload, True
+
+            # 3. Encode
+            payload = encoder(image_path)
+            with self._lock:
+                self.stats["misses"] += 1
+            self._remember(key, payload)
+            flight["payload"] = payload
+            self._write_disk(key, payload)
+            return payload, False
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight["done"].set()
+
+    def summary(self) -> Dict[str, Any]:
+        """Stats suitable for run metadata."""
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["coalesced"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "memory_bytes": self._memory_bytes,
+                "persistent": self.cache_dir is not None,
+            }
+
+    def _remember(self, key: str, payload: str):
+        """Insert into the in-memory LRU, evicting least recently used entries."""
+        size = len(payload)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = payload
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self.stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.b64"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            payload = path.read_text(encoding="ascii")
+        except (FileNotFoundError, OSError, UnicodeDecodeError):
+            return None
+        # Touch so disk eviction is least-recently-used rather than oldest-written
+        # (the mtime orders the index when a later run seeds it)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._disk_lock:
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+            else:
+                # Written by another run since the last scan
+                self._disk_index[key] = len(payload)
+                self._disk_bytes += len(payload)
+        return payload
+
+    def _write_disk(self, key: str, payload: str):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Atomic write: a concurrent reader never sees a partial payload
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="ascii") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"   ⚠️  Could not persist image cache entry: {e}")
+            return
+        # Payloads are ASCII, so their length is the file size
+        with self._disk_lock:
+            self._disk_bytes += len(payload) - self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(payload)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _scan_disk(self):
+        """Rebuild the disk index from the cache directory, ordered by last use (mtime)."""
+        entries = []
+        for path in self.cache_dir.glob("*/*.b64"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, path.stem, st.st_size))
+        self._disk_index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._disk_bytes = sum(self._disk_index.values())
+
+    def _evict_disk(self):
+        """Delete least recently used payloads until the disk cache is back under budget (holds _disk_lock)."""
+        # Only now pay for a directory scan, to see what other runs wrote or removed
+        self._scan_disk()
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        while self._disk_bytes > self.max_disk_bytes * DISK_EVICT_TO and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            try:
+                self._disk_path(key).unlink()
+            except FileNotFoundError:
+                pass
+            self._disk_bytes -= size
+            with self._lock:
+                self.stats["evictions"] += 1
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Per-provider image preparation based on how each provider bills vision tokens.
+
+- OpenAI (`detail: high`): the image is fit into 2048x2048, then scaled so its shortest
+  side is at most 768px, and billed 170 tokens per 512px tile plus 85. `detail: low`
+  is a flat 85 tokens for a 512px thumbnail.
+- Claude: roughly width * height / 750 tokens; images with a long edge over 1568px (or
+  over ~1.15 megapixels) are downscaled by the API before billing.
+
+Each policy plans a target size (and OpenAI `detail`) per image: never larger than
+what the provider would downscale to anyway (so the upload shrinks with no change in
+what the model sees), and optionally smaller to fit a per-image token budget.
+"""
+
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from scripts.lazy_imports import module_available
+
+# Pillow is imported where images are opened
+PIL_AVAILABLE = module_available("PIL")
+
+
+# Smallest long edge we will shrink an image to when chasing a token budget
+MIN_LONG_EDGE = 256
+
+_sizes: Dict[Tuple[str, int, int], Optional[Tuple[int, int]]] = {}
+_sizes_lock = threading.Lock()
+
+
+def image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """(width, height) read from the image header, memoized on (path, mtime, size)."""
+    if not PIL_AVAILABLE:
+        return None
+    st = os.stat(image_path)
+    key = (str(image_path), st.st_mtime_ns, st.st_size)
+    with _sizes_lock:
+        if key in _sizes:
+            return _sizes[key]
+    from PIL import Image
+    try:
+        with Image.open(image_path) as img:
+            size = img.size
+    except OSError:
+        size = None
+    with _sizes_lock:
+        _sizes[key] = size
+    return size
+
+
+def _scaled(width: int, height: int, scale: float) -> Tuple[int, int]:
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+class ImagePolicy(ABC):
+    """Plans the size (and detail level) each image is sent at."""
+
+    provider = "generic"
+    # Tokens assumed for an image whose size cannot be read (no Pillow)
+    FALLBACK_TOKENS = 1600
+
+    def __init__(self, token_budget: Optional[int] = None, jpeg_quality: int = 85):
+        # Max vision tokens per image (None = only the provider's own downscaling)
+        self.token_budget = token_budget
+        self.jpeg_quality = jpeg_quality
+        self._lock = threading.Lock()
+        self._sent: Dict[str, Dict[str, Any]] = {}
+
+    @abstractmethod
+    def image_tokens(self, width: int, height: int, detail: str = "high") -> int:
+        """Vision tokens the provider bills for an image sent at this size."""
+        pass
+
+    def provider_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Size the provider itself would downscale the image to."""
+        return width, height
+
+    def plan(self, image_path: str) -> Dict[str, Any]:
+        """{original_size, target_size, resize, detail, estimated_tokens} for one image."""
+        size = image_size(image_path)
+        if size is None:
+            return {"original_size": None, "target_size": None, "resize": False,
+                    "detail": self.default_detail(), "estimated_tokens": self.FALLBACK_TOKENS}
+
+        width, height = size
+        target = self.provider_size(width, height)
+        detail = self.default_detail()
+        tokens = self.image_tokens(*target, detail)
+
+        if self.token_budget and tokens > self.token_budget:
+            target, detail, tokens = self._fit_budget(target, detail)
+
+        return {
+            "original_size": [width, height],
+            "target_size": list(target),
+            "resize": tuple(target) != (width, height),
+            "detail": detail,
+            "estimated_tokens": tokens,
+        }
+
+    def default_detail(self) -> Optional[str]:
+        return None
+
+    def _fit_budget(self, size: Tuple[int, int], detail: Optional[str]):
+        """Shrink in 5% steps until the image fits the token budget (or hits MIN_LONG_EDGE)."""
+        width, height = size
+        scale = 1.0
+        while True:
+            scale *= 0.95
+            candidate = _scaled(width, height, scale)
+            tokens = self.image_tokens(*candidate, detail)
+            if tokens <= self.token_budget or max(candidate) * 0.95 < MIN_LONG_EDGE:
+                return candidate, detail, tokens
+
+    def transform_key(self) -> Dict[str, Any]:
+        """Parameters that change the encoded payload (for the image / result caches)."""
+        return {"policy": self.provider, "token_budget": self.token_budget, "quality": self.jpeg_quality}
+
+    def record(self, image_path: str, plan: Dict[str, Any], sent_bytes: int):
+        """Remember what was actually sent for an image (for the run metadata)."""
+        with self._lock:
+            self._sent[str(image_path)] = {
+                "original_bytes": os.path.getsize(image_path),
+                "sent_bytes": sent_bytes,
+                "estimated_tokens": plan["estimated_tokens"],
+                "resized": plan["resize"],
+            }
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals over the distinct images sent this run."""
+        with self._lock:
+            sent = list(self._sent.values())
+        return {
+            "provider": self.provider,
+            "token_budget": self.token_budget,
+            "images": len(sent),
+            "resized": sum(1 for s in sent if s["resized"]),
+            "original_bytes": sum(s["original_bytes"] for s in sent),
+            "sent_bytes": sum(s["sent_bytes"] for s in sent),
+            "estimated_tokens": sum(s["estimated_tokens"] for s in sent),
+        }
+
+
+class OpenAIImagePolicy(ImagePolicy):
+    """512px tile billing; falls back to `detail: low` when one tile exceeds the budget."""
+
+    provider = "openai"
+    TILE_TOKENS = 170
+    BASE_TOKENS = 85
+    LOW_DETAIL_SIZE = 512
+
+    def default_detail(self) -> str:
+        return "high"
+
+    def provider_size(self, width: int, height: int) -> Tuple[int, int]:
+        scale = min(1.0, 2048 / max(width, height))
+        width, height = _scaled(width, height, scale)
+        scale = min(1.0, 768 / min(width, height))
+        return _scaled(width, height, scale)
+
+    def image_tokens(self, width: int, height: int, detail: str = "high") -> int:
+        if detail == "low":
+            return self.BASE_TOKENS
+        width, height = self.provider_size(width, height)
+        return self.BASE_TOKENS + self.TILE_TOKENS * math.ceil(width / 512) * math.ceil(height / 512)
+
+    def _fit_budget(self, size: Tuple[int, int], detail: Optional[str]):
+        if self.token_budget < self.BASE_TOKENS + self.TILE_TOKENS:
+            # Not even one high-detail tile fits: send a low-detail thumbnail
+            scale = min(1.0, self.LOW_DETAIL_SIZE / max(size))
+            return _scaled(*size, scale), "low", self.BASE_TOKENS
+        return super()._fit_budget(size, detail)
+
+
+class ClaudeImagePolicy(ImagePolicy):
+    """Area-based billing (~w*h/750) with the API's 1568px / ~1.15MP downscale."""
+
+    provider = "claude"
+    TOKENS_PER_PIXEL = 1 / 750
+    MAX_LONG_EDGE = 1568
+    MAX_PIXELS = 1_150_000
+
+    def provider_size(self, width: int, height: int) -> Tuple[int, int]:
+        scale = min(1.0, self.MAX_LONG_EDGE / max(width, height),
+                    math.sqrt(self.MAX_PIXELS / (width * height)))
+        return _scaled(width, height, scale)
+
+    def image_tokens(self, width: int, height: int, detail: Optional[str] = None) -> int:
+        width, height = self.provider_size(width, height)
+        return math.ceil(width * height * self.TOKENS_PER_PIXEL)
+
+
+def resize_to_plan(image_path: str, plan: Dict[str, Any], quality: int) -> bytes:
+    """Re-encode an image at the planned size as JPEG."""
+    import io
+    from PIL import Image
+    with Image.open(image_path) as img:
+        if plan["resize"]:
+            img = img.resize(tuple(plan["target_size"]), Image.Resampling.LANCZOS)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality)
+        return buffer.getvalue()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Viewport tiling for tall full-page screenshots.
+
+A 1920x20000 capture sent whole is downscaled by the provider until type is
+unreadable (OpenAI fits it into 2048px, Claude into a 1568px long edge). Instead,
+tall candidate images are split into ordered, slightly overlapping viewport-height
+crops that are sent as a multi-image candidate section. Near-empty crops (blank
+whitespace between sections) are dropped, and when a page would need more than
+`max_tiles` crops the crops get taller instead, so the whole page is always covered.
+
+Tiles are written once per image content hash under `.cache/tiles/` and reused.
+"""
+
+import os
+import json
+import math
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from scripts.image_cache import file_sha256
+from scripts.lazy_imports import module_available
+
+# Pillow is imported where tiles are generated
+PIL_AVAILABLE = module_available("PIL")
+
+
+DEFAULT_VIEWPORT_ASPECT = 0.625    # viewport height / width (1920x1200)
+DEFAULT_OVERLAP = 0.05             # fraction of the viewport height repeated between crops
+DEFAULT_MAX_TILES = 6
+DEFAULT_MIN_ASPECT = 2.5           # only tile images at least this many times taller than wide
+BLANK_STDDEV = 3.0                 # grayscale std-dev below which a crop counts as empty
+TILE_JPEG_QUALITY = 90
+
+
+class ImageTiler:
+    """Splits tall images into cached viewport crops."""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_tiles: int = DEFAULT_MAX_TILES,
+                 viewport_aspect: float = DEFAULT_VIEWPORT_ASPECT, overlap: float = DEFAULT_OVERLAP,
+                 min_aspect: float = DEFAULT_MIN_ASPECT):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_tiles = max(1, max_tiles)
+        self.viewport_aspect = viewport_aspect
+        self.overlap = overlap
+        self.min_aspect = min_aspect
+
+        self._lock = threading.Lock()
+        self._tiles: Dict[str, List[str]] = {}
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"images_tiled": 0, "tiles": 0, "blank_tiles_dropped": 0,
+                      "capped": 0, "cache_hits": 0}
+
+    def params(self) -> Dict[str, Any]:
+        """Tiling parameters (part of the cache keys and the result fingerprint)."""
+        return {
+            "max_tiles": self.max_tiles,
+            "viewport_aspect": self.viewport_aspect,
+            "overlap": self.overlap,
+            "min_aspect": self.min_aspect,
+            "quality": TILE_JPEG_QUALITY,
+        }
+
+    def tiles_for(self, image_path: str) -> List[str]:
+        """Ordered tile paths for an image, or [image_path] when it is not tall enough to tile."""
+        image_path = str(image_path)
+        if not PIL_AVAILABLE:
+            return [image_path]
+
+        while True:
+            # Tiles already known, or being generated for this image by another worker
+            with self._lock:
+                cached = self._tiles.get(image_path)
+                if cached is not None:
+                    return cached
+                flight = self._in_flight.get(image_path)
+                if flight is None:
+                    flight = self._in_flight[image_path] = threading.Event()
+                    break
+
+            # Only one worker writes an image's tiles; other images are tiled in parallel
+            flight.wait()
+            # If that worker failed, try again (and raise our own error if it fails too)
+
+        try:
+            tiles = self._load_or_generate(image_path)
+            with self._lock:
+                self._tiles[image_path] = tiles
+            return tiles
+        finally:
+            with self._lock:
+                del self._in_flight[image_path]
+            flight.set()
+
+    def _cache_key(self, image_path: str) -> str:
+        params = json.dumps(self.params(), sort_keys=True)
+        return hashlib.sha256(f"{file_sha256(image_path)}:{params}".encode("utf-8")).hexdigest()
+
+    def _load_or_generate(self, image_path: str) -> List[str]:
+        from PIL import Image
+        with Image.open(image_path) as img:
+            width, height = img.size
+            if height < width * self.min_aspect:
+                return [image_path]
+
+            tile_dir = self.cache_dir / self._cache_key(image_path)[:32] if self.cache_dir else None
+            manifest_path = tile_dir / "manifest.json" if tile_dir else None
+            if manifest_path and manifest_path.exists():
+                with open(manifest_path, "r") as f:
+                    tiles = [str(tile_dir / name) for name in json.load(f)["tiles"]]
+                if all(os.path.exists(t) for t in tiles):
+                    self._count(cache_hits=1)
+                    return tiles
+
+            if tile_dir is None:
+                return [image_path]
+            tile_dir.mkdir(parents=True, exist_ok=True)
+            return self._generate(img.convert("RGB"), tile_dir, manifest_path)
+
+    def _generate(self, img, tile_dir: Path, manifest_path: Path) -> List[str]:
+        from PIL import ImageStat
+        width, height = img.size
+        viewport = int(width * self.viewport_aspect)
+        step = max(1, int(viewport * (1 - self.overlap)))
+        count = math.ceil(max(height - viewport, 0) / step) + 1
+
+        if count > self.max_tiles:
+            # Taller crops rather than dropping the bottom of the page
+            self._count(capped=1)
+            count = self.max_tiles
+            viewport = math.ceil(height / (count - (count - 1) * self.overlap))
+            step = max(1, int(viewport * (1 - self.overlap)))
+
+        names = []
+        dropped = 0
+        for i in range(count):
+            top = min(i * step, max(height - viewport, 0))
+            crop = img.crop((0, top, width, min(top + viewport, height)))
+            if ImageStat.Stat(crop.convert("L")).stddev[0] < BLANK_STDDEV:
+                dropped += 1
+                continue
+            name = f"tile_{len(names) + 1:02d}.jpg"
+            crop.save(tile_dir / name, format="JPEG", quality=TILE_JPEG_QUALITY)
+            names.append(name)
+
+        if not names:
+            # An entirely blank page still needs one image
+            name = "tile_01.jpg"
+            img.crop((0, 0, width, min(viewport, height))).save(tile_dir / name, format="JPEG",
+                                                                 quality=TILE_JPEG_QUALITY)
+            names.append(name)
+            dropped -= 1
+
+        with open(manifest_path, "w") as f:
+            json.dump({"tiles": names, "source_size": [width, height], "viewport": viewport}, f)
+
+        self._count(images_tiled=1, tiles=len(names), blank_tiles_dropped=dropped)
+        return [str(tile_dir / name) for name in names]
+
+    def _count(self, **increments: int):
+        with self._lock:
+            for stat, n in increments.items():
+                self.stats[stat] += n
+
+    def summary(self) -> Dict[str, Any]:
+        """Stats suitable for run metadata."""
+        with self._lock:
+            return {**self.params(), **self.stats}
+
+
+def tiles_note(tile_count: int) -> str:
+    """Text introducing a tiled candidate in the prompt."""
+    return (f"This candidate portfolio is a tall full-page screenshot, shown as {tile_count} ordered "
+            f"viewport crops from top to bottom (consecutive crops overlap slightly). "
+            f"Evaluate them together as one portfolio.")
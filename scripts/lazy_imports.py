@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Availability checks for optional dependencies without importing them.
+
+The provider SDKs, httpx, Pillow, numpy and tenacity together cost over a second
+of interpreter start-up, while `--help`, prompt previews and single-provider runs
+need few or none of them. Modules therefore set their `*_AVAILABLE` flags with
+`module_available()`, which only asks the import system whether the package can
+be found, and import the package inside the code path that uses it. A repeated
+import there is a dictionary lookup in `sys.modules`.
+
+`check_startup.py` keeps these packages out of the start-up import graph.
+"""
+
+import importlib.util
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def module_available(name: str) -> bool:
+    """True if `name` is importable (found on the path); the module is not executed."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
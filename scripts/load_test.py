@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Load test of the real evaluator against the local stand-in API server.
+
+Unlike benchmark_pipeline.py (which swaps the provider for a mock), this drives
+the real OpenAIProvider / ClaudeProvider - SDK, connection pool, rate limiter,
+retries, streaming and parsing - over HTTP against stand_in_server.py, which
+answers with scriptable latency and failures. Per concurrency level it reports
+end-to-end throughput, call latency percentiles, retries and 429s, connection
+reuse, and what the server saw.
+
+    python3 load_test.py                                          # 50 candidates on 1/8/32 workers
+    python3 load_test.py --provider claude --stream --stream-chunk-delay 0.02
+    python3 load_test.py --rate-429 0.1 --retry-after 1 --rate-5xx 0.05 --rate-truncated 0.02
+    python3 load_test.py --rpm 120 --concurrency 16               # server-side rate limit
+    python3 load_test.py --server-url http://127.0.0.1:8080       # an already running stand-in
+
+Behaviour flags are forwarded to the server it starts (see stand_in_server.py).
+"""
+
+import io
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+import contextlib
+import urllib.request
+from pathlib import Path
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.evaluate_portfolios import PortfolioEvaluator, OpenAIProvider, ClaudeProvider, CLAUDE_MODEL_IDS
+from scripts.benchmark_pipeline import prepare_workspace, PIL_AVAILABLE
+from scripts.stand_in_server import Behavior, add_behavior_arguments
+from scripts.image_cache import ImagePayloadCache
+from scripts.rate_limiter import RateLimiter
+from scripts.http_pool import HTTPPool, DEFAULT_POOL_SIZE
+from scripts.run_journal import atomic_write_json
+
+
+BASE_DIR = Path(__file__).parent.parent
+RESULTS_DIR = BASE_DIR / "reports" / "benchmarks"
+SERVER_SCRIPT = Path(__file__).parent / "stand_in_server.py"
+SERVER_START_TIMEOUT = 30
+
+
+def server_stats(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(f"{url}/stats", timeout=5) as response:
+        return json.load(response)
+
+
+def start_server(args) -> tuple:
+    """Launch stand_in_server.py on a free port with the forwarded behaviour flags; returns (process, url)."""
+    command = [sys.executable, str(SERVER_SCRIPT), "--host", "127.0.0.1", "--port", "0"]
+    if args.behavior:
+        command += ["--behavior", str(args.behavior)]
+    for name in Behavior.FIELDS:
+        value = getattr(args, name, None)
+        if value is not None:
+            command += [f"--{name.replace('_', '-')}", str(value)]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # The server prints its address once it is listening
+    line = process.stdout.readline()
+    match = re.search(r"http://[\d.]+:\d+", line)
+    if not match:
+        process.terminate()
+        raise RuntimeError(f"stand-in server did not start (exit code {process.poll()}): {line.strip()}")
+    url = match.group(0)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while True:
+        try:
+            server_stats(url)
+            return process, url
+        except OSError:
+            if time.monotonic() > deadline:
+                process.terminate()
+                raise RuntimeError(f"stand-in server at {url} is not answering")
+            time.sleep(0.1)
+
+
+def stats_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Requests per API and outcome made between two /stats snapshots."""
+    delta = {}
+    for api, outcomes in after["by_api"].items():
+        previous = before["by_api"].get(api, {})
+        changed = {outcome: count - previous.get(outcome, 0) for outcome, count in outcomes.items()
+                   if count != previous.get(outcome, 0)}
+        if changed:
+            delta[api] = changed
+    return delta
+
+
+def results_path(args) -> Path:
+    """reports/benchmarks/load_<timestamp>_<scenario>.json, never an existing file."""
+    scenario = (f"{args.provider}_{'stream' if args.stream else 'blocking'}_"
+                f"{args.candidates}x{'-'.join(str(c) for c in args.concurrency)}")
+    stem = f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{scenario}"
+    path = RESULTS_DIR / f"{stem}.json"
+    counter = 1
+    while path.exists():
+        counter += 1
+        path = RESULTS_DIR / f"{stem}_{counter}.json"
+    return path
+
+
+def build_provider(args, url: str, concurrency: int):
+    """A real provider on a fresh connection pool and rate limiter, pointed at the stand-in."""
+    http_pool = HTTPPool(pool_size=max(DEFAULT_POOL_SIZE, concurrency))
+    options = dict(stream=args.stream, image_cache=ImagePayloadCache(), http_pool=http_pool)
+    if args.provider == "claude":
+        model = CLAUDE_MODEL_IDS.get(args.model, args.model)
+        return ClaudeProvider("stand-in", model=model, base_url=url,
+                              rate_limiter=RateLimiter(f"anthropic/{model}"), **options)
+    return OpenAIProvider("stand-in", model=args.model, base_url=f"{url}/v1",
+                          rate_limiter=RateLimiter(f"openai/{args.model}"), **options)
+
+
+def run_scenario(work_dir: Path, url: str, candidates: int, concurrency: int, args) -> Dict[str, Any]:
+    """One load-test run of `candidates` candidates on `concurrency` workers."""
+    provider = build_provider(args, url, concurrency)
+    evaluator = PortfolioEvaluator(provider, work_dir, no_exemplars=args.no_exemplars, concurrency=concurrency)
+    candidate_ids = [str(i) for i in range(1, candidates + 1)]
+
+    before = server_stats(url)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        started = time.perf_counter()
+        evaluator.evaluate_candidates(candidate_ids)
+        wall = time.perf_counter() - started
+    after = server_stats(url)
+
+    # The run's own metadata carries the per-call latency percentiles and limiter / pool counters
+    run_file = work_dir / "evaluation-results" / f"evaluation_{evaluator.start_time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(run_file) as f:
+        metadata = json.load(f)["evaluation_metadata"]
+    usage = metadata["usage_and_cost"]
+    rated = candidates - len(evaluator.dead_letter)
+    return {
+        "candidates": candidates,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "candidates_per_minute": round(rated / wall * 60, 1),
+        "rated": rated,
+        "dead_lettered": len(evaluator.dead_letter),
+        "dead_letter_errors": dict(Counter(entry["error_type"] for entry in evaluator.dead_letter.values())),
+        "calls": usage["calls"],
+        "latency_seconds": usage["percentiles"]["latency_seconds"],
+        "retries": usage["retries"],
+        "rate_limiter": metadata["rate_limiter"],
+        "http_pool": metadata["http_pool"],
+        "server_requests": stats_delta(before, after),
+        "results_file": str(run_file)
+    }
+
+
+def print_scenario(key: str, scenario: Dict[str, Any]):
+    latency = scenario["latency_seconds"] or {}
+    limiter, pool = scenario["rate_limiter"], scenario["http_pool"]
+    print(f"\n📊 {key}: {scenario['wall_seconds']}s, {scenario['candidates_per_minute']} candidates/min, "
+          f"{scenario['rated']} rated, {scenario['dead_lettered']} dead-lettered")
+    print(f"   Call latency p50 {latency.get('p50')}s  p95 {latency.get('p95')}s  p99 {latency.get('p99')}s "
+          f"over {scenario['calls']} call(s)")
+    print(f"   Retries {limiter['retries']}, 429s {limiter['rate_limited']}, "
+          f"limiter wait {limiter['wait_seconds']}s; connections opened {pool['connections_opened']} "
+          f"for {pool['requests']} request(s) (reuse {pool['reuse_ratio']})")
+    for api, outcomes in scenario["server_requests"].items():
+        print(f"   Server ({api}): " + ", ".join(f"{outcome} {count}" for outcome, count in sorted(outcomes.items())))
+    if scenario["dead_letter_errors"]:
+        print("   Dead-lettered by error: " + ", ".join(f"{error} {count}"
+                                                     for error, count in scenario["dead_letter_errors"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the real evaluator against the local stand-in API')
+    parser.add_argument('--provider', choices=['openai', 'claude'], default='openai',
+                        help='Which SDK / endpoint to exercise (default: openai)')
+    parser.add_argument('--model', help='Model name sent to the stand-in (default: gpt-5 / claude-sonnet-4)')
+    parser.add_argument('--stream', action='store_true', help='Stream responses')
+    parser.add_argument('--candidates', type=int, default=50, help='Candidates per run (default: 50)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], metavar='N',
+                        help='Worker counts to run (default: 1 8 32)')
+    parser.add_argument('--image-size', default='1440x2700', metavar='WxH',
+                        help='Synthetic candidate screenshot size (default: 1440x2700)')
+    parser.add_argument('--no-exemplars', action='store_true', help='Run without the exemplar images')
+    parser.add_argument('--server-url', metavar='URL',
+                        help='Use an already running stand-in server instead of starting one '
+                             '(behaviour flags are then ignored)')
+    parser.add_argument('--work-dir', type=Path, default=BASE_DIR / ".cache" / "load-test",
+                        help='Workspace for synthetic candidates and run output (default: .cache/load-test)')
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    if args.model is None:
+        args.model = "claude-sonnet-4" if args.provider == "claude" else "gpt-5"
+    if not PIL_AVAILABLE:
+        print("Error: Pillow is required to generate synthetic candidates (pip install Pillow)")
+        sys.exit(1)
+    try:
+        size = tuple(int(v) for v in args.image_size.lower().split("x"))
+        assert len(size) == 2
+    except (ValueError, AssertionError):
+        print(f"Error: --image-size must look like 1440x2700, got {args.image_size}")
+        sys.exit(1)
+
+    work_dir = prepare_workspace(args.work_dir, args.candidates, size)
+    process = None
+    if args.server_url:
+        url = args.server_url.rstrip("/")
+    else:
+        try:
+            process, url = start_server(args)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    print(f"🧪 Stand-in API at {url} ({args.provider}, {'streaming' if args.stream else 'blocking'})")
+
+    try:
+        results = {
+            "timestamp": datetime.now().isoformat(),
+            "server": server_stats(url)["behavior"],
+            "settings": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()
+                         if key in ("provider", "model", "stream", "candidates", "image_size", "no_exemplars")},
+            "scenarios": {}
+        }
+        for concurrency in args.concurrency:
+            key = f"{args.candidates}x{concurrency}"
+            print(f"\n⏱️  Running {args.candidates} candidate(s) on {concurrency} worker(s)...")
+            results["scenarios"][key] = run_scenario(work_dir, url, args.candidates, concurrency, args)
+            print_scenario(key, results["scenarios"][key])
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    results_file = results_path(args)
+    atomic_write_json(results_file, results)
+    print(f"\n✓ Results saved to: {results_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for a vision model, for measuring the pipeline without API calls.
+
+MockProvider goes through everything a real provider does - image sizing and
+encoding (with the payload cache), request construction, the shared rate limiter
+with its retries, JSON parsing, usage and call metrics - except the network call,
+which is replaced by a simulated latency. Answers are schema-valid evaluations
+padded to a configurable size; configurable fractions of calls fail with a
+retryable server error or return unparseable JSON.
+
+Used by benchmark_pipeline.py; also handy for exercising --concurrency, --samples
+or --hedge-model behaviour by hand.
+"""
+
+import json
+import math
+import random
+import base64
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from scripts.evaluate_portfolios import ModelProvider, SYSTEM_PROMPT, CHARS_PER_TOKEN, check_answer_shape
+from scripts.image_cache import ImagePayloadCache
+from scripts.image_policy import ImagePolicy, ClaudeImagePolicy, resize_to_plan, PIL_AVAILABLE
+from scripts.rate_limiter import RateLimiter, get_rate_limiter, ResponseParseError
+from scripts.tracing import span
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+DIMENSIONS = ("typography", "layout_composition", "color")
+RED_FLAGS = ("template_scent_high", "sloppy_images", "process_soup")
+
+
+def sample_latency(rng: random.Random, distribution: str, median: float, sigma: float) -> float:
+    """fixed: always the median; uniform: 0 to twice the median; lognormal: median * e^(sigma * N(0, 1))."""
+    if distribution == "fixed":
+        return median
+    if distribution == "uniform":
+        return rng.uniform(0, 2 * median)
+    return median * math.exp(sigma * rng.gauss(0, 1))
+
+
+def mock_answer(scores: Dict[str, int], red_flags: List[str], response_chars: int) -> str:
+    """Schema-valid evaluation JSON of roughly response_chars characters."""
+    base = 0.35 * scores["typography"] + 0.35 * scores["layout_composition"] + 0.30 * scores["color"]
+    answer = {
+        "scores": {d: {"score": s, "explanation": "", "confidence": 4} for d, s in scores.items()},
+        "red_flags": red_flags,
+        "overall_weighted_score": round(base, 2),
+        "overall_confidence": 4
+    }
+    # Explanations are padded to reach the requested size
+    padding = max(0, response_chars - len(json.dumps(answer))) // len(DIMENSIONS)
+    for d in DIMENSIONS:
+        answer["scores"][d]["explanation"] = ("Consistent type scale and spacing. " * (padding // 35 + 1))[:padding]
+    return json.dumps(answer)
+
+
+def random_scores(rng: random.Random) -> Dict[str, Any]:
+    """Scores and red flags for one simulated answer."""
+    return {"scores": {d: rng.randint(2, 5) for d in DIMENSIONS},
+            "red_flags": [flag for flag in RED_FLAGS if rng.random() < 0.1]}
+
+
+class MockAPIError(Exception):
+    """Simulated overloaded-server response (retryable, like a real 529/503)."""
+
+    def __init__(self, status_code: int = 503):
+        super().__init__(f"mock server error {status_code}")
+        self.status_code = status_code
+        self.response = None
+
+
+class MockProvider(ModelProvider):
+    """Returns schema-valid evaluations after a simulated latency."""
+
+    def __init__(self, model: str = "mock-vision", latency: str = "lognormal", latency_median: float = 1.0,
+                 latency_sigma: float = 0.5, error_rate: float = 0.0, parse_error_rate: float = 0.0,
+                 response_chars: int = 1500, seed: Optional[int] = None, debug: bool = False,
+                 image_cache: Optional[ImagePayloadCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 image_policy: Optional[ImagePolicy] = None):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.model = model
+        self.debug = debug
+        # Latency distribution (see sample_latency)
+        self.latency = latency
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        # Fractions of calls answered with a retryable error / with unparseable JSON
+        self.error_rate = error_rate
+        self.parse_error_rate = parse_error_rate
+        # Approximate length of the JSON answer (explanations are padded to reach it)
+        self.response_chars = response_chars
+        self.image_cache = image_cache
+        self.rate_limiter = rate_limiter or get_rate_limiter("mock", model)
+        self.image_policy = image_policy or ClaudeImagePolicy()
+        self.stream = False
+        self.prompt_cache = False
+        self.client = None
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "errors": 0, "parse_errors": 0, "simulated_latency_seconds": 0.0}
+
+    def _draw(self) -> Dict[str, Any]:
+        """Latency and outcome of one simulated call."""
+        with self._lock:
+            latency = sample_latency(self._random, self.latency, self.latency_median, self.latency_sigma)
+            outcome = self._random.random()
+            answer = random_scores(self._random)
+        if outcome < self.error_rate:
+            kind = "error"
+        elif outcome < self.error_rate + self.parse_error_rate:
+            kind = "parse_error"
+        else:
+            kind = "ok"
+        return {"latency": latency, "kind": kind, **answer}
+
+    def _encode_image(self, image_path: str) -> str:
+        """Encode image to base64 at the planned size (served from the payload cache when available)."""
+        with span("encode_image", image=Path(image_path).name):
+            if self.image_cache is None:
+                return self._encode_image_uncached(image_path)
+            transform = {"provider": "mock", **self.image_policy.transform_key()}
+            payload, _ = self.image_cache.get_or_encode(image_path, transform, self._encode_image_uncached)
+            return payload
+
+    def _encode_image_uncached(self, image_path: str) -> str:
+        if PIL_AVAILABLE:
+            with span("pillow_resize"):
+                image_bytes = resize_to_plan(image_path, self.image_policy.plan(image_path),
+                                             self.image_policy.jpeg_quality)
+        else:
+            with open(image_path, "rb") as image_file:
+                image_bytes = image_file.read()
+        with span("base64", bytes=len(image_bytes)):
+            return base64.b64encode(image_bytes).decode('utf-8')
+
+    def _image_block(self, image_path: str) -> Dict[str, Any]:
+        payload = self._encode_image(image_path)
+        self.image_policy.record(image_path, self.image_policy.plan(image_path), len(payload) * 3 // 4)
+        return {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": payload}}
+
+    def build_request(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        """A Messages-API-shaped request, so encoding and serialization costs are real."""
+        content: List[Dict[str, Any]] = []
+        for i, exemplar in enumerate(exemplar_images, 1):
+            content.append({"type": "text", "text": f"Exemplar {i}:"})
+            content.append(self._image_block(exemplar))
+        content.append({"type": "text", "text": f"\n\n{prompt}\n\nNow evaluate this candidate portfolio:"})
+        content.extend(self._candidate_content(image_path))
+        return {"model": self.model, "system": SYSTEM_PROMPT, "messages": [{"role": "user", "content": content}]}
+
+    def _answer(self, draw: Dict[str, Any]) -> str:
+        """JSON answer text of roughly response_chars characters."""
+        text = mock_answer(draw["scores"], draw["red_flags"], self.response_chars)
+        if draw["kind"] == "parse_error":
+            # Cut off mid-object, like a truncated generation
+            return text[:len(text) // 2]
+        return text
+
+    def parse_response_text(self, content_text: Optional[str]) -> Dict[str, Any]:
+        if not content_text:
+            raise ResponseParseError("Mock provider returned empty response content")
+        return check_answer_shape(json.loads(content_text))
+
+    def request_params(self) -> Dict[str, Any]:
+        return {**super().request_params(), "system": SYSTEM_PROMPT, "image_policy": self.image_policy.transform_key()}
+
+    def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        with span("build_request"):
+            request = self.build_request(image_path, prompt, exemplar_images)
+        estimate = self.estimate_input_tokens(image_path, prompt, exemplar_images)
+        estimated_tokens = sum(estimate.values()) + self.output_token_reserve()
+
+        def simulated_call():
+            draw = self._draw()
+            time.sleep(draw["latency"])
+            with self._lock:
+                self.stats["calls"] += 1
+                self.stats["simulated_latency_seconds"] += draw["latency"]
+                if draw["kind"] == "error":
+                    self.stats["errors"] += 1
+                elif draw["kind"] == "parse_error":
+                    self.stats["parse_errors"] += 1
+            if draw["kind"] == "error":
+                raise MockAPIError()
+            return self._answer(draw)
+
+        started = time.perf_counter()
+        with span("api_call", model=self.model, stream=False):
+            content_text = self.rate_limiter.call(simulated_call, estimated_tokens)
+        call_metrics = self.call_metrics(request, image_path, exemplar_images, time.perf_counter() - started)
+
+        with span("parse_json"):
+            result = self.parse_response_text(content_text)
+
+        input_tokens = estimate["estimated_text_tokens"] + estimate["estimated_image_tokens"]
+        usage = {
+            "input_tokens": input_tokens,
+            "cached_input_tokens": 0,
+            "uncached_input_tokens": input_tokens,
+            "output_tokens": len(content_text) // CHARS_PER_TOKEN,
+        }
+        self.rate_limiter.reconcile(estimated_tokens, usage["input_tokens"] + usage["output_tokens"])
+        result["_usage"] = usage
+        result["_image_tokens"] = self.image_token_report(estimate, usage)
+        result["_call_metrics"] = call_metrics
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """Simulated call counters."""
+        with self._lock:
+            return {**self.stats, "simulated_latency_seconds": round(self.stats["simulated_latency_seconds"], 3)}
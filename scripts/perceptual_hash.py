@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Perceptual hashes (dHash + pHash) for spotting the same portfolio uploaded twice.
+
+Recruiters regularly upload one portfolio under two names, or recapture it at a
+slightly different size. Byte hashes miss those copies; perceptual hashes of the
+downscaled grayscale image do not. Two candidates are near-duplicates when their
+pHash is within a Hamming-distance threshold, their dHash within twice that (dHash
+is noisier on the flat white areas screenshots are full of), and their aspect
+ratios agree.
+
+Hashes are kept in `.cache/perceptual-hashes.json`, keyed by filename and
+invalidated when a file's size or mtime changes, so the index is built
+incrementally (by candidate_site_cleanup.py or at the start of a run).
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from scripts.run_journal import atomic_write_json
+from scripts.lazy_imports import module_available
+
+# numpy and Pillow are imported where hashes are computed
+PHASH_AVAILABLE = module_available("numpy") and module_available("PIL")
+
+
+INDEX_VERSION = 1
+HASH_SIZE = 16                  # 16x16 = 256-bit hashes
+DEFAULT_THRESHOLD = 16          # max differing pHash bits (of 256); dHash may differ in twice as many
+ASPECT_TOLERANCE = 0.1          # max relative difference in height/width
+
+
+def _dct_matrix(n: int):
+    """Orthonormal DCT-II basis, so a 2-D DCT is C @ X @ C.T."""
+    import numpy as np
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def _bits_to_hex(bits) -> str:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return f"{value:0{bits.size // 4}x}"
+
+
+def compute_hashes(image_path: str, hash_size: int = HASH_SIZE) -> Dict[str, Any]:
+    """dHash, pHash (hex) and pixel dimensions of one image."""
+    import numpy as np
+    from PIL import Image
+    with Image.open(image_path) as img:
+        width, height = img.size
+        # Let the JPEG decoder skip detail we are about to throw away
+        img.draft("L", (hash_size * 4, hash_size * 4))
+        gray = img.convert("L")
+
+        # dHash: is each pixel brighter than its right-hand neighbour?
+        small = np.asarray(gray.resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS), dtype=np.float64)
+        dhash = small[:, 1:] > small[:, :-1]
+
+        # pHash: low-frequency DCT coefficients above their median (DC term excluded)
+        side = hash_size * 4
+        pixels = np.asarray(gray.resize((side, side), Image.Resampling.LANCZOS), dtype=np.float64)
+        dct = _dct_matrix(side)
+        low = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+        phash = low > np.median(low.flatten()[1:])
+
+    return {"dhash": _bits_to_hex(dhash), "phash": _bits_to_hex(phash), "dimensions": [width, height]}
+
+
+def hamming(a: str, b: str) -> int:
+    """Number of differing bits between two hex hashes."""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _aspect_close(a: List[int], b: List[int]) -> bool:
+    ratio_a, ratio_b = a[1] / a[0], b[1] / b[0]
+    return abs(ratio_a - ratio_b) / max(ratio_a, ratio_b) <= ASPECT_TOLERANCE
+
+
+class PerceptualHashIndex:
+    """On-disk map of image filename -> perceptual hashes."""
+
+    def __init__(self, index_path: Path, hash_size: int = HASH_SIZE):
+        self.index_path = Path(index_path)
+        self.hash_size = hash_size
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.computed = 0
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("hash_size") == self.hash_size:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.index_path, {"version": INDEX_VERSION, "hash_size": self.hash_size,
+                                            "entries": self.entries})
+
+    def hashes(self, image_path: Path) -> Dict[str, Any]:
+        """Hashes for an image, recomputed only when the file changed since it was indexed."""
+        image_path = Path(image_path)
+        st = os.stat(image_path)
+        entry = self.entries.get(image_path.name)
+        if entry and entry["size_bytes"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry
+        entry = {"size_bytes": st.st_size, "mtime_ns": st.st_mtime_ns,
+                 **compute_hashes(str(image_path), self.hash_size)}
+        self.entries[image_path.name] = entry
+        self.computed += 1
+        return entry
+
+    def update(self, image_paths: List[Path]) -> int:
+        """Index the given images; returns how many had to be (re)hashed."""
+        before = self.computed
+        for image_path in image_paths:
+            self.hashes(image_path)
+        return self.computed - before
+
+    def find_duplicates(self, image_paths: List[Path],
+                        threshold: int = DEFAULT_THRESHOLD) -> Dict[str, Dict[str, Any]]:
+        """Map each near-duplicate filename to the earliest matching image in `image_paths`.
+
+        Returns {duplicate_name: {"canonical": name, "dhash_distance": d, "phash_distance": p}}.
+        """
+        canonicals: List[Path] = []
+        duplicates: Dict[str, Dict[str, Any]] = {}
+        for image_path in image_paths:
+            entry = self.hashes(image_path)
+            match: Optional[Dict[str, Any]] = None
+            for canonical in canonicals:
+                other = self.hashes(canonical)
+                if not _aspect_close(entry["dimensions"], other["dimensions"]):
+                    continue
+                d = hamming(entry["dhash"], other["dhash"])
+                p = hamming(entry["phash"], other["phash"])
+                if p <= threshold and d <= 2 * threshold:
+                    match = {"canonical": canonical.name, "dhash_distance": d, "phash_distance": p}
+                    break
+            if match:
+                duplicates[image_path.name] = match
+            else:
+                canonicals.append(image_path)
+        return duplicates
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-model token prices and the cost / latency rollups of a run.
+
+Prices are USD per million tokens, split the way the providers bill them:
+uncached input, cached input (prompt cache reads), cache writes (Claude only)
+and output (reasoning tokens are billed as output and already counted there).
+The built-in table can be extended or overridden with a JSON file of the same
+shape (`--price-table`), e.g.
+
+    {"gpt-5": {"input": 1.25, "cached_input": 0.125, "output": 10.0}}
+
+Models are matched by the longest table key their id starts with, so
+`claude-sonnet-4` prices `claude-sonnet-4-20250514`.
+"""
+
+import json
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# USD per 1M tokens (list prices; override with --price-table when they change)
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "gpt-5": {"input": 1.25, "cached_input": 0.125, "output": 10.0},
+    "gpt-5-mini": {"input": 0.25, "cached_input": 0.025, "output": 2.0},
+    "gpt-5-nano": {"input": 0.05, "cached_input": 0.005, "output": 0.40},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.0},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "o1": {"input": 15.0, "cached_input": 7.50, "output": 60.0},
+    "claude-sonnet-4": {"input": 3.0, "cached_input": 0.30, "cache_write": 3.75, "output": 15.0},
+    "claude-opus-4-1": {"input": 15.0, "cached_input": 1.50, "cache_write": 18.75, "output": 75.0},
+}
+
+# Batch APIs (OpenAI and Anthropic) bill half the interactive price
+BATCH_DISCOUNT = 0.5
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile_rollup(values: List[float], digits: int = 3) -> Optional[Dict[str, float]]:
+    """p50/p95/p99, mean and max of a list of per-call values (None when empty)."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    if len(values) == 1:
+        cuts = {p: values[0] for p in PERCENTILES}
+    else:
+        cut_points = statistics.quantiles(values, n=100, method="inclusive")
+        cuts = {p: cut_points[p - 1] for p in PERCENTILES}
+    return {
+        **{f"p{p}": round(cuts[p], digits) for p in PERCENTILES},
+        "mean": round(statistics.mean(values), digits),
+        "max": round(max(values), digits)
+    }
+
+
+class PriceTable:
+    """Token prices by model id prefix, with optional overrides from a JSON file."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.prices = {model: dict(rates) for model, rates in DEFAULT_PRICES.items()}
+        self.source = "built-in"
+        if path is not None:
+            with open(path, "r") as f:
+                overrides = json.load(f)
+            for model, rates in overrides.items():
+                self.prices[model] = {**self.prices.get(model, {}), **rates}
+            self.source = str(path)
+
+    def rates_for(self, model: Optional[str]) -> Optional[Dict[str, float]]:
+        """Rates for the longest matching model prefix, or None for an unknown model."""
+        if not model:
+            return None
+        matches = [key for key in self.prices if model.startswith(key)]
+        if not matches:
+            return None
+        return self.prices[max(matches, key=len)]
+
+    def cost(self, model: Optional[str], usage: Optional[Dict[str, Any]], batch: bool = False) -> Optional[float]:
+        """USD cost of one call's normalized usage (None when the model or usage is unknown)."""
+        rates = self.rates_for(model)
+        if rates is None or not usage:
+            return None
+        cached = usage.get("cached_input_tokens", 0)
+        cache_write = usage.get("cache_write_input_tokens", 0)
+        # uncached_input_tokens includes cache writes (see ClaudeProvider._extract_usage)
+        uncached = usage.get("uncached_input_tokens", usage.get("input_tokens", 0) - cached) - cache_write
+        cost = (uncached * rates["input"]
+                + cached * rates.get("cached_input", rates["input"])
+                + cache_write * rates.get("cache_write", rates["input"])
+                + usage.get("output_tokens", 0) * rates["output"]) / 1_000_000
+        if batch:
+            cost *= BATCH_DISCOUNT
+        return round(cost, 6)
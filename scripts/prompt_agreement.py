@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Agreement with human ratings, verbose prompt vs compact prompt.
+
+The compact prompt (evaluate_portfolios.py --compact-prompt) says the same things in
+fewer tokens; this checks that the scores do not get worse for it. Each run is scored
+against human-ratings.json with the gap-analysis metrics (mean gap, mean absolute gap,
+correlation, within 0.5 / 1.0 points, per-dimension error), and the two runs are
+compared with each other candidate by candidate.
+
+    python3 prompt_agreement.py --runs evaluation-results/A.json evaluation-results/B.json
+    python3 prompt_agreement.py --evaluate -- --model gpt-4o --concurrency 4
+    python3 prompt_agreement.py --evaluate --fail-on-regression --tolerance 0.1 -- --base-url http://127.0.0.1:8080
+
+`--evaluate` runs evaluate_portfolios.py twice (verbose, then --compact-prompt) with
+the arguments after `--`, and compares the two result files it writes. The report is
+saved to reports/benchmarks/prompt_agreement_<timestamp>.json.
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.run_journal import atomic_write_json
+
+
+BASE_DIR = Path(__file__).parent.parent
+RESULTS_DIR = BASE_DIR / "reports" / "benchmarks"
+EVALUATION_DIR = BASE_DIR / "evaluation-results"
+HUMAN_RATINGS_FILE = BASE_DIR / "human-ratings.json"
+DIMENSIONS = ("typography", "layout_composition", "color")
+DEFAULT_TOLERANCE = 0.05
+
+
+def load_ratings(filepath: Path) -> Dict[str, Dict[str, Any]]:
+    """Scored candidates of a run file (or human-ratings.json), keyed by candidate ID."""
+    with open(filepath, 'r') as f:
+        data = json.load(f)
+    ratings = data.get("candidate_ratings", data)
+    return {str(rating.get("candidate_id", key)): rating for key, rating in ratings.items()
+            if isinstance(rating, dict) and isinstance(rating.get("overall_weighted_score"), (int, float))}
+
+
+def pearson(xs: List[float], ys: List[float]) -> Optional[float]:
+    if len(xs) < 2:
+        return None
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    spread = (sum((x - mean_x) ** 2 for x in xs) * sum((y - mean_y) ** 2 for y in ys)) ** 0.5
+    return round(covariance / spread, 4) if spread else None
+
+
+def dimension_score(rating: Dict[str, Any], dimension: str) -> Optional[float]:
+    score = rating.get("criteria", {}).get(dimension, {}).get("score")
+    return score if isinstance(score, (int, float)) else None
+
+
+def agreement(ai: Dict[str, Dict[str, Any]], human: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Gap-analysis metrics of AI scores against human scores, over the candidates both rated."""
+    shared = sorted(set(ai) & set(human), key=lambda c: (len(c), c))
+    ai_scores = [ai[c]["overall_weighted_score"] for c in shared]
+    human_scores = [human[c]["overall_weighted_score"] for c in shared]
+    gaps = [a - h for a, h in zip(ai_scores, human_scores)]
+    if not gaps:
+        return {"candidates": 0}
+
+    dimension_error = {}
+    for dimension in DIMENSIONS:
+        errors = [abs(dimension_score(ai[c], dimension) - dimension_score(human[c], dimension)) for c in shared
+                  if dimension_score(ai[c], dimension) is not None and dimension_score(human[c], dimension) is not None]
+        dimension_error[dimension] = round(sum(errors) / len(errors), 3) if errors else None
+
+    return {
+        "candidates": len(shared),
+        "mean_gap": round(sum(gaps) / len(gaps), 3),
+        "mean_absolute_gap": round(sum(abs(g) for g in gaps) / len(gaps), 3),
+        "correlation": pearson(ai_scores, human_scores),
+        "within_0_5": sum(abs(g) <= 0.5 for g in gaps),
+        "within_1_0": sum(abs(g) <= 1.0 for g in gaps),
+        "dimension_error": dimension_error
+    }
+
+
+def pairwise(verbose: Dict[str, Dict[str, Any]], compact: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """How far the compact run's scores are from the verbose run's, candidate by candidate."""
+    shared = sorted(set(verbose) & set(compact), key=lambda c: (len(c), c))
+    differences = [compact[c]["overall_weighted_score"] - verbose[c]["overall_weighted_score"] for c in shared]
+    if not differences:
+        return {"candidates": 0}
+    dimension_matches = sum(dimension_score(verbose[c], d) == dimension_score(compact[c], d)
+                            for c in shared for d in DIMENSIONS)
+    return {
+        "candidates": len(shared),
+        "mean_difference": round(sum(differences) / len(differences), 3),
+        "mean_absolute_difference": round(sum(abs(d) for d in differences) / len(differences), 3),
+        "correlation": pearson([verbose[c]["overall_weighted_score"] for c in shared],
+                               [compact[c]["overall_weighted_score"] for c in shared]),
+        "identical_dimension_scores": round(dimension_matches / (len(shared) * len(DIMENSIONS)), 3)
+    }
+
+
+def regressions(verbose: Dict[str, Any], compact: Dict[str, Any], tolerance: float) -> List[str]:
+    """Ways the compact run agrees with humans worse than the verbose run, beyond `tolerance`."""
+    found = []
+    if compact["mean_absolute_gap"] > verbose["mean_absolute_gap"] + tolerance:
+        found.append(f"mean absolute gap {verbose['mean_absolute_gap']} → {compact['mean_absolute_gap']}")
+    if verbose["correlation"] is not None and compact["correlation"] is not None \
+            and compact["correlation"] < verbose["correlation"] - tolerance:
+        found.append(f"correlation {verbose['correlation']} → {compact['correlation']}")
+    for dimension, error in compact["dimension_error"].items():
+        baseline = verbose["dimension_error"].get(dimension)
+        if error is not None and baseline is not None and error > baseline + tolerance:
+            found.append(f"{dimension} error {baseline} → {error}")
+    return found
+
+
+def run_evaluation(extra_args: List[str], compact: bool) -> Path:
+    """Run evaluate_portfolios.py and return the result file it wrote."""
+    before = set(EVALUATION_DIR.glob("evaluation_*.json"))
+    command = [sys.executable, str(Path(__file__).parent / "evaluate_portfolios.py"), *extra_args]
+    if compact:
+        command.append("--compact-prompt")
+    print(f"\n🚀 {'Compact' if compact else 'Verbose'} prompt run: {' '.join(command[1:])}")
+    result = subprocess.run(command, cwd=BASE_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f"evaluate_portfolios.py exited with code {result.returncode}")
+    written = sorted(set(EVALUATION_DIR.glob("evaluation_*.json")) - before)
+    if not written:
+        raise RuntimeError("evaluate_portfolios.py did not write a result file")
+    return written[-1]
+
+
+def print_agreement(label: str, metrics: Dict[str, Any]):
+    n = metrics["candidates"]
+    errors = ", ".join(f"{d} {e}" for d, e in metrics["dimension_error"].items())
+    print(f"   {label:<8} n={n}  mean gap {metrics['mean_gap']:+.2f}  |gap| {metrics['mean_absolute_gap']:.2f}  "
+          f"r={metrics['correlation']}  within 0.5: {metrics['within_0_5']}/{n}  within 1.0: {metrics['within_1_0']}/{n}")
+    print(f"            dimension error: {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the compact prompt agrees with human ratings as well as the verbose one')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--runs', nargs=2, type=Path, metavar=('VERBOSE_RUN', 'COMPACT_RUN'),
+                        help='Compare two existing evaluation result files')
+    source.add_argument('--evaluate', action='store_true',
+                        help='Run evaluate_portfolios.py verbose and compact (arguments after -- are passed on)')
+    parser.add_argument('--human', type=Path, default=HUMAN_RATINGS_FILE,
+                        help='Human ratings file (default: human-ratings.json)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed worsening of error / correlation before it counts as a regression (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on a regression')
+    args, extra_args = parser.parse_known_args()
+    extra_args = [a for a in extra_args if a != "--"]
+
+    if args.evaluate:
+        verbose_file, compact_file = run_evaluation(extra_args, False), run_evaluation(extra_args, True)
+    else:
+        if extra_args:
+            parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+        verbose_file, compact_file = args.runs
+
+    human = load_ratings(args.human)
+    verbose, compact = load_ratings(verbose_file), load_ratings(compact_file)
+    # Both runs are scored on the same candidates, so a failed call in one doesn't skew the comparison
+    shared = set(verbose) & set(compact)
+    verbose = {c: r for c, r in verbose.items() if c in shared}
+    compact = {c: r for c, r in compact.items() if c in shared}
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "human_ratings": str(args.human),
+        "verbose_run": str(verbose_file),
+        "compact_run": str(compact_file),
+        "verbose": agreement(verbose, human),
+        "compact": agreement(compact, human),
+        "verbose_vs_compact": pairwise(verbose, compact),
+        "tolerance": args.tolerance
+    }
+    if not report["verbose"]["candidates"] or not report["compact"]["candidates"]:
+        print("❌ No candidates in common with the human ratings")
+        sys.exit(1)
+    report["regressions"] = regressions(report["verbose"], report["compact"], args.tolerance)
+
+    print(f"\n📊 Agreement with {args.human.name}:")
+    print_agreement("verbose", report["verbose"])
+    print_agreement("compact", report["compact"])
+    both = report["verbose_vs_compact"]
+    print(f"\n   Compact vs verbose: mean difference {both['mean_difference']:+.2f}, "
+          f"mean |difference| {both['mean_absolute_difference']:.2f}, r={both['correlation']}, "
+          f"{both['identical_dimension_scores']:.0%} identical dimension scores")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_file = RESULTS_DIR / f"prompt_agreement_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    atomic_write_json(output_file, report)
+    print(f"\n💾 Report saved to {output_file}")
+
+    if report["regressions"]:
+        print(f"\n⚠️  Compact prompt regressed (tolerance {args.tolerance}):")
+        for regression in report["regressions"]:
+            print(f"   - {regression}")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print(f"\n✓ No regression beyond {args.tolerance}")
+
+
+if __name__ == "__main__":
+    main()
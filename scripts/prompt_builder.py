@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+The evaluation prompt, assembled from core-prompt.md, rubric.json and examplars.json.
+
+This is the only place the prompt is built; the evaluator and generate_prompt.py both
+go through `get_prompt_builder(base_dir).build()`. Builds are memoized: inputs are
+re-read only when a file's size or mtime changes, and re-assembled only when their
+contents hash differently, so a long-lived process gets the same prompt string back
+without touching the disk. The result carries a fingerprint (SHA-256 of the prompt
+text, the same value the result cache records as `prompt_sha256`), and
+generated-prompt.md is written only when its contents would change.
+
+`compact=True` renders the same content in fewer tokens: the rubric as flattened
+bullet lists with repeated phrasing dropped, the exemplar calibration as one table.
+`size_report()` compares the two renderings section by section.
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from scripts.run_journal import atomic_write_text
+
+
+PROMPT_INPUTS = ("core-prompt.md", "rubric.json", "examplars.json")
+OUTPUT_FILE = "generated-prompt.md"
+
+# Red-flag deductions used to derive an exemplar's overall score when it has none
+PENALTY_WEIGHTS = {
+    "template_scent_high": 0.5,
+    "sloppy_images": 0.3,
+    "process_soup": 0.2,
+}
+
+# Rubric-only mode swaps the exemplar instruction in core-prompt.md for this one
+EXEMPLAR_INSTRUCTION = (
+    "4. **Be consistent with the exemplars:**\n"
+    "   - Use the provided exemplar ratings as calibration for your scores\n"
+    "   - Apply the same standards strictly across all evaluations"
+)
+RUBRIC_ONLY_INSTRUCTION = (
+    "4. **Be consistent in your evaluations:**\n"
+    "   - Apply the rubric standards strictly and consistently across all evaluations\n"
+    "   - Use the full 1-5 rating scale when warranted"
+)
+
+
+def get_dimension_weights(rubric: dict) -> dict:
+    """Extract dimension weights from rubric.json structure."""
+    weights: dict = {}
+    for dimension in rubric.get("rubric", {}).get("dimensions", []):
+        dim_id = dimension.get("id")
+        weight = dimension.get("weight")
+        if dim_id is not None and weight is not None:
+            weights[dim_id] = float(weight)
+    return weights
+
+
+def build_exemplar_calibration_summary(exemplars: dict, weights: dict) -> dict:
+    """Create a compact calibration block: scores and overall only (no long comments)."""
+    summary_items = []
+    for key in sorted(exemplars.keys(), key=lambda k: int(k) if str(k).isdigit() else str(k)):
+        ex = exemplars[key]
+        criteria = ex.get("criteria", {})
+        crit_scores = {
+            "typography": criteria.get("typography", {}).get("score", 0),
+            "layout_composition": criteria.get("layout_composition", {}).get("score", 0),
+            "color": criteria.get("color", {}).get("score", 0),
+        }
+
+        # Compute base/overall if missing
+        base = (
+            weights.get("typography", 0.0) * float(crit_scores["typography"])
+            + weights.get("layout_composition", 0.0) * float(crit_scores["layout_composition"])
+            + weights.get("color", 0.0) * float(crit_scores["color"])
+        )
+        red_flags = ex.get("red_flags", []) or []
+        penalty = sum(PENALTY_WEIGHTS.get(flag, 0.0) for flag in red_flags)
+        overall = ex.get("overall_weighted_score", round(base - penalty, 2))
+
+        summary_items.append({
+            "exemplar_id": ex.get("exemplar_id", key),
+            "portfolio_category": ex.get("portfolio_category", "Unknown"),
+            "criteria_scores": crit_scores,
+            "overall_weighted_score": overall,
+        })
+
+    return {
+        "exemplars": summary_items,
+        "guidance": [
+            "Use these numeric anchors to calibrate scoring.",
+            "Prioritize the rubric; exemplars are calibration points, not instructions.",
+            "Use the full 1–5 range when warranted.",
+        ],
+    }
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().split()).rstrip(".")
+
+
+def _dedupe(lines: List[str], seen: set, context: str = "") -> List[str]:
+    """Drop lines already used (normalized) or already stated in `context`; records what it keeps."""
+    kept = []
+    for line in lines:
+        key = _normalize(line)
+        if key in seen or (context and key in context):
+            continue
+        seen.add(key)
+        kept.append(" ".join(str(line).split()))
+    return kept
+
+
+def _compact_rubric(rubric: dict, core_prompt: str, header: str) -> str:
+    """Flattened rubric: one heading per dimension, anchors as bullets, duplicates dropped.
+
+    Known keys render in a fixed order; anything else follows as minified JSON with sorted keys.
+    """
+    body = rubric.get("rubric", {})
+    context = _normalize(core_prompt)
+    seen: set = set()
+    lines = [header]
+    for dimension in body.get("dimensions", []):
+        lines.append(f"## {dimension.get('id')} (weight {dimension.get('weight')})")
+        for key, label in (("good_anchor", "Good"), ("weak_anchor", "Weak")):
+            anchors = _dedupe(dimension.get(key, []), seen)
+            if anchors:
+                lines.append(f"{label}:")
+                lines.extend(f"- {anchor}" for anchor in anchors)
+        extra = {k: v for k, v in dimension.items() if k not in ("id", "weight", "good_anchor", "weak_anchor")}
+        if extra:
+            lines.append(json.dumps(extra, sort_keys=True, separators=(",", ":"), ensure_ascii=False))
+    red_flags = _dedupe(body.get("red_flags", []), seen, context)
+    if red_flags:
+        lines.append("## Red flags")
+        lines.extend(f"- {flag}" for flag in red_flags)
+    # The rating scale is usually spelled out in core-prompt.md already
+    scale = _dedupe(body.get("rating_scale", []), seen, context)
+    if scale:
+        lines.append("## Rating scale")
+        lines.extend(f"- {step}" for step in scale)
+    extra = {k: v for k, v in body.items() if k not in ("dimensions", "red_flags", "rating_scale")}
+    extra.update({k: v for k, v in rubric.items() if k != "rubric"})
+    if extra:
+        lines.append(json.dumps(extra, sort_keys=True, separators=(",", ":"), ensure_ascii=False))
+    return "\n".join(lines)
+
+
+def _compact_calibration(calibration: dict, core_prompt: str, dimensions: List[str]) -> str:
+    """Exemplar anchors as one table: column names once, constant columns stated in the heading."""
+    items = calibration["exemplars"]
+    categories = {item["portfolio_category"] for item in items}
+    columns = ["id"] + ([] if len(categories) == 1 else ["category"]) + dimensions + ["overall"]
+    heading = "# EXEMPLAR CALIBRATION (scores 1-5"
+    heading += f"; all {categories.pop()})" if len(categories) == 1 else ")"
+    lines = [heading, "|".join(columns)]
+    for item in items:
+        row = [item["exemplar_id"]] + ([] if "category" not in columns else [item["portfolio_category"]])
+        row += [item["criteria_scores"].get(d, 0) for d in dimensions] + [item["overall_weighted_score"]]
+        lines.append("|".join(str(value) for value in row))
+    # Guidance the rubric heading or core-prompt.md already gives is not repeated
+    guidance = _dedupe([g for g in calibration["guidance"] if "rubric" not in g.lower()], set(),
+                       _normalize(core_prompt))
+    if guidance:
+        lines.append(" ".join(guidance))
+    return "\n".join(lines)
+
+
+def prompt_sections(core_prompt: str, rubric: dict, exemplars: dict, no_exemplars: bool = False,
+                    compact: bool = False) -> List[Tuple[str, List[str]]]:
+    """(section name, text parts) in prompt order; the prompt is every part joined by newlines."""
+    if no_exemplars:
+        # Pure rubric-only mode - modify core prompt to remove exemplar references
+        core_prompt = core_prompt.replace(EXEMPLAR_INSTRUCTION, RUBRIC_ONLY_INSTRUCTION)
+    sections = [("core_prompt", ["# EVALUATION PROMPT\n", core_prompt])]
+
+    if compact:
+        header = "\n# RUBRIC (authoritative" + ("" if no_exemplars else "; exemplars are calibration anchors only") + ")"
+        sections.append(("rubric", [_compact_rubric(rubric, core_prompt, header)]))
+    elif no_exemplars:
+        sections.append(("rubric", ["\n\n# RUBRIC (authoritative)\n",
+                                    "The rubric is the primary guide. Follow it strictly.\n",
+                                    json.dumps(rubric, indent=2)]))
+    else:
+        sections.append(("rubric", ["\n\n# RUBRIC (authoritative)\n",
+                                    "The rubric is the primary guide. Follow it strictly. "
+                                    "Exemplars are calibration anchors only.\n",
+                                    json.dumps(rubric, indent=2)]))
+
+    if not no_exemplars:
+        # Include exemplar calibration
+        weights = get_dimension_weights(rubric)
+        exemplar_calibration = build_exemplar_calibration_summary(exemplars, weights)
+        if compact:
+            dimensions = [d for d in weights] or ["typography", "layout_composition", "color"]
+            sections.append(("exemplar_calibration",
+                             ["\n" + _compact_calibration(exemplar_calibration, core_prompt, dimensions)]))
+        else:
+            sections.append(("exemplar_calibration", ["\n\n# EXEMPLAR CALIBRATION (compact)\n",
+                                                      json.dumps(exemplar_calibration, indent=2)]))
+    return sections
+
+
+def assemble_prompt(core_prompt: str, rubric: dict, exemplars: dict, no_exemplars: bool = False,
+                    compact: bool = False) -> str:
+    """The complete prompt text from its parsed components.
+
+    `compact` renders the rubric as flattened bullet lists and the exemplar calibration as
+    one table, without JSON indentation, repeated keys or phrasing the prompt already has.
+    """
+    sections = prompt_sections(core_prompt, rubric, exemplars, no_exemplars, compact)
+    return "\n".join(part for _, parts in sections for part in parts)
+
+
+# Pre-tokenizer pieces (close to GPT-style BPE): contractions, words and numbers with a
+# leading space, punctuation runs, whitespace runs
+_TOKEN_PIECES = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: one per pre-tokenizer piece, long words split every 8 letters.
+
+    Good for comparing renderings of the same text, not for billing.
+    """
+    count = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        word = piece.strip()
+        count += 1 + (len(word) - 1) // 8 if word.isalpha() else 1
+    return count
+
+
+def size_report(core_prompt: str, rubric: dict, exemplars: dict, no_exemplars: bool = False) -> Dict[str, Any]:
+    """Characters and estimated tokens per section, verbose vs compact."""
+    report: Dict[str, Any] = {"sections": {}}
+    for mode, compact in (("verbose", False), ("compact", True)):
+        sections = prompt_sections(core_prompt, rubric, exemplars, no_exemplars, compact)
+        for name, parts in sections:
+            text = "\n".join(parts)
+            report["sections"].setdefault(name, {})[mode] = {"chars": len(text), "tokens": estimate_tokens(text)}
+        prompt = "\n".join(part for _, parts in sections for part in parts)
+        report[mode] = {"chars": len(prompt), "tokens": estimate_tokens(prompt)}
+    report["saved"] = {
+        "chars": report["verbose"]["chars"] - report["compact"]["chars"],
+        "tokens": report["verbose"]["tokens"] - report["compact"]["tokens"],
+        "ratio": round(1 - report["compact"]["tokens"] / report["verbose"]["tokens"], 3)
+    }
+    return report
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class PromptBuilder:
+    """Memoized prompt builds for one project directory."""
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple] = None
+        self._inputs_sha256: Optional[str] = None
+        self._inputs: Optional[Tuple[str, dict, dict]] = None
+        # Built prompts keyed by (no_exemplars, compact)
+        self._prompts: Dict[Tuple[bool, bool], Dict[str, Any]] = {}
+        # (fingerprint, (mtime_ns, size)) of generated-prompt.md when last read or written
+        self._written: Optional[Tuple[str, Tuple[int, int]]] = None
+        self.stats = {"builds": 0, "input_reads": 0, "assemblies": 0, "writes": 0}
+
+    def _input_stat_key(self) -> Tuple:
+        key = []
+        for name in PROMPT_INPUTS:
+            st = os.stat(self.base_dir / name)
+            key.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(key)
+
+    def _refresh_inputs(self):
+        """Re-read the inputs if any file changed on disk; drop cached prompts if their contents did."""
+        stat_key = self._input_stat_key()
+        if stat_key == self._stat_key:
+            return
+        raw = {name: (self.base_dir / name).read_bytes() for name in PROMPT_INPUTS}
+        self.stats["input_reads"] += 1
+        digest = hashlib.sha256()
+        for name in PROMPT_INPUTS:
+            digest.update(name.encode("utf-8") + b"\0" + hashlib.sha256(raw[name]).digest())
+        inputs_sha256 = digest.hexdigest()
+        if inputs_sha256 != self._inputs_sha256:
+            self._inputs = (raw["core-prompt.md"].decode("utf-8"), json.loads(raw["rubric.json"]),
+                            json.loads(raw["examplars.json"]))
+            self._inputs_sha256 = inputs_sha256
+            self._prompts = {}
+        self._stat_key = stat_key
+
+    def build(self, no_exemplars: bool = False, compact: bool = False, write: bool = True) -> Dict[str, Any]:
+        """The prompt and its fingerprint, rebuilt only when the inputs changed.
+
+        With `write`, generated-prompt.md is updated if (and only if) it differs.
+        Returns {"prompt", "fingerprint", "inputs_sha256", "no_exemplars", "compact", "written"}.
+        """
+        with self._lock:
+            self.stats["builds"] += 1
+            self._refresh_inputs()
+            built = self._prompts.get((no_exemplars, compact))
+            if built is None:
+                prompt = assemble_prompt(*self._inputs, no_exemplars=no_exemplars, compact=compact)
+                built = {"prompt": prompt, "fingerprint": prompt_fingerprint(prompt),
+                         "inputs_sha256": self._inputs_sha256, "no_exemplars": no_exemplars, "compact": compact}
+                self._prompts[(no_exemplars, compact)] = built
+                self.stats["assemblies"] += 1
+            written = write and self._write_if_changed(built)
+        return {**built, "written": written}
+
+    def sections(self, no_exemplars: bool = False, compact: bool = False) -> List[Tuple[str, List[str]]]:
+        """The prompt's named sections (see prompt_sections()), from the current inputs."""
+        with self._lock:
+            self._refresh_inputs()
+            return prompt_sections(*self._inputs, no_exemplars=no_exemplars, compact=compact)
+
+    def size_report(self, no_exemplars: bool = False) -> Dict[str, Any]:
+        """Verbose vs compact rendering sizes (see size_report())."""
+        with self._lock:
+            self._refresh_inputs()
+            return size_report(*self._inputs, no_exemplars=no_exemplars)
+
+    def _write_if_changed(self, built: Dict[str, Any]) -> bool:
+        output = self.base_dir / OUTPUT_FILE
+        try:
+            st = os.stat(output)
+            stat_key = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stat_key = None
+        if stat_key is not None and (self._written is None or self._written[1] != stat_key):
+            # First look, or edited since we wrote it
+            self._written = (prompt_fingerprint(output.read_text()), stat_key)
+        if stat_key is not None and self._written[0] == built["fingerprint"]:
+            return False
+        atomic_write_text(output, built["prompt"])
+        st = os.stat(output)
+        self._written = (built["fingerprint"], (st.st_mtime_ns, st.st_size))
+        self.stats["writes"] += 1
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats)
+
+
+_builders: Dict[Path, PromptBuilder] = {}
+_builders_lock = threading.Lock()
+
+
+def get_prompt_builder(base_dir: Path) -> PromptBuilder:
+    """Process-wide builder for a project directory; created on first use."""
+    key = Path(base_dir).resolve()
+    with _builders_lock:
+        builder = _builders.get(key)
+        if builder is None:
+            builder = PromptBuilder(key)
+            _builders[key] = builder
+        return builder
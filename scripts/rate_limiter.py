@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Shared request/token rate limiting for the model providers.
+
+One `RateLimiter` exists per (provider, model) and is shared by every worker thread,
+so `--concurrency` never multiplies the budget. Each call:
+
+1. waits until both the requests-per-minute and tokens-per-minute buckets can cover
+   it (tokens are estimated before the call and reconciled with actual usage after),
+2. feeds the rate-limit headers of the response back into the buckets (OpenAI
+   `x-ratelimit-*`, Anthropic `anthropic-ratelimit-*`), so the local budget tracks
+   what the server reports even when no `--rpm`/`--tpm` is configured,
+3. retries 429/408/409/5xx and connection errors with jittered exponential backoff,
+   waiting at least as long as any `Retry-After` header asks.
+"""
+
+import re
+import json
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from scripts.tracing import span
+from scripts.lazy_imports import module_available
+
+# tenacity is imported on the first call
+TENACITY_AVAILABLE = module_available("tenacity")
+
+
+DEFAULT_MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+# Never sleep in one go for longer than this, so budget changes are picked up
+MAX_SLEEP_SLICE = 5.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to `per_minute` units."""
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.per_minute = per_minute
+        self.level = float(per_minute or 0)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.per_minute:
+            elapsed = now - self.updated
+            self.level = min(self.per_minute, self.level + elapsed * self.per_minute / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 = available now)."""
+        self._refill(now)
+        if not self.per_minute:
+            return 0.0
+        # A single request larger than the whole bucket may go once the bucket is full
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.per_minute
+
+    def take(self, amount: float):
+        """Debit the bucket (negative amounts refund; the level may go below zero)."""
+        if self.per_minute:
+            self.level = min(self.per_minute, self.level - amount)
+
+    def set_limit(self, per_minute: float):
+        if self.per_minute is None:
+            self.level = float(per_minute)
+        self.per_minute = per_minute
+        self.level = min(self.level, per_minute)
+
+    def clamp(self, remaining: float):
+        """Never believe we have more headroom than the server reports."""
+        if self.per_minute:
+            self.level = min(self.level, remaining)
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """OpenAI reset durations: '1s', '6m0s', '20ms', '1h2m3.5s'."""
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value or "")
+    if not parts:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds until a reset header (OpenAI durations or Anthropic RFC 3339 timestamps)."""
+    if not value:
+        return None
+    if "T" in value:
+        try:
+            reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+    return _parse_duration(value)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Server-requested delay from `retry-after-ms` / `retry-after` headers."""
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            # HTTP-date form
+            try:
+                from email.utils import parsedate_to_datetime
+                return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _error_headers(error: BaseException) -> Optional[Mapping[str, str]]:
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None)
+
+
+# Connection-level failures, matched by class name so neither SDK nor httpx has to be imported:
+# the SDKs wrap them as APIConnectionError (APITimeoutError subclasses it), but a stream that
+# drops mid-response raises httpx's own TransportError subclasses (RemoteProtocolError,
+# ReadError, ReadTimeout, ...)
+RETRYABLE_ERROR_CLASSES = ("APIConnectionError", "TransportError")
+# TransportError subclass that means a malformed URL, not a flaky connection
+PERMANENT_ERROR_CLASSES = ("UnsupportedProtocol",)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, timeouts, overload, server errors and dropped connections are worth retrying."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & set(RETRYABLE_ERROR_CLASSES)) and not names & set(PERMANENT_ERROR_CLASSES)
+
+
+# Failure classes for the evaluator's retry queue
+TRANSIENT = "transient"   # worth re-queueing: rate limits, timeouts, overload, 5xx, dropped connections
+PARSE = "parse"           # the model answered but not with usable JSON; a new sample may parse
+PERMANENT = "permanent"   # retrying cannot help: bad request, auth, missing file, a bug in our code
+
+
+class ResponseParseError(ValueError):
+    """The model answered, but not with the JSON object the evaluator expects."""
+
+
+def classify_failure(error: BaseException) -> str:
+    """Classify an evaluation failure as TRANSIENT, PARSE or PERMANENT."""
+    if is_retryable(error):
+        return TRANSIENT
+    # Only answers we rejected count as PARSE; any other exception (TypeError, KeyError, ...)
+    # is a bug in our code and must not be retried and dead-lettered as a bad answer
+    if isinstance(error, (ResponseParseError, json.JSONDecodeError)):
+        return PARSE
+    return PERMANENT
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget for one provider + model."""
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.name = name
+        # User-configured ceilings; server-reported limits can only lower them
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_attempts = max(1, max_attempts)
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "wait_seconds": 0.0}
+        # Retries of the call in progress on each thread (see last_call_retries)
+        self._current = threading.local()
+
+    def configure(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """Set user ceilings (e.g. from --rpm/--tpm) after construction."""
+        with self._lock:
+            if rpm:
+                self.rpm = rpm
+                self._requests.set_limit(rpm)
+            if tpm:
+                self.tpm = tpm
+                self._tokens.set_limit(tpm)
+
+    # ------------------------------------------------------------------ budget
+
+    def acquire(self, estimated_tokens: int):
+        """Block until one request and `estimated_tokens` tokens fit in the budget."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = max(
+                    self._blocked_until - now,
+                    self._requests.wait_time(1, now),
+                    self._tokens.wait_time(estimated_tokens, now),
+                )
+                if delay <= 0:
+                    self._requests.take(1)
+                    self._tokens.take(estimated_tokens)
+                    self.stats["requests"] += 1
+                    self.stats["wait_seconds"] += waited
+                    return
+            sleep_for = min(delay, MAX_SLEEP_SLICE)
+            time.sleep(sleep_for)
+            waited += sleep_for
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token bucket once the real usage is known."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self._tokens.take(actual_tokens - estimated_tokens)
+
+    def block_for(self, seconds: float):
+        """Pause every worker for `seconds` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]):
+        """Align the buckets with the rate-limit headers of a response."""
+        if not headers:
+            return
+        limits = {}
+        for kind in ("requests", "tokens"):
+            limits[kind] = (
+                self._header_number(headers, f"x-ratelimit-limit-{kind}",
+                                    f"anthropic-ratelimit-{kind}-limit"),
+                self._header_number(headers, f"x-ratelimit-remaining-{kind}",
+                                    f"anthropic-ratelimit-{kind}-remaining"),
+                _parse_reset(headers.get(f"x-ratelimit-reset-{kind}")
+                             or headers.get(f"anthropic-ratelimit-{kind}-reset")),
+            )
+
+        with self._lock:
+            for kind, bucket, configured in (("requests", self._requests, self.rpm),
+                                             ("tokens", self._tokens, self.tpm)):
+                limit, remaining, reset = limits[kind]
+                if limit:
+                    bucket.set_limit(min(limit, configured) if configured else limit)
+                if remaining is not None:
+                    bucket.clamp(remaining)
+                    if remaining <= 0 and reset:
+                        self._blocked_until = max(self._blocked_until, time.monotonic() + reset)
+
+    @staticmethod
+    def _header_number(headers: Mapping[str, str], *names: str) -> Optional[float]:
+        for name in names:
+            value = headers.get(name)
+            if value is not None:
+                try:
+                    return float(value)
+                except ValueError:
+                    return None
+        return None
+
+    # ------------------------------------------------------------------ calls
+
+    def backoff_seconds(self, attempt: int, error: Optional[BaseException]) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+        retry_after = retry_after_seconds(_error_headers(error)) if error is not None else None
+        return max(backoff, retry_after or 0.0)
+
+    def _on_error(self, error: BaseException):
+        headers = _error_headers(error)
+        self.update_from_headers(headers)
+        if getattr(error, "status_code", None) == 429:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            retry_after = retry_after_seconds(headers)
+            if retry_after:
+                # Every worker backs off, not just the one that got the 429
+                self.block_for(retry_after)
+
+    def _before_retry(self, attempt: int, error: BaseException, sleep_for: float):
+        with self._lock:
+            self.stats["retries"] += 1
+        self._current.retries = getattr(self._current, "retries", 0) + 1
+        print(f"   ⏳ {self.name}: {type(error).__name__} (attempt {attempt}/{self.max_attempts}), "
+              f"retrying in {sleep_for:.1f}s")
+
+    @staticmethod
+    def _backoff_sleep(seconds: float):
+        with span("retry_backoff", seconds=round(seconds, 3)):
+            time.sleep(seconds)
+
+    def call(self, request: Callable[[], Any], estimated_tokens: int) -> Any:
+        """Run `request()` within the budget, retrying retryable errors.
+
+        `request` should return a raw SDK response (`with_raw_response`) so its
+        rate-limit headers can be read; the raw response is returned unchanged.
+        """
+        def attempt_once():
+            with span("rate_limit_wait", limiter=self.name):
+                self.acquire(estimated_tokens)
+            try:
+                with span("http_request", limiter=self.name):
+                    raw_response = request()
+            except Exception as e:
+                self._on_error(e)
+                raise
+            self.update_from_headers(getattr(raw_response, "headers", None))
+            return raw_response
+
+        self._current.retries = 0
+        if not TENACITY_AVAILABLE:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    return attempt_once()
+                except Exception as e:
+                    if attempt == self.max_attempts or not is_retryable(e):
+                        raise
+                    sleep_for = self.backoff_seconds(attempt, e)
+                    self._before_retry(attempt, e, sleep_for)
+                    self._backoff_sleep(sleep_for)
+
+        from tenacity import Retrying, retry_if_exception, stop_after_attempt
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            retry=retry_if_exception(is_retryable),
+            wait=lambda state: self.backoff_seconds(state.attempt_number, state.outcome.exception()),
+            before_sleep=lambda state: self._before_retry(
+                state.attempt_number, state.outcome.exception(), state.next_action.sleep),
+            sleep=self._backoff_sleep,
+            reraise=True,
+        )
+        return retrying(attempt_once)
+
+    def last_call_retries(self) -> int:
+        """Retries made by the most recent `call()` on this thread."""
+        return getattr(self._current, "retries", 0)
+
+    def summary(self) -> Dict[str, Any]:
+        """Stats suitable for run metadata."""
+        with self._lock:
+            return {
+                **self.stats,
+                "wait_seconds": round(self.stats["wait_seconds"], 2),
+                "rpm": self._requests.per_minute,
+                "tpm": self._tokens.per_minute,
+            }
+
+
+_LIMITERS: Dict[Tuple[str, str], RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(provider: str, model: str, rpm: Optional[float] = None,
+                     tpm: Optional[float] = None) -> RateLimiter:
+    """Process-wide limiter for (provider, model); created on first use."""
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get((provider, model))
+        if limiter is None:
+            limiter = RateLimiter(f"{provider}/{model}", rpm=rpm, tpm=tpm)
+            _LIMITERS[(provider, model)] = limiter
+        return limiter
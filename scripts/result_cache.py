@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of model outputs keyed by an input fingerprint.
+
+Most re-runs (after a tweak to rubric.json or core-prompt.md that does not change
+the generated prompt, or a re-run over a partly new candidate set) send requests
+identical to ones already answered. The fingerprint covers everything that reaches
+the model - model id, provider parameters, the generated prompt, the ordered
+exemplar images and the candidate image - so a hit returns the stored raw output
+and any real input change is a miss.
+"""
+
+import json
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from scripts.run_journal import atomic_write_json
+
+
+# Bump when the stored entry format (or what the fingerprint covers) changes
+CACHE_FORMAT_VERSION = 1
+
+
+def result_fingerprint(request_params: Dict[str, Any], prompt: str,
+                       exemplar_hashes: List[str], candidate_hash: str) -> str:
+    """SHA-256 over every input that can change the model's answer."""
+    inputs = {
+        "version": CACHE_FORMAT_VERSION,
+        "request_params": request_params,
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "exemplar_sha256": list(exemplar_hashes),
+        "candidate_sha256": candidate_hash,
+    }
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Disk cache of raw model outputs, one JSON file per fingerprint.
+
+    `read=False` skips lookups but still stores new outputs, which is how
+    `--fresh` samples new answers and refreshes the cache.
+    """
+
+    def __init__(self, cache_dir: Path, read: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.read = read
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry (raw_result, usage, cached_at, model) or None."""
+        entry = None
+        if self.read:
+            try:
+                with open(self._path(key), "r") as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, OSError, json.JSONDecodeError):
+                entry = None
+            if entry is not None and entry.get("version") != CACHE_FORMAT_VERSION:
+                entry = None
+
+        with self._lock:
+            self.stats["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    def put(self, key: str, raw_result: Dict[str, Any], usage: Optional[Dict[str, Any]] = None,
+            model: Optional[str] = None):
+        """Store a raw model output (before structure_result)."""
+        entry = {
+            "version": CACHE_FORMAT_VERSION,
+            "cached_at": datetime.now().isoformat(),
+            "model": model,
+            "raw_result": raw_result,
+            "usage": usage,
+        }
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(path, entry, indent=None)
+        except OSError as e:
+            print(f"   ⚠️  Could not persist result cache entry: {e}")
+            return
+        with self._lock:
+            self.stats["writes"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Stats suitable for run metadata."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "read_enabled": self.read,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            }
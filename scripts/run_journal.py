@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Append-only journal for evaluation runs.
+
+Rewriting the whole `evaluation_*.json` after every candidate costs O(n) bytes per
+candidate (the full prompt plus every prior rating), and truncating the file in place
+means a crash mid-write can corrupt the run. Instead, each candidate result is
+appended as one NDJSON line to `evaluation_<timestamp>.journal.ndjson`, and the usual
+`evaluation_*.json` is produced by a compaction step that writes a temp file and
+renames it over the target.
+"""
+
+import os
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+
+def atomic_write_json(filepath: Path, data: Any, indent: Optional[int] = 2):
+    """Write JSON to a temp file in the same directory, fsync it, then rename over the target."""
+    _atomic_write(filepath, lambda f: json.dump(data, f, indent=indent))
+
+
+def atomic_write_text(filepath: Path, text: str):
+    """Write text to a temp file in the same directory, fsync it, then rename over the target."""
+    _atomic_write(filepath, lambda f: f.write(text))
+
+
+def _atomic_write(filepath: Path, write: Callable[[Any], Any]):
+    filepath = Path(filepath)
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def journal_path_for(run_file: Path) -> Path:
+    """evaluation_<ts>.json -> evaluation_<ts>.journal.ndjson"""
+    run_file = Path(run_file)
+    return run_file.with_name(f"{run_file.stem}.journal.ndjson")
+
+
+class RunJournal:
+    """Append-only NDJSON journal with batched fsync.
+
+    Every append is flushed to the OS immediately (so a crashed process loses
+    nothing), while fsync - the expensive part - happens every `fsync_every`
+    records or `fsync_interval` seconds, whichever comes first.
+    """
+
+    def __init__(self, path: Path, fsync_every: int = 10, fsync_interval: float = 5.0):
+        self.path = Path(path)
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, record: Dict[str, Any]):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            self._sync()
+            self._file.close()
+
+    def remove(self):
+        """Delete the journal once its contents are safely compacted."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def read(path: Path) -> List[Dict[str, Any]]:
+        """Read all complete records; a torn final line from a crash is ignored."""
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return records
+
+
+def replay_journal(path: Path) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Rebuild (run header, ratings, failures) from a journal.
+
+    A success always wins, so a candidate that failed and was later evaluated
+    successfully ends up only in ratings.
+    """
+    header: Dict[str, Any] = {}
+    ratings: Dict[str, Any] = {}
+    failures: Dict[str, Any] = {}
+
+    for record in RunJournal.read(path):
+        kind = record.get("type")
+        if kind == "run_started":
+            header = record
+        elif kind == "rating":
+            ratings[record["candidate_id"]] = record["result"]
+            failures.pop(record["candidate_id"], None)
+        elif kind == "failure":
+            if record["candidate_id"] not in ratings:
+                failures[record["candidate_id"]] = record
+
+    return header, ratings, failures
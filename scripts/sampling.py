@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Adaptive self-consistency sampling.
+
+The same candidate scored twice by the same model rarely gets identical scores.
+Rather than averaging a fixed K evaluations, samples are drawn one wave at a time
+until they agree or `max_samples` is reached. At least two samples are always drawn.
+Two samples agree when every dimension's scores and the overall score are within
+`max_spread` of each other; from three samples on, the dimensions must still lie
+within `max_spread` and the 95% confidence interval of `overall_weighted_score` must
+be within `ci_half_width` (a t-interval over two values is too wide to ever pass).
+Stable candidates stop after two calls; only ambiguous ones pay for more.
+"""
+
+import math
+import statistics
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DIMENSIONS = ("typography", "layout_composition", "color")
+
+# Two-sided 95% Student-t critical values by degrees of freedom
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+        9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131}
+
+
+def _t_critical(df: int) -> float:
+    if df in T_95:
+        return T_95[df]
+    return 2.086 if df <= 20 else 2.042 if df <= 30 else 1.96
+
+
+def ci_half_width(values: List[float]) -> Optional[float]:
+    """Half-width of the 95% confidence interval of the mean (None below two values)."""
+    if len(values) < 2:
+        return None
+    return _t_critical(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def _dimension_scores(samples: List[Dict[str, Any]], dimension: str) -> List[float]:
+    return [s["criteria"][dimension]["score"] for s in samples if dimension in s.get("criteria", {})]
+
+
+def _sum_numeric(dicts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total: Dict[str, Any] = {}
+    for d in dicts:
+        for key, value in d.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                total[key] = total.get(key, 0) + value
+    return {key: round(value, 6) if isinstance(value, float) else value for key, value in total.items()}
+
+
+class SamplingPolicy:
+    """When to stop drawing samples for a candidate, and how to combine them."""
+
+    def __init__(self, max_samples: int, min_samples: int = 2, wave: int = 1,
+                 max_spread: float = 1.0, ci_half_width: float = 0.25):
+        self.max_samples = max(1, max_samples)
+        # Agreement needs at least two samples to compare
+        self.min_samples = min(max(2, min_samples), self.max_samples)
+        # Samples requested in parallel per round
+        self.wave = max(1, wave)
+        # Max (highest - lowest) score per dimension (and overall, with two samples)
+        self.max_spread = max_spread
+        # Max 95% CI half-width of overall_weighted_score, from three samples on
+        self.ci_half_width = ci_half_width
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "max_samples": self.max_samples,
+            "min_samples": self.min_samples,
+            "wave": self.wave,
+            "max_spread": self.max_spread,
+            "ci_half_width": self.ci_half_width,
+        }
+
+    def next_wave(self, drawn: int) -> int:
+        """How many samples to request next (0 = stop)."""
+        if drawn < self.min_samples:
+            return min(max(self.wave, self.min_samples - drawn), self.max_samples - drawn)
+        return min(self.wave, self.max_samples - drawn)
+
+    def converged(self, samples: List[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
+        """(stop?, reason) given the samples drawn so far."""
+        if len(samples) >= max(2, self.min_samples) and self._agree(samples):
+            return True, "converged"
+        if len(samples) >= self.max_samples:
+            return True, "max_samples"
+        return False, None
+
+    def _agree(self, samples: List[Dict[str, Any]]) -> bool:
+        spreads_ok = all(
+            max(scores) - min(scores) <= self.max_spread
+            for scores in (_dimension_scores(samples, d) for d in DIMENSIONS) if scores
+        )
+        overall = [s["overall_weighted_score"] for s in samples]
+        if len(samples) == 2:
+            return spreads_ok and max(overall) - min(overall) <= self.max_spread
+        return spreads_ok and ci_half_width(overall) <= self.ci_half_width
+
+    def aggregate(self, samples: List[Dict[str, Any]], stop_reason: str) -> Dict[str, Any]:
+        """One structured result from several: mean scores, majority red flags, per-sample detail.
+
+        Explanations come from the sample whose overall score is closest to the mean.
+        `overall_weighted_score` and `penalty_applied` are the means over the samples, so
+        the penalty is what the overall score reflects; `red_flags` lists only the flags
+        most samples raised, with every flag's vote count under `sampling.red_flag_votes`.
+        """
+        overall = [s["overall_weighted_score"] for s in samples]
+        mean_overall = statistics.mean(overall)
+        representative = min(samples, key=lambda s: abs(s["overall_weighted_score"] - mean_overall))
+
+        result = {key: value for key, value in representative.items()
+                  if key not in ("usage", "stream", "image_tokens", "cache_hit", "hedge", "call_metrics")}
+        result["criteria"] = {}
+        dimensions = {}
+        for dimension in DIMENSIONS:
+            scored = [s["criteria"][dimension] for s in samples if dimension in s.get("criteria", {})]
+            if not scored:
+                continue
+            scores = [c["score"] for c in scored]
+            result["criteria"][dimension] = {
+                "score": round(statistics.mean(scores), 2),
+                "explanation": representative["criteria"].get(dimension, scored[0])["explanation"],
+                "confidence": round(statistics.mean(c["confidence"] for c in scored), 2)
+            }
+            dimensions[dimension] = {"mean": round(statistics.mean(scores), 3),
+                                     "spread": max(scores) - min(scores)}
+
+        # A red flag counts when most samples raised it
+        flag_counts = Counter(flag for s in samples for flag in set(s.get("red_flags", [])))
+        result["red_flags"] = [flag for flag, count in flag_counts.items() if count * 2 > len(samples)]
+        result["base_weighted_score"] = round(statistics.mean(s["base_weighted_score"] for s in samples), 2)
+        result["penalty_applied"] = round(statistics.mean(s["penalty_applied"] for s in samples), 2)
+        result["overall_weighted_score"] = round(mean_overall, 2)
+        result["overall_confidence"] = round(statistics.mean(s.get("overall_confidence", 0) for s in samples), 2)
+
+        # Cost accounting covers every call made
+        usages = [s["usage"] for s in samples if s.get("usage")]
+        if usages:
+            result["usage"] = _sum_numeric(usages)
+        image_tokens = [s["image_tokens"] for s in samples if s.get("image_tokens")]
+        if image_tokens:
+            result["image_tokens"] = _sum_numeric(image_tokens)
+        call_metrics = [s["call_metrics"] for s in samples if s.get("call_metrics")]
+        if call_metrics:
+            # Totals over the samples; per-call values stay in per_sample
+            result["call_metrics"] = {"model": call_metrics[0]["model"], **_sum_numeric(call_metrics)}
+        if all(s.get("cache_hit") for s in samples):
+            result["cache_hit"] = samples[0]["cache_hit"]
+
+        ci = ci_half_width(overall)
+        result["sampling"] = {
+            "samples": len(samples),
+            "stop_reason": stop_reason,
+            "overall": {
+                "mean": round(mean_overall, 3),
+                "stdev": round(statistics.stdev(overall), 3) if len(overall) > 1 else 0.0,
+                "ci95_half_width": round(ci, 3) if ci is not None else None,
+                "min": min(overall),
+                "max": max(overall)
+            },
+            "dimensions": dimensions,
+            "red_flag_votes": dict(flag_counts),
+            "per_sample": [
+                {
+                    "overall_weighted_score": s["overall_weighted_score"],
+                    "scores": {d: c["score"] for d, c in s.get("criteria", {}).items()},
+                    "red_flags": s.get("red_flags", []),
+                    "evaluated_at": s.get("evaluated_at"),
+                    "cache_hit": bool(s.get("cache_hit")),
+                    **({"usage": s["usage"]} if s.get("usage") else {}),
+                    **({"call_metrics": s["call_metrics"]} if s.get("call_metrics") else {}),
+                    **({"stream": s["stream"]} if s.get("stream") else {})
+                }
+                for s in samples
+            ]
+        }
+        return result
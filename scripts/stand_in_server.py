@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI and Anthropic APIs, for load testing without a network.
+
+Speaks enough of `POST /v1/chat/completions` and `POST /v1/messages` (blocking and
+streamed) for the official SDKs used by OpenAIProvider and ClaudeProvider, which
+reach it through `evaluate_portfolios.py --base-url http://127.0.0.1:8080`. The
+batch APIs used by `--batch` are served too: OpenAI's `/v1/files` and `/v1/batches`,
+and Anthropic's `/v1/messages/batches`. A batch is answered when it is created and
+reports itself finished `--batch-delay` seconds later; per-request outcomes follow
+the same behaviour (429 / 5xx become errored requests, truncated and malformed
+outcomes a cut-off answer).
+Answers are schema-valid evaluations after a simulated latency, and misbehaviour
+is scriptable:
+
+- latency distributions (fixed / uniform / lognormal)
+- 429s with Retry-After, at random or from a server-side requests-per-minute limit
+- 5xx errors
+- truncated bodies (the connection drops mid-response or mid-stream)
+- malformed bodies (complete, but not valid JSON) and answers that are prose
+  instead of the evaluation JSON
+- slow streaming: a delay between streamed chunks
+
+Behaviour comes from flags or a JSON file with the same names (`--behavior`), which
+may also script the first requests exactly: `"sequence": ["429", "ok", "5xx"]`.
+`GET /stats` returns request and outcome counters.
+
+    python3 stand_in_server.py --port 8080 --latency-median 2 --rate-429 0.05 --rate-5xx 0.02
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from email import policy
+from email.parser import BytesParser
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.mock_provider import LATENCY_DISTRIBUTIONS, sample_latency, mock_answer, random_scores
+
+
+OUTCOMES = ("ok", "429", "5xx", "truncated", "malformed", "invalid_answer")
+# Streamed answers are sent in pieces of this many characters
+STREAM_CHUNK_CHARS = 40
+# Rough billing estimate for the usage block
+IMAGE_TOKENS = 1500
+
+
+class Behavior:
+    """How the stand-in answers: latency, failure rates and an optional scripted sequence."""
+
+    FIELDS = {
+        "latency": "lognormal", "latency_median": 1.0, "latency_sigma": 0.5,
+        "rate_429": 0.0, "retry_after": 2.0, "rate_5xx": 0.0, "status_5xx": 503,
+        "rate_truncated": 0.0, "rate_malformed": 0.0, "rate_invalid_answer": 0.0,
+        "stream_chunk_delay": 0.0, "response_chars": 1500, "rpm": None, "sequence": [], "seed": None,
+        "batch_delay": 0.0,
+    }
+
+    def __init__(self, **settings):
+        unknown = set(settings) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"unknown behavior setting(s): {', '.join(sorted(unknown))}")
+        for name, default in self.FIELDS.items():
+            setattr(self, name, settings.get(name, default))
+        if self.latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        bad = [o for o in self.sequence if o not in OUTCOMES]
+        if bad:
+            raise ValueError(f"sequence outcomes must be among {', '.join(OUTCOMES)}, got {bad}")
+        self.sequence = deque(self.sequence)
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self._recent = deque()  # request times within the last minute (for rpm)
+
+    def settings(self) -> Dict[str, Any]:
+        return {name: (list(getattr(self, name)) if name == "sequence" else getattr(self, name))
+                for name in self.FIELDS}
+
+    def next_request(self) -> Dict[str, Any]:
+        """Outcome, latency and answer for the next request."""
+        with self._lock:
+            now = time.monotonic()
+            if self.rpm:
+                while self._recent and now - self._recent[0] >= 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rpm:
+                    return {"outcome": "429", "latency": 0.0, "retry_after": 60 - (now - self._recent[0]),
+                            "remaining": 0}
+                self._recent.append(now)
+            latency = sample_latency(self._random, self.latency, self.latency_median, self.latency_sigma)
+            if self.sequence:
+                outcome = self.sequence.popleft()
+            else:
+                roll = self._random.random()
+                outcome = "ok"
+                for name, rate in (("429", self.rate_429), ("5xx", self.rate_5xx),
+                                   ("truncated", self.rate_truncated), ("malformed", self.rate_malformed),
+                                   ("invalid_answer", self.rate_invalid_answer)):
+                    if roll < rate:
+                        outcome = name
+                        break
+                    roll -= rate
+            answer = random_scores(self._random)
+            remaining = self.rpm - len(self._recent) if self.rpm else None
+        return {"outcome": outcome, "latency": latency, "retry_after": self.retry_after,
+                "remaining": remaining, **answer}
+
+
+def openai_completion(model: str, text: str, usage: Dict[str, int], finish_reason: str = "stop") -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-stand-in", "object": "chat.completion", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": usage["input"], "completion_tokens": usage["output"],
+                  "total_tokens": usage["input"] + usage["output"],
+                  "prompt_tokens_details": {"cached_tokens": 0},
+                  "completion_tokens_details": {"reasoning_tokens": 0}}
+    }
+
+
+def anthropic_message(model: str, text: str, usage: Dict[str, int], stop_reason: str = "end_turn") -> Dict[str, Any]:
+    return {
+        "id": "msg_stand_in", "type": "message", "role": "assistant", "model": model,
+        "content": [{"type": "text", "text": text}], "stop_reason": stop_reason, "stop_sequence": None,
+        "usage": {"input_tokens": usage["input"], "output_tokens": usage["output"],
+                  "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+    }
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _jsonl(records) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the evaluator's connection pool is exercised like against the real APIs
+    protocol_version = "HTTP/1.1"
+    server: "StandInServer"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ------------------------------------------------------------------ plumbing
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                   outcome: str = "ok"):
+        payload = json.dumps(body).encode()
+        if outcome == "malformed":
+            # Complete body, broken syntax
+            payload = payload[:-2]
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if outcome == "truncated":
+            # Declared length never arrives: the connection drops halfway through
+            self.wfile.write(payload[:len(payload) // 2])
+            self.close_connection = True
+        else:
+            self.wfile.write(payload)
+
+    def _send_raw(self, payload: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _not_found(self):
+        self._send_json(404, {"error": {"type": "not_found_error", "message": f"no route {self.path}"}})
+
+    def _start_stream(self, headers: Dict[str, str]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _send_event(self, data: Any, event: Optional[str] = None):
+        text = (f"event: {event}\n" if event else "") + f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+        chunk = text.encode()
+        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _rate_headers(self, plan: Dict[str, Any], api: str) -> Dict[str, str]:
+        behavior = self.server.behavior
+        if not behavior.rpm:
+            return {}
+        if api == "openai":
+            return {"x-ratelimit-limit-requests": str(behavior.rpm),
+                    "x-ratelimit-remaining-requests": str(plan["remaining"])}
+        return {"anthropic-ratelimit-requests-limit": str(behavior.rpm),
+                "anthropic-ratelimit-requests-remaining": str(plan["remaining"])}
+
+    def _error_body(self, outcome: str, api: str):
+        """(status, error body) for a 429 or 5xx outcome."""
+        if outcome == "429":
+            status, kind, message = 429, "rate_limit_error", "Rate limit exceeded (stand-in)"
+        else:
+            status = self.server.behavior.status_5xx
+            kind, message = ("overloaded_error" if status == 529 else "api_error"), "Server error (stand-in)"
+        if api == "openai":
+            return status, {"error": {"message": message, "type": kind, "code": None}}
+        return status, {"type": "error", "error": {"type": kind, "message": message}}
+
+    def _error(self, plan: Dict[str, Any], api: str):
+        headers = self._rate_headers(plan, api)
+        if plan["outcome"] == "429":
+            headers["Retry-After"] = f"{max(plan['retry_after'], 0):.3f}"
+        status, body = self._error_body(plan["outcome"], api)
+        self._send_json(status, body, headers)
+
+    @staticmethod
+    def _input_tokens(request: Dict[str, Any]) -> int:
+        """Rough input token count: a fixed cost per image plus ~4 characters per text token."""
+        images, chars = 0, len(str(request.get("system", "")))
+        for message in request.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, str):
+                chars += len(content)
+                continue
+            for block in content or []:
+                if block.get("type") in ("image", "image_url"):
+                    images += 1
+                else:
+                    chars += len(block.get("text", ""))
+        return images * IMAGE_TOKENS + chars // 4
+
+    # ------------------------------------------------------------------ routes
+
+    def do_HEAD(self):
+        # Connection warm-up pings
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        server = self.server
+        if path == "/stats":
+            self._send_json(200, server.summary())
+            return
+        match = re.fullmatch(r".*/files/([^/]+)/content", path)
+        if match and match.group(1) in server.files:
+            self._send_raw(server.files[match.group(1)]["content"], "application/jsonl")
+            return
+        match = re.fullmatch(r".*/messages/batches/([^/]+)(/results)?", path)
+        if match and match.group(1) in server.batches:
+            batch = server.batches[match.group(1)]
+            if not match.group(2):
+                self._send_json(200, self._anthropic_batch_view(batch))
+            elif time.time() >= batch["ends_at"]:
+                self._send_raw(_jsonl(batch["results"]), "application/binary")
+            else:
+                self._not_found()
+            return
+        match = re.fullmatch(r".*/batches/([^/]+)", path)
+        if match and match.group(1) in server.batches:
+            self._send_json(200, self._openai_batch_view(server.batches[match.group(1)]))
+            return
+        self._not_found()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/files"):
+            self._create_file(body)
+            return
+        request = json.loads(body or b"{}")
+        if path.endswith("/messages/batches"):
+            self._create_anthropic_batch(request)
+            return
+        if path.endswith("/batches"):
+            self._create_openai_batch(request)
+            return
+        if path.endswith("/chat/completions"):
+            api = "openai"
+        elif path.endswith("/messages"):
+            api = "anthropic"
+        else:
+            self._not_found()
+            return
+
+        plan = self.server.behavior.next_request()
+        self.server.record(api, plan["outcome"])
+        time.sleep(plan["latency"])
+        if plan["outcome"] in ("429", "5xx"):
+            self._error(plan, api)
+            return
+
+        behavior = self.server.behavior
+        if plan["outcome"] == "invalid_answer":
+            text = "Sure! Here is my evaluation of the portfolio: strong typography, weak color."
+        else:
+            text = mock_answer(plan["scores"], plan["red_flags"], behavior.response_chars)
+        usage = {"input": self._input_tokens(request), "output": len(text) // 4}
+        model = request.get("model", "stand-in")
+        headers = self._rate_headers(plan, api)
+        if request.get("stream"):
+            if api == "openai":
+                self._stream_openai(model, text, usage, request, headers, plan["outcome"])
+            else:
+                self._stream_anthropic(model, text, usage, headers, plan["outcome"])
+        elif api == "openai":
+            self._send_json(200, openai_completion(model, text, usage), headers, plan["outcome"])
+        else:
+            self._send_json(200, anthropic_message(model, text, usage), headers, plan["outcome"])
+
+    # ------------------------------------------------------------------ batches
+
+    def _batch_answer(self, api: str, request: Dict[str, Any]):
+        """(status, body) for one request inside a batch; no latency, no connection to drop."""
+        plan = self.server.behavior.next_request()
+        self.server.record(f"{api}_batch", plan["outcome"])
+        if plan["outcome"] in ("429", "5xx"):
+            return self._error_body(plan["outcome"], api)
+        if plan["outcome"] == "invalid_answer":
+            text = "Sure! Here is my evaluation of the portfolio: strong typography, weak color."
+        else:
+            text = mock_answer(plan["scores"], plan["red_flags"], self.server.behavior.response_chars)
+        # A truncated or malformed batch answer is a generation cut off at max tokens
+        cut = plan["outcome"] in ("truncated", "malformed")
+        if cut:
+            text = text[:len(text) // 2]
+        usage = {"input": self._input_tokens(request), "output": len(text) // 4}
+        model = request.get("model", "stand-in")
+        if api == "openai":
+            return 200, openai_completion(model, text, usage, "length" if cut else "stop")
+        return 200, anthropic_message(model, text, usage, "max_tokens" if cut else "end_turn")
+
+    def _create_file(self, body: bytes):
+        """OpenAI file upload (multipart/form-data with `file` and `purpose`)."""
+        form = BytesParser(policy=policy.default).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode() + body)
+        fields = {part.get_param("name", header="content-disposition"): part for part in form.iter_parts()}
+        upload = fields.get("file")
+        if upload is None:
+            self._send_json(400, {"error": {"type": "invalid_request_error", "message": "missing file"}})
+            return
+        purpose = fields["purpose"].get_payload(decode=True).decode() if "purpose" in fields else "batch"
+        record = self.server.add_file(upload.get_filename() or "upload.jsonl", purpose,
+                                      upload.get_payload(decode=True))
+        self._send_json(200, self._file_view(record))
+
+    @staticmethod
+    def _file_view(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": record["id"], "object": "file", "bytes": len(record["content"]),
+                "created_at": int(record["created_at"]), "filename": record["filename"],
+                "purpose": record["purpose"], "status": "processed"}
+
+    def _create_openai_batch(self, request: Dict[str, Any]):
+        server = self.server
+        source = server.files.get(request.get("input_file_id"))
+        if source is None:
+            self._send_json(404, {"error": {"type": "invalid_request_error", "message": "no such input file"}})
+            return
+        output, errors = [], []
+        for line in source["content"].decode().splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            status, body = self._batch_answer("openai", entry["body"])
+            record = {"id": server.new_id("batch_req"), "custom_id": entry["custom_id"], "error": None,
+                      "response": {"status_code": status, "request_id": server.new_id("req"), "body": body}}
+            (output if status == 200 else errors).append(record)
+        batch = server.add_batch("batch", {
+            "endpoint": request.get("endpoint"), "input_file_id": source["id"],
+            "completion_window": request.get("completion_window", "24h"),
+            "output_file_id": server.add_file("batch_output.jsonl", "batch_output", _jsonl(output))["id"]
+            if output else None,
+            "error_file_id": server.add_file("batch_errors.jsonl", "batch_output", _jsonl(errors))["id"]
+            if errors else None,
+            "counts": {"total": len(output) + len(errors), "completed": len(output), "failed": len(errors)}
+        })
+        self._send_json(200, self._openai_batch_view(batch))
+
+    @staticmethod
+    def _openai_batch_view(batch: Dict[str, Any]) -> Dict[str, Any]:
+        done = time.time() >= batch["ends_at"]
+        counts = batch["counts"] if done else {"total": batch["counts"]["total"], "completed": 0, "failed": 0}
+        return {
+            "id": batch["id"], "object": "batch", "endpoint": batch["endpoint"], "errors": None,
+            "input_file_id": batch["input_file_id"], "completion_window": batch["completion_window"],
+            "status": "completed" if done else "in_progress",
+            "output_file_id": batch["output_file_id"] if done else None,
+            "error_file_id": batch["error_file_id"] if done else None,
+            "created_at": int(batch["created_at"]), "completed_at": int(batch["ends_at"]) if done else None,
+            "request_counts": counts
+        }
+
+    def _create_anthropic_batch(self, request: Dict[str, Any]):
+        results = []
+        for entry in request.get("requests", []):
+            status, body = self._batch_answer("anthropic", entry["params"])
+            result = {"type": "succeeded", "message": body} if status == 200 else {"type": "errored", "error": body}
+            results.append({"custom_id": entry["custom_id"], "result": result})
+        batch = self.server.add_batch("msgbatch", {
+            "results": results,
+            # The SDK fetches results from the absolute URL the batch reports
+            "results_url": f"http://{self.headers.get('Host')}/v1/messages/batches/{{id}}/results"
+        })
+        self._send_json(200, self._anthropic_batch_view(batch))
+
+    @staticmethod
+    def _anthropic_batch_view(batch: Dict[str, Any]) -> Dict[str, Any]:
+        done = time.time() >= batch["ends_at"]
+        succeeded = sum(r["result"]["type"] == "succeeded" for r in batch["results"])
+        return {
+            "id": batch["id"], "type": "message_batch", "processing_status": "ended" if done else "in_progress",
+            "request_counts": {"processing": 0 if done else len(batch["results"]),
+                               "succeeded": succeeded if done else 0,
+                               "errored": len(batch["results"]) - succeeded if done else 0,
+                               "canceled": 0, "expired": 0},
+            "created_at": _iso(batch["created_at"]), "ended_at": _iso(batch["ends_at"]) if done else None,
+            "expires_at": _iso(batch["created_at"] + timedelta(days=1).total_seconds()),
+            "archived_at": None, "cancel_initiated_at": None,
+            "results_url": batch["results_url"].format(id=batch["id"]) if done else None
+        }
+
+    def _stream_text(self, text: str, outcome: str, event: Callable[[str], Any], name: Optional[str] = None) -> bool:
+        """Send the answer as deltas; False if the stream was cut off (truncated outcome)."""
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+        for i, piece in enumerate(pieces):
+            if outcome == "truncated" and i == len(pieces) // 2:
+                # Drop the connection without the terminating chunk
+                self.close_connection = True
+                return False
+            if outcome == "malformed" and i == len(pieces) // 2:
+                self._send_event(json.dumps(event(piece))[:-2], name)
+            else:
+                self._send_event(event(piece), name)
+            time.sleep(self.server.behavior.stream_chunk_delay)
+        return True
+
+    def _stream_openai(self, model: str, text: str, usage: Dict[str, int], request: Dict[str, Any],
+                       headers: Dict[str, str], outcome: str):
+        self._start_stream(headers)
+        chunk = {"id": "chatcmpl-stand-in", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": model}
+        if self._stream_text(text, outcome, lambda piece: {
+                **chunk, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}):
+            self._send_event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if request.get("stream_options", {}).get("include_usage"):
+                self._send_event({**chunk, "choices": [], "usage": {
+                    "prompt_tokens": usage["input"], "completion_tokens": usage["output"],
+                    "total_tokens": usage["input"] + usage["output"]}})
+            self._send_event("[DONE]")
+            self._end_stream()
+
+    def _stream_anthropic(self, model: str, text: str, usage: Dict[str, int], headers: Dict[str, str],
+                          outcome: str):
+        self._start_stream(headers)
+        self._send_event({"type": "message_start", "message": {
+            "id": "msg_stand_in", "type": "message", "role": "assistant", "model": model, "content": [],
+            "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": usage["input"], "output_tokens": 1,
+                      "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}}}, "message_start")
+        self._send_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                         "content_block_start")
+        if self._stream_text(text, outcome, lambda piece: {
+                "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}},
+                "content_block_delta"):
+            self._send_event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            self._send_event({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                              "usage": {"output_tokens": usage["output"]}}, "message_delta")
+            self._send_event({"type": "message_stop"}, "message_stop")
+            self._end_stream()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the behaviour and the request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, behavior: Behavior, verbose: bool = False):
+        super().__init__(address, StandInHandler)
+        self.behavior = behavior
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self.counts: Dict[str, Dict[str, int]] = {}
+        # Batch API state: uploaded / generated files and submitted batches, by id
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}_stand_in_{next(self._ids)}"
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> Dict[str, Any]:
+        record = {"id": self.new_id("file"), "filename": filename, "purpose": purpose, "content": content,
+                  "created_at": time.time()}
+        with self._lock:
+            self.files[record["id"]] = record
+        return record
+
+    def add_batch(self, prefix: str, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Register an answered batch; it reports itself finished after the behaviour's batch_delay."""
+        now = time.time()
+        batch = {"id": self.new_id(prefix), "created_at": now, "ends_at": now + self.behavior.batch_delay, **batch}
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        return batch
+
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-stream when they reject a response; that is expected here
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def record(self, api: str, outcome: str):
+        with self._lock:
+            by_outcome = self.counts.setdefault(api, {})
+            by_outcome[outcome] = by_outcome.get(outcome, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {api: dict(by_outcome) for api, by_outcome in self.counts.items()}
+        return {"requests": sum(sum(c.values()) for c in counts.values()), "by_api": counts,
+                "behavior": self.behavior.settings()}
+
+
+def add_behavior_arguments(parser: argparse.ArgumentParser):
+    """Behaviour flags, shared with load_test.py (which forwards them to the server)."""
+    parser.add_argument('--behavior', type=Path, metavar='JSON_FILE',
+                        help='Behaviour settings file (same names as the flags, plus "sequence")')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, help='Latency distribution (default: lognormal)')
+    parser.add_argument('--latency-median', type=float, metavar='SECONDS', help='Median latency (default: 1.0)')
+    parser.add_argument('--latency-sigma', type=float, help='Lognormal sigma (default: 0.5)')
+    parser.add_argument('--rate-429', type=float, metavar='P', help='Fraction of requests answered 429 (default: 0)')
+    parser.add_argument('--retry-after', type=float, metavar='SECONDS', help='Retry-After sent with 429s (default: 2)')
+    parser.add_argument('--rate-5xx', type=float, metavar='P', help='Fraction answered with a 5xx (default: 0)')
+    parser.add_argument('--status-5xx', type=int, metavar='CODE', help='Status code of those errors (default: 503)')
+    parser.add_argument('--rate-truncated', type=float, metavar='P',
+                        help='Fraction of responses whose connection drops halfway through (default: 0)')
+    parser.add_argument('--rate-malformed', type=float, metavar='P',
+                        help='Fraction of response bodies that are not valid JSON (default: 0)')
+    parser.add_argument('--rate-invalid-answer', type=float, metavar='P',
+                        help='Fraction of answers that are prose instead of the evaluation JSON (default: 0)')
+    parser.add_argument('--stream-chunk-delay', type=float, metavar='SECONDS',
+                        help=f'Delay between streamed chunks of {STREAM_CHUNK_CHARS} chars (default: 0)')
+    parser.add_argument('--response-chars', type=int, help='Approximate answer size (default: 1500)')
+    parser.add_argument('--rpm', type=int, help='Server-side requests-per-minute limit enforced with 429s')
+    parser.add_argument('--batch-delay', type=float, metavar='SECONDS',
+                        help='How long a submitted batch reports itself in progress (default: 0)')
+    parser.add_argument('--seed', type=int, help='Random seed for latencies and outcomes')
+
+
+def behavior_from_args(args: argparse.Namespace) -> Behavior:
+    settings: Dict[str, Any] = {}
+    if args.behavior:
+        with open(args.behavior) as f:
+            settings.update(json.load(f))
+    for name in Behavior.FIELDS:
+        value = getattr(args, name, None)
+        if value is not None:
+            settings[name] = value
+    return Behavior(**settings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OpenAI/Anthropic-compatible stand-in server for load tests')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port (default: 8080; 0 picks a free port)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        behavior = behavior_from_args(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    server = StandInServer((args.host, args.port), behavior, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"🧪 Stand-in API listening on http://{host}:{port} (use --base-url http://{host}:{port})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{json.dumps(server.summary(), indent=2)}")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Incremental validation of a streamed JSON answer.
+
+With streaming enabled the providers feed each text delta through
+`IncrementalJSONValidator`, which tracks just enough JSON structure (strings,
+nesting depth, top-level keys) to notice, while tokens are still arriving, that the
+answer can no longer become what `structure_result` expects:
+
+- text before the opening `{` other than a markdown code fence,
+- a `scores` value that is not an object,
+- a top-level object that closes without `scores`,
+- anything but a closing code fence after the object.
+
+The call is then aborted (the stream is closed) instead of paying for, and waiting
+on, the rest of a bad generation.
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scripts.rate_limiter import ResponseParseError
+
+
+REQUIRED_KEYS = ("scores",)
+OBJECT_KEYS = ("scores",)
+CODE_FENCE = "```json"
+
+
+class StreamValidationError(ResponseParseError):
+    """The streamed text cannot parse into the expected JSON object."""
+
+    def __init__(self, message: str, stream_stats: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.stream_stats = stream_stats or {}
+
+
+class IncrementalJSONValidator:
+    """Character-level tracker of a streamed top-level JSON object."""
+
+    def __init__(self, required_keys: Sequence[str] = REQUIRED_KEYS,
+                 object_keys: Sequence[str] = OBJECT_KEYS):
+        self.required_keys = tuple(required_keys)
+        self.object_keys = tuple(object_keys)
+        self.keys: List[str] = []
+        self.complete = False
+
+        self._started = False
+        self._preamble = ""
+        self._trailing = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._collecting_key = False
+        self._key_chars: List[str] = []
+        self._last_key: Optional[str] = None
+        self._value_key: Optional[str] = None  # top-level key whose value starts next
+
+    def feed(self, text: str):
+        """Consume a delta; raises StreamValidationError as soon as the answer is unusable."""
+        for ch in text:
+            if not self._started:
+                self._feed_preamble(ch)
+            elif self.complete:
+                self._feed_trailing(ch)
+            else:
+                self._feed_body(ch)
+
+    def finish(self):
+        """Called at end of stream; the object must have been closed."""
+        if not self.complete:
+            raise StreamValidationError("stream ended before the JSON object was complete")
+
+    def _feed_preamble(self, ch: str):
+        if ch == "{":
+            if self._preamble.strip() not in ("", "```", CODE_FENCE):
+                raise StreamValidationError(f"non-JSON preamble: {self._preamble.strip()[:80]!r}")
+            self._started = True
+            self._depth = 1
+            self._expect_key = True
+            return
+        self._preamble += ch
+        if not CODE_FENCE.startswith(self._preamble.strip()):
+            raise StreamValidationError(f"non-JSON preamble: {self._preamble.strip()[:80]!r}")
+
+    def _feed_trailing(self, ch: str):
+        self._trailing += ch
+        if not "```".startswith(self._trailing.strip()):
+            raise StreamValidationError(f"unexpected text after the JSON object: {self._trailing.strip()[:80]!r}")
+
+    def _feed_body(self, ch: str):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._collecting_key:
+                    self._collecting_key = False
+                    self._last_key = "".join(self._key_chars)
+                    self.keys.append(self._last_key)
+                    self._expect_key = False
+                return
+            if self._collecting_key:
+                self._key_chars.append(ch)
+            return
+
+        if ch.isspace():
+            return
+
+        if self._value_key is not None:
+            # First character of a top-level value
+            if self._value_key in self.object_keys and ch != "{":
+                raise StreamValidationError(f'"{self._value_key}" must be a JSON object')
+            self._value_key = None
+
+        if ch == '"':
+            self._in_string = True
+            if self._depth == 1 and self._expect_key:
+                self._collecting_key = True
+                self._key_chars = []
+        elif ch == ":" and self._depth == 1:
+            self._value_key = self._last_key
+        elif ch == "," and self._depth == 1:
+            self._expect_key = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                missing = [key for key in self.required_keys if key not in self.keys]
+                if missing:
+                    raise StreamValidationError(f"JSON object closed without {', '.join(missing)}")
+                self.complete = True
+
+
+def read_json_stream(deltas: Iterable[str], started: float) -> Tuple[str, Dict[str, Any]]:
+    """Accumulate streamed text while validating it; returns (text, timing stats).
+
+    `started` is the `time.perf_counter()` value taken before the request was sent.
+    Raises StreamValidationError (carrying the partial stats) on an unusable stream.
+    """
+    validator = IncrementalJSONValidator()
+    parts: List[str] = []
+    first_token_at = None
+
+    def stats() -> Dict[str, Any]:
+        finished = time.perf_counter()
+        return {
+            "ttft_seconds": round(first_token_at - started, 3) if first_token_at else None,
+            "generation_seconds": round(finished - first_token_at, 3) if first_token_at else None,
+            "total_seconds": round(finished - started, 3),
+            "chars": sum(len(p) for p in parts),
+        }
+
+    try:
+        for delta in deltas:
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(delta)
+            validator.feed(delta)
+        validator.finish()
+    except StreamValidationError as e:
+        e.stream_stats = {**stats(), "aborted": True}
+        raise
+
+    return "".join(parts), {**stats(), "aborted": False}
+
+
+def add_throughput(stream_stats: Dict[str, Any], output_tokens: Optional[int]) -> Dict[str, Any]:
+    """Add output tokens and generation tokens/sec (time after the first token)."""
+    generation_seconds = stream_stats.get("generation_seconds")
+    stream_stats["output_tokens"] = output_tokens
+    stream_stats["tokens_per_second"] = (
+        round(output_tokens / generation_seconds, 1) if output_tokens and generation_seconds else None
+    )
+    return stream_stats
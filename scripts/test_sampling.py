@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test adaptive self-consistency sampling offline.
+
+Runs PortfolioEvaluator._sample_candidate against stub providers (no API calls):
+a stable stub that scores every call the same must stop after two calls, and an
+ambiguous stub whose scores swing between calls must escalate to --samples.
+
+    python3 test_sampling.py
+    python -m pytest scripts/test_sampling.py
+"""
+
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.evaluate_portfolios import ModelProvider, PortfolioEvaluator
+from scripts.sampling import SamplingPolicy
+
+
+MAX_SAMPLES = 5
+
+
+class StubProvider(ModelProvider):
+    """Answers with the next score set in `answers` (cycling), counting calls."""
+
+    model = "stub"
+
+    def __init__(self, answers: List[Dict[str, Any]]):
+        self.answers = answers
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def evaluate_portfolio(self, image_path: str, prompt: str, exemplar_images: List[str]) -> Dict[str, Any]:
+        with self._lock:
+            answer = self.answers[self.calls % len(self.answers)]
+            self.calls += 1
+        return {
+            "scores": {dimension: {"score": score, "explanation": "stub", "confidence": 0.8}
+                       for dimension, score in answer["scores"].items()},
+            "red_flags": answer.get("red_flags", []),
+            "overall_weighted_score": answer["overall"],
+            "overall_confidence": 0.8
+        }
+
+
+def answer(typography: float, layout: float, color: float, red_flags: List[str] = ()) -> Dict[str, Any]:
+    overall = round(0.35 * typography + 0.35 * layout + 0.30 * color, 2)
+    return {"scores": {"typography": typography, "layout_composition": layout, "color": color},
+            "red_flags": list(red_flags), "overall": overall}
+
+
+def answer_record(typography: float, layout: float, color: float) -> Dict[str, Any]:
+    """A structured (post structure_result) sample, for calling the policy directly."""
+    stub = answer(typography, layout, color)
+    return {"criteria": {d: {"score": s} for d, s in stub["scores"].items()},
+            "overall_weighted_score": stub["overall"]}
+
+
+def sample(provider: StubProvider) -> Dict[str, Any]:
+    evaluator = PortfolioEvaluator(provider, Path(__file__).parent.parent,
+                                   sampling=SamplingPolicy(MAX_SAMPLES))
+    return evaluator._sample_candidate(Path("candidate_1.jpg"), "prompt", [])
+
+
+def test_stable_candidate_stops_at_two_calls():
+    provider = StubProvider([answer(4, 4, 3)])
+    result = sample(provider)
+    assert provider.calls == 2
+    assert result["sampling"]["stop_reason"] == "converged"
+    assert result["overall_weighted_score"] == answer(4, 4, 3)["overall"]
+
+
+def test_near_agreement_stops_at_two_calls():
+    # One point apart on one dimension is within the default --max-spread
+    provider = StubProvider([answer(4, 4, 3), answer(4, 3, 3)])
+    result = sample(provider)
+    assert provider.calls == 2
+    assert result["sampling"]["stop_reason"] == "converged"
+
+
+def test_ambiguous_candidate_escalates():
+    provider = StubProvider([answer(2, 2, 2), answer(4, 4, 4)])
+    result = sample(provider)
+    assert provider.calls == MAX_SAMPLES
+    assert result["sampling"]["stop_reason"] == "max_samples"
+
+
+def test_min_samples_one_still_compares_two():
+    # A single sample is never evidence of agreement
+    assert SamplingPolicy(MAX_SAMPLES, min_samples=1).min_samples == 2
+    assert SamplingPolicy(MAX_SAMPLES).converged([answer_record(4, 4, 3)]) == (False, None)
+
+
+def test_minority_red_flag_is_voted_not_dropped():
+    provider = StubProvider([answer(4, 4, 3, ["sloppy_images"]), answer(4, 4, 3), answer(4, 4, 3)])
+    evaluator = PortfolioEvaluator(provider, Path(__file__).parent.parent,
+                                   sampling=SamplingPolicy(3, min_samples=3, ci_half_width=10))
+    result = evaluator._sample_candidate(Path("candidate_1.jpg"), "prompt", [])
+    assert result["red_flags"] == []
+    assert result["sampling"]["red_flag_votes"] == {"sloppy_images": 1}
+    assert result["penalty_applied"] == 0.1
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_") and callable(test)]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name}: {e!r}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
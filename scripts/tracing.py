@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Stage-level spans exported as a Chrome / Perfetto trace.
+
+    with span("encode_image", image=name):
+        ...
+
+Tracing is off unless `start_tracing()` was called (`--trace out.json`); `span()`
+then returns one shared no-op context manager, so instrumented code pays a
+function call and nothing else.
+
+When on, every span becomes a complete ("X") event on the thread that ran it,
+giving one timeline per worker. A span with a `candidate` argument labels every
+span nested under it on that thread, and those spans are also emitted as async
+events keyed by candidate id, giving one timeline per candidate. Open the file
+in https://ui.perfetto.dev or chrome://tracing.
+"""
+
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from scripts.run_journal import atomic_write_json
+
+
+_NOOP = nullcontext()
+_tracer: Optional["Tracer"] = None
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "candidate", "previous", "started")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        context = self.tracer._context
+        self.previous = getattr(context, "candidate", None)
+        candidate = self.args.get("candidate")
+        self.candidate = self.previous if candidate is None else candidate
+        context.candidate = self.candidate
+        if self.candidate is None:
+            self.args.pop("candidate", None)
+        else:
+            self.args["candidate"] = self.candidate
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        finished = time.perf_counter()
+        self.tracer._context.candidate = self.previous
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.started, finished, self.args, self.candidate)
+        return False
+
+
+class Tracer:
+    """Collects span events in memory until the run writes them out."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._context = threading.local()
+        self._threads: Dict[int, str] = {}
+        self.events: List[Dict[str, Any]] = []
+
+    def span(self, name: str, args: Dict[str, Any]) -> _Span:
+        return _Span(self, name, args)
+
+    def _us(self, t: float) -> float:
+        return round((t - self._origin) * 1_000_000, 1)
+
+    def _record(self, name: str, started: float, finished: float, args: Dict[str, Any],
+                candidate: Optional[str]):
+        tid = threading.get_native_id()
+        events = [{"name": name, "cat": "stage", "ph": "X", "ts": self._us(started),
+                   "dur": self._us(finished) - self._us(started), "pid": self.pid, "tid": tid, "args": args}]
+        if candidate is not None:
+            # The same span on the candidate's own async track
+            common = {"name": name, "cat": "candidate", "id": f"candidate-{candidate}", "pid": self.pid, "tid": tid}
+            events.append({**common, "ph": "b", "ts": self._us(started), "args": args})
+            events.append({**common, "ph": "e", "ts": self._us(finished)})
+        with self._lock:
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+            self.events.extend(events)
+
+    def trace_events(self) -> List[Dict[str, Any]]:
+        """Span events plus process/thread name metadata, ordered by timestamp."""
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+            threads = dict(self._threads)
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "evaluate_portfolios"}}]
+        metadata.extend({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                        for tid, name in threads.items())
+        return metadata + events
+
+    def write(self, path: Path) -> int:
+        """Write a Chrome trace-event JSON file; returns the number of span events."""
+        events = self.trace_events()
+        atomic_write_json(Path(path), {"traceEvents": events, "displayTimeUnit": "ms"}, indent=None)
+        return sum(1 for e in events if e["ph"] == "X")
+
+
+def span(name: str, **args):
+    """Context manager timing one stage (a shared no-op unless tracing is on)."""
+    if _tracer is None:
+        return _NOOP
+    return _tracer.span(name, args)
+
+
+def current_candidate() -> Optional[str]:
+    """Candidate labelling spans on this thread, to carry over to helper threads."""
+    if _tracer is None:
+        return None
+    return getattr(_tracer._context, "candidate", None)
+
+
+def start_tracing() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """Turn tracing off and return the tracer holding the recorded events."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer